@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_NUMBER_RE = re.compile(r"^\s*([-+]?\d+(?:\.\d+)?)\s*(%?)\s*$")
+
+
+def parse_metric(value: Any) -> Optional[float]:
+    """Metric as a number: "15%" -> 0.15, "8.5" -> 8.5, 9.2 -> 9.2; None if not numeric"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.match(str(value))
+    if match is None:
+        return None
+    number = float(match.group(1))
+    return number / 100.0 if match.group(2) else number
+
+
+def format_metric(value: Any) -> str:
+    """Display form of a metric as it appeared in the source data"""
+    return value if isinstance(value, str) else f"{value:g}"
+
+
+class AnalysisRecord:
+    """One symbol's project analysis, parsed and serialized once at load"""
+
+    __slots__ = ("symbol", "sector", "metrics", "display", "recommendations", "payload")
+
+    def __init__(self, symbol: str, sector: Optional[str], raw_metrics: Dict[str, Any], recommendations: List[str]):
+        self.symbol = symbol
+        self.sector = sector
+        self.metrics = {name: parse_metric(value) for name, value in raw_metrics.items()}
+        self.display = {name: format_metric(value) for name, value in raw_metrics.items()}
+        self.recommendations = recommendations
+        # /project/analysis response body, ready to send
+        self.payload = json.dumps({
+            "symbol": symbol,
+            "sector": sector,
+            "project_metrics": self.display,
+            "metrics": self.metrics,
+            "recommendations": recommendations,
+        }, separators=(",", ":")).encode()
+
+
+class _Snapshot:
+    """Immutable set of records with its indexes; replaced wholesale on reload"""
+
+    def __init__(self, records: List[AnalysisRecord]):
+        self.by_symbol: Dict[str, AnalysisRecord] = {record.symbol: record for record in records}
+        by_sector: Dict[str, List[AnalysisRecord]] = {}
+        for record in self.by_symbol.values():
+            if record.sector:
+                by_sector.setdefault(record.sector.lower(), []).append(record)
+        self.by_sector: Dict[str, Tuple[AnalysisRecord, ...]] = {
+            sector: tuple(sorted(records, key=lambda r: r.symbol)) for sector, records in by_sector.items()
+        }
+        self.sector_payloads: Dict[str, bytes] = {
+            sector: b"[" + b",".join(record.payload for record in records) + b"]"
+            for sector, records in self.by_sector.items()
+        }
+
+
+def _records_from_mapping(data: Dict[str, Any]) -> List[AnalysisRecord]:
+    return [
+        AnalysisRecord(
+            symbol.upper(),
+            entry.get("sector"),
+            entry.get("project_metrics", {}),
+            list(entry.get("recommendations", [])),
+        )
+        for symbol, entry in data.items()
+    ]
+
+
+class AnalysisStore:
+    """Project analysis data loaded from a JSON file or SQLite database
+
+    JSON files map symbol -> {"sector", "project_metrics", "recommendations"}.
+    SQLite databases need a table project_analysis(symbol, sector, metrics,
+    recommendations) with the last two as JSON text. Lookups are dict hits on
+    the current snapshot; reloads build a new snapshot off the event loop and
+    swap it in.
+    """
+
+    def __init__(
+        self,
+        path: str = os.getenv("PROJECT_ANALYSIS_PATH", "data/project_analysis.json"),
+        defaults: Optional[Dict[str, Any]] = None,
+        reload_interval: float = float(os.getenv("PROJECT_ANALYSIS_RELOAD", "10")),
+    ):
+        self.path = path
+        self.defaults = defaults or {}
+        self.reload_interval = reload_interval
+        self._snapshot = _Snapshot(_records_from_mapping(self.defaults))
+        self._loaded_mtime = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "loads": 0,
+            "load_errors": 0,
+        }
+
+    def get(self, symbol: str) -> Optional[AnalysisRecord]:
+        return self._snapshot.by_symbol.get(symbol)
+
+    def by_sector(self, sector: str) -> Tuple[AnalysisRecord, ...]:
+        return self._snapshot.by_sector.get(sector.lower(), ())
+
+    def sector_payload(self, sector: str) -> Optional[bytes]:
+        """JSON array of every record in a sector, pre-serialized"""
+        return self._snapshot.sector_payloads.get(sector.lower())
+
+    def sectors(self) -> List[str]:
+        return sorted(self._snapshot.by_sector)
+
+    def _read(self) -> List[AnalysisRecord]:
+        if self.path.endswith((".db", ".sqlite", ".sqlite3")):
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            try:
+                rows = connection.execute(
+                    "SELECT symbol, sector, metrics, recommendations FROM project_analysis"
+                ).fetchall()
+            finally:
+                connection.close()
+            return [
+                AnalysisRecord(symbol.upper(), sector, json.loads(metrics or "{}"), json.loads(recommendations or "[]"))
+                for symbol, sector, metrics, recommendations in rows
+            ]
+        with open(self.path, encoding="utf-8") as f:
+            return _records_from_mapping(json.load(f))
+
+    def reload(self) -> bool:
+        """Load the file if it changed since the last load; returns True if swapped"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._loaded_mtime:
+            return False
+        try:
+            records = self._read()
+        except Exception as e:
+            self.stats["load_errors"] += 1
+            logger.error(f"Could not load project analysis from {self.path}: {e}")
+            return False
+        self._snapshot = _Snapshot(records)
+        self._loaded_mtime = mtime
+        self.stats["loads"] += 1
+        logger.info(f"Project analysis loaded for {len(records)} symbols")
+        return True
+
+    def start(self) -> None:
+        """Load now and keep watching the file in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                logger.error(f"Project analysis reload failed: {e}")
+            await asyncio.sleep(self.reload_interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "symbols": len(self._snapshot.by_symbol),
+            "sectors": len(self._snapshot.by_sector),
+            "path": self.path,
+        }
@@ -0,0 +1,358 @@
+import asyncio
+import heapq
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Default TTLs (seconds) per cache namespace; the namespace is the key prefix before "_"
+DEFAULT_NAMESPACE_TTLS = {
+    "quote": int(os.getenv("CACHE_TTL_QUOTE", "60")),
+    "overview": int(os.getenv("CACHE_TTL_OVERVIEW", "1800")),
+    "search": int(os.getenv("CACHE_TTL_SEARCH", "3600")),
+    "analysis": int(os.getenv("CACHE_TTL_ANALYSIS", "900")),
+}
+
+# How long past expiry an entry may still be served while it is refreshed in the background
+DEFAULT_MAX_STALENESS = {
+    "quote": int(os.getenv("CACHE_MAX_STALE_QUOTE", "120")),
+    "overview": int(os.getenv("CACHE_MAX_STALE_OVERVIEW", "3600")),
+    "search": int(os.getenv("CACHE_MAX_STALE_SEARCH", "86400")),
+    # Analysis keys already carry the data version, so stale entries are never useful
+    "analysis": 0,
+}
+
+
+class CacheEntry:
+    """A single cached value with its expiry and approximate size"""
+
+    __slots__ = ("data", "expiry", "stale_until", "size", "namespace", "stored_at", "delta", "encoded")
+
+    def __init__(
+        self,
+        data: Any,
+        expiry: float,
+        stale_until: float,
+        size: int,
+        namespace: str,
+        stored_at: float,
+        delta: float = 0.0,
+    ):
+        self.data = data
+        self.expiry = expiry
+        self.stale_until = stale_until
+        self.size = size
+        self.namespace = namespace
+        self.stored_at = stored_at
+        # Time the upstream fetch took; drives early probabilistic refresh
+        self.delta = delta
+        # Pre-encoded response bodies by variant, attached on first use
+        self.encoded: Optional[Dict[str, Any]] = None
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expiry
+
+    def holds(self, value: Any) -> bool:
+        """Whether value is what this entry currently stores (so derived values still apply)"""
+        return self.data is value
+
+    def age(self, now: float) -> float:
+        return now - self.stored_at
+
+    def should_refresh_early(self, now: float, beta: float = 1.0) -> bool:
+        """XFetch: refresh before expiry with a probability that grows as expiry nears"""
+        if self.delta <= 0:
+            return False
+        return now - self.delta * beta * math.log(random.random() or 1e-12) >= self.expiry
+
+
+class StoredEntry(CacheEntry):
+    """Entry whose value lives in a namespace's backing store; only expiry metadata is kept here
+
+    data is rebuilt from the store on each read, so instead of object identity
+    the entry holds its value while the store row still has the version it
+    had when the entry was written.
+    """
+
+    __slots__ = ("store", "symbol", "version")
+
+    def __init__(self, store: Any, symbol: str, expiry: float, stale_until: float, size: int,
+                 namespace: str, stored_at: float, delta: float = 0.0):
+        self.store = store
+        self.symbol = symbol
+        self.version = store.version(symbol)
+        self.expiry = expiry
+        self.stale_until = stale_until
+        self.size = size
+        self.namespace = namespace
+        self.stored_at = stored_at
+        self.delta = delta
+        self.encoded = None
+
+    @property
+    def data(self) -> Any:
+        return self.store.get(self.symbol)
+
+    def holds(self, value: Any) -> bool:
+        return self.store.version(self.symbol) == self.version
+
+
+class CacheService:
+    """Bounded in-memory LRU cache with per-namespace TTLs
+
+    A namespace can be backed by a store (e.g. the columnar QuoteStore for
+    "quote"): values are written to store.update(value, updated_at, symbol),
+    read back with store.get(symbol) and checked with store.version(symbol),
+    where symbol is the key after the namespace prefix. Store rows outlive
+    their entries: expiring or evicting an entry only ends cache serving, and
+    the store keeps the latest value (with its own timestamp) for bulk reads.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        max_entries: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000")),
+        max_bytes: int = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        namespace_ttls: Optional[Dict[str, int]] = None,
+        max_staleness: Optional[Dict[str, int]] = None,
+        sweep_interval: float = float(os.getenv("CACHE_SWEEP_INTERVAL", "30")),
+        stores: Optional[Dict[str, Any]] = None,
+    ):
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.namespace_ttls = dict(DEFAULT_NAMESPACE_TTLS if namespace_ttls is None else namespace_ttls)
+        self.max_staleness = dict(DEFAULT_MAX_STALENESS if max_staleness is None else max_staleness)
+        self.sweep_interval = sweep_interval
+        self.stores = dict(stores or {})
+
+        self.total_bytes = 0
+        # Min-heap of (stale_until, key) for the sweeper; stale heap items are skipped lazily
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a servable (fresh or stale) entry exists, without touching LRU order or stats"""
+        entry = self.cache.get(key)
+        return entry is not None and self._current_time() < entry.stale_until
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get item from cache if not expired"""
+        entry = self.lookup(key)
+        if entry is not None and entry.is_fresh(self._current_time()):
+            return entry.data
+        return None
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """Get the entry for a key, including expired entries still within max staleness"""
+        namespace = self._namespace(key)
+        entry = self.cache.get(key)
+        if entry is not None:
+            now = self._current_time()
+            if now < entry.stale_until:
+                self.cache.move_to_end(key)
+                self._count(namespace, "hits" if entry.is_fresh(now) else "stale_hits")
+                return entry
+            self._remove(key)
+            self._count(namespace, "expirations")
+        self._count(namespace, "misses")
+        return None
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Entry for a key without touching LRU order, stats or expiry"""
+        return self.cache.get(key)
+
+    def attach(self, key: str, entry: CacheEntry, variant: str, value: Any, size: int) -> None:
+        """Keep a derived value (e.g. encoded response) with an entry, counted in its size"""
+        if entry.encoded is None:
+            entry.encoded = {}
+        previous = entry.encoded.get(variant)
+        entry.encoded[variant] = value
+        added = size - (getattr(previous, "size", 0) if previous is not None else 0)
+        entry.size += added
+        if self.cache.get(key) is entry:
+            self.total_bytes += added
+            self._enforce_limits()
+
+    def set(
+        self,
+        key: str,
+        data: Any,
+        ttl: Optional[float] = None,
+        delta: float = 0.0,
+        age: float = 0.0,
+    ) -> CacheEntry:
+        """Set item in cache with the namespace TTL (or an explicit one)
+
+        delta is how long the value took to compute upstream; it is used for
+        early probabilistic refresh. age is how old the value already is, e.g.
+        when it was copied from a shared cache tier.
+        """
+        namespace = self._namespace(key)
+        if ttl is None:
+            ttl = self.ttl_for(key)
+
+        now = self._current_time()
+        if key in self.cache:
+            self._remove(key)
+
+        expiry = now + ttl
+        stale_until = expiry + self.max_staleness.get(namespace, 0)
+        store = self.stores.get(namespace)
+        if store is not None:
+            symbol = key.split("_", 1)[1]
+            store.update(data, time.time() - age, symbol)
+            entry: CacheEntry = StoredEntry(store, symbol, expiry, stale_until, store.row_bytes(), namespace, now - age, delta)
+        else:
+            entry = CacheEntry(data, expiry, stale_until, self._estimate_size(data), namespace, now - age, delta)
+        self.cache[key] = entry
+        self.total_bytes += entry.size
+        heapq.heappush(self._expiry_heap, (entry.stale_until, key))
+        self._count(namespace, "sets")
+        self._enforce_limits()
+        return entry
+
+    def delete(self, key: str) -> None:
+        """Remove a single key"""
+        if key in self.cache:
+            self._remove(key)
+
+    def ttl_for(self, key: str) -> float:
+        """TTL that applies to a key based on its namespace"""
+        return self.namespace_ttls.get(self._namespace(key), self.ttl)
+
+    def max_stale_for(self, key: str) -> float:
+        """How long past expiry a key may still be served"""
+        return self.max_staleness.get(self._namespace(key), 0)
+
+    def now(self) -> float:
+        """Current time on the clock entry expiries are measured against"""
+        return self._current_time()
+
+    def _current_time(self) -> float:
+        """Monotonic clock so TTLs are unaffected by wall-clock changes"""
+        return time.monotonic()
+
+    def clear(self) -> None:
+        """Clear all cache"""
+        self.cache.clear()
+        self._expiry_heap.clear()
+        self.total_bytes = 0
+        for store in self.stores.values():
+            store.clear()
+
+    def sweep(self) -> int:
+        """Remove every expired entry; returns the number removed"""
+        now = self._current_time()
+        removed = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            stale_until, key = heapq.heappop(heap)
+            entry = self.cache.get(key)
+            # Skip heap items left behind by overwritten or evicted keys
+            if entry is not None and entry.stale_until == stale_until:
+                self._remove(key)
+                self._count(entry.namespace, "expirations")
+                removed += 1
+
+        # Compact the heap when overwrites leave too many dead items behind
+        if len(heap) > 2 * len(self.cache) + 64:
+            self._expiry_heap = [(entry.stale_until, key) for key, entry in self.cache.items()]
+            heapq.heapify(self._expiry_heap)
+        return removed
+
+    def start_sweeper(self) -> None:
+        """Start the periodic expiry sweeper on the running event loop"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def stop_sweeper(self) -> None:
+        """Stop the periodic expiry sweeper"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                removed = self.sweep()
+                if removed:
+                    logger.debug(f"Cache sweeper removed {removed} expired entries")
+            except Exception as e:
+                logger.error(f"Cache sweep failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Size and hit/miss/eviction counters per namespace"""
+        entries: Dict[str, int] = {}
+        for entry in self.cache.values():
+            entries[entry.namespace] = entries.get(entry.namespace, 0) + 1
+
+        namespaces = {}
+        for namespace in set(self._stats) | set(entries):
+            counters = self._stats.get(namespace, {})
+            hits = counters.get("hits", 0)
+            misses = counters.get("misses", 0)
+            namespaces[namespace] = {
+                "entries": entries.get(namespace, 0),
+                "ttl_seconds": self.namespace_ttls.get(namespace, self.ttl),
+                "max_stale_seconds": self.max_staleness.get(namespace, 0),
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+                **counters,
+            }
+
+        return {
+            "entries": len(self.cache),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "namespaces": namespaces,
+        }
+
+    def _enforce_limits(self) -> None:
+        """Evict least recently used entries until within the entry and byte budgets"""
+        while self.cache and (len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes):
+            key, entry = next(iter(self.cache.items()))
+            self._remove(key)
+            self._count(entry.namespace, "evictions")
+
+    def _remove(self, key: str) -> None:
+        entry = self.cache.pop(key)
+        self.total_bytes -= entry.size
+
+    def _count(self, namespace: str, counter: str) -> None:
+        counters = self._stats.get(namespace)
+        if counters is None:
+            counters = self._stats[namespace] = {
+                "hits": 0, "stale_hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expirations": 0
+            }
+        counters[counter] += 1
+
+    @staticmethod
+    def _namespace(key: str) -> str:
+        return key.split("_", 1)[0]
+
+    @staticmethod
+    def _estimate_size(data: Any) -> int:
+        """Approximate size in bytes, using the serialized form where possible"""
+        try:
+            if isinstance(data, BaseModel):
+                return len(data.model_dump_json())
+            return len(json.dumps(data, default=str))
+        except Exception:
+            return sys.getsizeof(data)
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .providers import ProviderNotEntitled
+from .ratelimit import Priority, upstream_priority
+from .utils import parse_time_series
+
+logger = logging.getLogger(__name__)
+
+# One raw little-endian binary file per column; rows are appended in date order
+COLUMNS = {
+    "date": np.dtype("<i4"),      # days since 1970-01-01
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<i8"),
+}
+
+_SYMBOL_RE = re.compile(r"^[A-Z0-9.\-]{1,15}$")
+
+
+def to_day(value: str) -> int:
+    """ISO date string -> days since epoch"""
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+class HistoryStore:
+    """Per-symbol columnar OHLCV files, read through memory maps
+
+    Each symbol has a directory with one fixed-width binary file per column.
+    Appends write only the new rows, and reads memory-map the files and slice
+    by date with a binary search, so a range query touches only the pages it
+    returns.
+    """
+
+    def __init__(self, root: str = os.getenv("HISTORY_PATH", "data/history")):
+        self.root = root
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._maps: Dict[str, Dict[str, Any]] = {}
+
+    def _dir(self, symbol: str) -> str:
+        if not _SYMBOL_RE.match(symbol):
+            raise ValueError(f"Invalid symbol: {symbol}")
+        return os.path.join(self.root, symbol)
+
+    def lock(self, symbol: str) -> asyncio.Lock:
+        """Per-symbol lock serializing ingestion"""
+        lock = self._locks.get(symbol)
+        if lock is None:
+            lock = self._locks[symbol] = asyncio.Lock()
+        return lock
+
+    def length(self, symbol: str) -> int:
+        path = os.path.join(self._dir(symbol), "date.bin")
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // COLUMNS["date"].itemsize
+
+    def last_date(self, symbol: str) -> Optional[int]:
+        """Last stored day (days since epoch), or None if there is no history"""
+        columns = self.columns(symbol)
+        if columns is None or not len(columns["date"]):
+            return None
+        return int(columns["date"][-1])
+
+    def columns(self, symbol: str) -> Optional[Dict[str, np.ndarray]]:
+        """Read-only memory maps of every column (cached until the file grows)"""
+        length = self.length(symbol)
+        if length == 0:
+            return None
+        cached = self._maps.get(symbol)
+        if cached is not None and cached["length"] == length:
+            return cached["columns"]
+
+        directory = self._dir(symbol)
+        columns = {
+            name: np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode="r", shape=(length,))
+            for name, dtype in COLUMNS.items()
+        }
+        self._maps[symbol] = {"length": length, "columns": columns}
+        return columns
+
+    def append(self, symbol: str, bars: Dict[str, np.ndarray]) -> int:
+        """Append bars newer than the last stored day; returns the number written"""
+        order = np.argsort(bars["date"], kind="stable")
+        dates = np.asarray(bars["date"], dtype=COLUMNS["date"])[order]
+        last = self.last_date(symbol)
+        keep = dates > last if last is not None else np.ones(len(dates), dtype=bool)
+        if not keep.any():
+            return 0
+
+        directory = self._dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        length = self.length(symbol)
+        # Write the date column last so a crash mid-append never exposes a partial row
+        for name in [c for c in COLUMNS if c != "date"] + ["date"]:
+            values = np.asarray(bars[name], dtype=COLUMNS[name])[order][keep]
+            path = os.path.join(directory, f"{name}.bin")
+            with open(path, "ab") as f:
+                # Drop bytes left behind by an interrupted append
+                if f.tell() != length * COLUMNS[name].itemsize:
+                    f.truncate(length * COLUMNS[name].itemsize)
+                    f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+        self._maps.pop(symbol, None)
+        return int(keep.sum())
+
+    def read_range(
+        self, symbol: str, start: Optional[int] = None, end: Optional[int] = None
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Columns sliced to start <= date <= end (views into the memory maps)"""
+        columns = self.columns(symbol)
+        if columns is None:
+            return None
+        dates = columns["date"]
+        lo = 0 if start is None else int(np.searchsorted(dates, start, side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, end, side="right"))
+        return {name: column[lo:hi] for name, column in columns.items()}
+
+
+def parse_daily_series(payload: Dict[str, Any]) -> Optional[Dict[str, np.ndarray]]:
+    """TIME_SERIES_DAILY JSON -> column arrays, or None if the payload has no series"""
+    series = parse_time_series(payload)
+    if series is None:
+        return None
+    return {
+        "date": series["timestamp"].astype(np.int64).astype(COLUMNS["date"]),
+        "open": series["open"],
+        "high": series["high"],
+        "low": series["low"],
+        "close": series["close"],
+        "volume": np.nan_to_num(series["volume"]).astype(np.int64),
+    }
+
+
+class HistoryService:
+    """Keeps the history store current by ingesting TIME_SERIES_DAILY incrementally"""
+
+    def __init__(
+        self,
+        store: HistoryStore,
+        fetch_daily,
+        on_append=None,
+        min_refresh_interval: float = 3600.0,
+        full_history: bool = os.getenv("HISTORY_FULL_OUTPUTSIZE", "false").lower() in ("1", "true", "yes"),
+    ):
+        self.store = store
+        # fetch_daily(symbol, outputsize) -> parsed columns or None
+        self.fetch_daily = fetch_daily
+        # outputsize=full (20+ years) is premium-only on Alpha Vantage, so first ingests use compact unless enabled
+        self.full_history = full_history
+        # on_append(symbol, columns) is called with the stored columns after new bars land
+        self.on_append = on_append
+        self.min_refresh_interval = min_refresh_interval
+        self._checked: Dict[str, float] = {}
+        self._background: set = set()
+        self.stats = {
+            "ingests": 0,
+            "bars_appended": 0,
+        }
+
+    async def ingest(self, symbol: str) -> int:
+        """Fetch and append new bars; the full history on first ingest when full_history is set"""
+        async with self.store.lock(symbol):
+            if self.full_history and not self.store.length(symbol):
+                try:
+                    bars = await self.fetch_daily(symbol, "full")
+                except ProviderNotEntitled as e:
+                    logger.warning(f"Full daily history not available for this API key, using compact: {e}")
+                    self.full_history = False
+                    bars = await self.fetch_daily(symbol, "compact")
+            else:
+                bars = await self.fetch_daily(symbol, "compact")
+            self._checked[symbol] = time.monotonic()
+            if bars is None:
+                return 0
+            appended = await asyncio.to_thread(self.store.append, symbol, bars)
+            if appended and self.on_append is not None:
+                self.on_append(symbol, self.store.columns(symbol))
+            self.stats["ingests"] += 1
+            self.stats["bars_appended"] += appended
+            return appended
+
+    def is_stale(self, symbol: str) -> bool:
+        """True if the last bar is before yesterday and we haven't checked recently"""
+        checked = self._checked.get(symbol)
+        if checked is not None and time.monotonic() - checked < self.min_refresh_interval:
+            return False
+        last = self.store.last_date(symbol)
+        return last is None or last < (date.today() - date(1970, 1, 1)).days - 1
+
+    def refresh_in_background(self, symbol: str) -> None:
+        if self.store.lock(symbol).locked():
+            return
+        task = asyncio.ensure_future(self._background_ingest(symbol))
+        self._background.add(task)
+        task.add_done_callback(self._done)
+
+    async def _background_ingest(self, symbol: str) -> int:
+        upstream_priority.set(Priority.BACKGROUND)
+        return await self.ingest(symbol)
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.info(f"Background history refresh did not complete: {task.exception()}")
+
+    async def get_range(self, symbol: str, start: Optional[int], end: Optional[int]) -> Optional[Dict[str, np.ndarray]]:
+        """History slice; ingests on first use and refreshes stale symbols in the background"""
+        if self.store.length(symbol) == 0:
+            checked = self._checked.get(symbol)
+            if checked is not None and time.monotonic() - checked < self.min_refresh_interval:
+                # Recently found nothing upstream; don't spend quota asking again
+                return None
+            await self.ingest(symbol)
+        elif self.is_stale(symbol):
+            self.refresh_in_background(symbol)
+        return self.store.read_range(symbol, start, end)
+
+    async def shutdown(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "background_ingests": len(self._background)}
+
+    @staticmethod
+    def to_response(symbol: str, columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """Columnar JSON payload for a history slice"""
+        return {
+            "symbol": symbol,
+            "count": int(len(columns["date"])),
+            "date": np.datetime_as_string(np.asarray(columns["date"]).astype("datetime64[D]")).tolist(),
+            "open": columns["open"].tolist(),
+            "high": columns["high"].tolist(),
+            "low": columns["low"].tolist(),
+            "close": columns["close"].tolist(),
+            "volume": columns["volume"].tolist(),
+        }
@@ -0,0 +1,248 @@
+"""Vectorized technical indicators
+
+Every function works on the last axis of a NumPy array, so passing a 2-D
+array of shape (symbols, bars) computes the indicator for many symbols in
+one call. Windows that are not yet full are NaN.
+"""
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average via cumulative sums"""
+    x = _as_float(x)
+    out = np.full(x.shape, np.nan)
+    n = x.shape[-1]
+    if window <= 0 or n < window:
+        return out
+    csum = np.cumsum(x, axis=-1)
+    out[..., window - 1] = csum[..., window - 1]
+    out[..., window:] = csum[..., window:] - csum[..., :-window]
+    out[..., window - 1:] /= window
+    return out
+
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 0) -> np.ndarray:
+    """Rolling standard deviation via cumulative sums of x and x^2"""
+    x = _as_float(x)
+    out = np.full(x.shape, np.nan)
+    n = x.shape[-1]
+    if window <= ddof or n < window:
+        return out
+    # Shift by the first value to limit cancellation in the sum of squares
+    shifted = x - x[..., :1]
+    c1 = np.cumsum(shifted, axis=-1)
+    c2 = np.cumsum(shifted * shifted, axis=-1)
+    s1 = c1[..., window - 1:].copy()
+    s2 = c2[..., window - 1:].copy()
+    s1[..., 1:] -= c1[..., :-window]
+    s2[..., 1:] -= c2[..., :-window]
+    var = (s2 - s1 * s1 / window) / (window - ddof)
+    out[..., window - 1:] = np.sqrt(np.maximum(var, 0.0))
+    return out
+
+
+def ema(x: np.ndarray, span: Optional[int] = None, alpha: Optional[float] = None) -> np.ndarray:
+    """Exponential moving average seeded with the first value (pandas adjust=False)
+
+    The recursion e[t] = a*x[t] + (1-a)*e[t-1] is evaluated in closed form
+    with cumulative sums over blocks, so the Python loop runs once per block
+    of up to a few thousand bars instead of once per bar.
+    """
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+    x = _as_float(x)
+    n = x.shape[-1]
+    if n == 0:
+        return x.copy()
+    if alpha >= 1.0:
+        return x.copy()
+
+    decay = 1.0 - alpha
+    # Keep decay**-block well inside float64 range
+    block = max(1, min(n, int(200.0 / -math.log10(decay))))
+    out = np.empty(x.shape)
+    state = x[..., 0].copy()
+    start = 0
+    while start < n:
+        stop = min(n, start + block)
+        chunk = x[..., start:stop]
+        j = np.arange(stop - start, dtype=np.float64)
+        up = decay ** -j
+        down = decay ** j
+        weighted = np.cumsum(chunk * up, axis=-1)
+        if start == 0:
+            # e[0] = x[0] by definition
+            values = alpha * down * (weighted - chunk[..., :1]) + down * chunk[..., :1]
+        else:
+            values = alpha * down * weighted + decay ** (j + 1) * state[..., None]
+        out[..., start:stop] = values
+        state = values[..., -1]
+        start = stop
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing"""
+    close = _as_float(close)
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] <= period:
+        return out
+    delta = np.diff(close, axis=-1)
+    gains = ema(np.maximum(delta, 0.0), alpha=1.0 / period)
+    losses = ema(np.maximum(-delta, 0.0), alpha=1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = gains / losses
+        values = np.where(losses == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+    out[..., 1:] = values
+    out[..., :period] = np.nan
+    return out
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram"""
+    line = ema(close, span=fast) - ema(close, span=slow)
+    signal_line = ema(line, span=signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close: np.ndarray, window: int = 20, k: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger bands: (middle, upper, lower)"""
+    middle = sma(close, window)
+    width = k * rolling_std(close, window)
+    return middle, middle + width, middle - width
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Average True Range with Wilder smoothing"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    previous = np.concatenate([close[..., :1], close[..., :-1]], axis=-1)
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - previous), np.abs(low - previous)))
+    out = ema(true_range, alpha=1.0 / period)
+    out[..., :period - 1] = np.nan
+    return out
+
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    close = _as_float(close)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.diff(np.log(close), axis=-1)
+
+
+def realized_volatility(close: np.ndarray, window: int = 20, periods_per_year: int = TRADING_DAYS) -> np.ndarray:
+    """Annualized rolling standard deviation of log returns"""
+    close = _as_float(close)
+    out = np.full(close.shape, np.nan)
+    out[..., 1:] = rolling_std(log_returns(close), window, ddof=1) * math.sqrt(periods_per_year)
+    return out
+
+
+def drawdown(close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Drawdown from the running peak (<= 0) and the maximum drawdown per series"""
+    close = _as_float(close)
+    peak = np.maximum.accumulate(close, axis=-1)
+    dd = close / peak - 1.0
+    return dd, dd.min(axis=-1)
+
+
+def compute_all(
+    close: np.ndarray, high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """Every indicator as full arrays over the input (1-D or 2-D)"""
+    close = _as_float(close)
+    macd_line, macd_signal, macd_hist = macd(close)
+    bb_mid, bb_upper, bb_lower = bollinger(close)
+    dd, max_dd = drawdown(close)
+    result = {
+        "sma_20": sma(close, 20),
+        "sma_50": sma(close, 50),
+        "sma_200": sma(close, 200),
+        "ema_12": ema(close, span=12),
+        "ema_26": ema(close, span=26),
+        "rsi_14": rsi(close, 14),
+        "macd": macd_line,
+        "macd_signal": macd_signal,
+        "macd_hist": macd_hist,
+        "bb_middle": bb_mid,
+        "bb_upper": bb_upper,
+        "bb_lower": bb_lower,
+        "volatility_20": realized_volatility(close, 20),
+        "drawdown": dd,
+        "max_drawdown": max_dd,
+    }
+    if high is not None and low is not None:
+        result["atr_14"] = atr(high, low, close, 14)
+    return result
+
+
+def latest(indicators: Dict[str, np.ndarray]) -> Dict[str, Optional[float]]:
+    """Last value of each 1-D indicator series (NaN -> None)"""
+    values = {}
+    for name, series in indicators.items():
+        value = float(series[..., -1]) if np.ndim(series) else float(series)
+        values[name] = None if math.isnan(value) else round(value, 6)
+    return values
+
+
+def compute_batch(series: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Latest indicator values for many symbols
+
+    series maps symbol -> {"close": ..., optional "high"/"low"}. Symbols with
+    equal history length are stacked into one 2-D array and computed together.
+    """
+    by_length: Dict[int, list] = {}
+    for symbol, columns in series.items():
+        by_length.setdefault(len(columns["close"]), []).append(symbol)
+
+    results: Dict[str, Dict[str, Optional[float]]] = {}
+    for length, symbols in by_length.items():
+        if length == 0:
+            continue
+        close = np.vstack([np.asarray(series[s]["close"], dtype=np.float64) for s in symbols])
+        has_range = all("high" in series[s] and "low" in series[s] for s in symbols)
+        high = np.vstack([np.asarray(series[s]["high"], dtype=np.float64) for s in symbols]) if has_range else None
+        low = np.vstack([np.asarray(series[s]["low"], dtype=np.float64) for s in symbols]) if has_range else None
+        computed = compute_all(close, high, low)
+        for row, symbol in enumerate(symbols):
+            results[symbol] = latest({name: values[row] for name, values in computed.items()})
+    return results
+
+
+def summarize(close: np.ndarray, values: Dict[str, Optional[float]], days: int) -> Dict[str, Any]:
+    """Trend / volatility labels and a 0-10 performance score from indicator values"""
+    close = _as_float(close)
+    last = float(close[-1])
+    window = close[-(days + 1):] if len(close) > days else close
+    period_return = float(window[-1] / window[0] - 1.0) if len(window) > 1 else 0.0
+
+    signals = 0
+    for name in ("sma_50", "sma_200"):
+        if values.get(name) is not None:
+            signals += 1 if last > values[name] else -1
+    if values.get("macd_hist") is not None:
+        signals += 1 if values["macd_hist"] > 0 else -1
+    trend = "bullish" if signals > 0 else "bearish" if signals < 0 else "neutral"
+
+    vol = values.get("volatility_20")
+    if vol is None:
+        volatility = "unknown"
+    else:
+        volatility = "low" if vol < 0.2 else "medium" if vol < 0.4 else "high"
+
+    _, window_max_dd = drawdown(window)
+    score = 5.0 + 10.0 * period_return + 5.0 * float(window_max_dd) + signals * 0.5
+    return {
+        "trend": trend,
+        "volatility": volatility,
+        "period_return": round(period_return, 6),
+        "max_drawdown": round(float(window_max_dd), 6),
+        "performance_score": round(min(10.0, max(0.0, score)), 1),
+    }
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPENAI_URL = "https://api.openai.com/v1"
+
+# Words that don't change what a question is asking
+_STOPWORDS = frozenset(
+    "a an and are about at be can could do does for from give how i in is it its me my of on or please "
+    "should tell the this to today what whats which will with would you".split()
+)
+
+
+class LLMUnavailable(Exception):
+    """The model endpoint is not configured or the request failed"""
+
+
+class LLMClient:
+    """Streaming client for an OpenAI-compatible chat completions endpoint"""
+
+    def __init__(
+        self,
+        base_url: str = os.getenv("OPENAI_BASE_URL", DEFAULT_OPENAI_URL),
+        api_key: Optional[str] = os.getenv("OPENAI_API_KEY"),
+        model: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
+        timeout: float = float(os.getenv("OPENAI_TIMEOUT", "60")),
+        max_tokens: int = int(os.getenv("OPENAI_MAX_TOKENS", "600")),
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {
+            "requests": 0,
+            "failures": 0,
+            "tokens_streamed": 0,
+        }
+
+    @property
+    def configured(self) -> bool:
+        # A key is only required for the hosted API; local/stub servers may run without one
+        return bool(self.api_key) or self.base_url != DEFAULT_OPENAI_URL
+
+    async def startup(self) -> None:
+        if self._client is None:
+            self._client = self._build_client()
+
+    async def shutdown(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    def _build_client(self) -> httpx.AsyncClient:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=httpx.Timeout(self.timeout, connect=5.0),
+        )
+
+    async def stream_chat(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Yield content deltas as the model generates them"""
+        if not self.configured:
+            raise LLMUnavailable("OPENAI_API_KEY is not set")
+
+        self.stats["requests"] += 1
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": self.max_tokens,
+            "stream": True,
+        }
+        try:
+            async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode(errors="replace")[:200]
+                    raise LLMUnavailable(f"Model endpoint returned {response.status_code}: {body}")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    choices = chunk.get("choices") or [{}]
+                    text = (choices[0].get("delta") or {}).get("content")
+                    if text:
+                        self.stats["tokens_streamed"] += 1
+                        yield text
+        except (httpx.HTTPError, ValueError) as e:
+            self.stats["failures"] += 1
+            raise LLMUnavailable(f"Model request failed: {e}")
+        except LLMUnavailable:
+            self.stats["failures"] += 1
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "model": self.model, "base_url": self.base_url, "configured": self.configured}
+
+
+def question_terms(question: str) -> frozenset:
+    """Content words of a question, used for near-duplicate matching"""
+    words = re.findall(r"[a-z0-9]+", question.lower())
+    return frozenset(word for word in words if word not in _STOPWORDS)
+
+
+class AnswerCache:
+    """Exact and near-duplicate answer cache per (symbol, trading day)
+
+    Answers are grouped in buckets by symbol and day, so they expire naturally
+    when the trading day moves on. Within a bucket a question matches exactly
+    on its normalized text, or semantically when its content words overlap a
+    cached question's by at least `similarity` (Jaccard).
+    """
+
+    def __init__(
+        self,
+        max_buckets: int = int(os.getenv("ANSWER_CACHE_BUCKETS", "2000")),
+        per_bucket: int = int(os.getenv("ANSWER_CACHE_PER_SYMBOL", "50")),
+        similarity: float = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.8")),
+    ):
+        self.max_buckets = max_buckets
+        self.per_bucket = per_bucket
+        self.similarity = similarity
+        # (symbol, day) -> OrderedDict[normalized question -> (terms, answer)]
+        self._buckets: "OrderedDict[Tuple[str, str], OrderedDict]" = OrderedDict()
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+        }
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        return " ".join(re.findall(r"[a-z0-9]+", question.lower()))
+
+    def get(self, symbol: str, day: str, question: str) -> Optional[str]:
+        bucket = self._buckets.get((symbol, day))
+        if bucket is None:
+            self.stats["misses"] += 1
+            return None
+        self._buckets.move_to_end((symbol, day))
+
+        normalized = self.normalize(question)
+        hit = bucket.get(normalized)
+        if hit is not None:
+            self.stats["exact_hits"] += 1
+            return hit[1]
+
+        terms = question_terms(question)
+        best, best_score = None, 0.0
+        for cached_terms, answer in bucket.values():
+            union = len(terms | cached_terms)
+            score = len(terms & cached_terms) / union if union else 0.0
+            if score > best_score:
+                best, best_score = answer, score
+        if best is not None and best_score >= self.similarity:
+            self.stats["semantic_hits"] += 1
+            return best
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, symbol: str, day: str, question: str, answer: str) -> None:
+        key = (symbol, day)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = OrderedDict()
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(key)
+        bucket[self.normalize(question)] = (question_terms(question), answer)
+        while len(bucket) > self.per_bucket:
+            bucket.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "buckets": len(self._buckets)}
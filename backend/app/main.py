@@ -1,22 +1,40 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any, Generator
-import yfinance as yf
 import openai
 import os
 from dotenv import load_dotenv
 import asyncio
 import aiohttp
 import json
+import re
 import httpx
 from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
 import logging
 
-from .services import stock_service, cache_service
-from .models import StockOverview, StockQuote, StockSearchResponse, APIResponse, ErrorResponse
+from .services import (
+    stock_service, cache_service, request_coalescer, data_loader, shared_cache, history_service, rolling_stats,
+    quote_store, overview_store, screener, cache_snapshot, prefetcher, market_data
+)
+from .history import to_day
+from .models import (
+    StockOverview, StockQuote, StockSearchResponse, BatchQuoteResponse, PortfolioRequest, PortfolioValuation,
+    MoversResponse, ScreenerResponse, AnalysisRequest, AnalysisResponse, AskRequest, APIResponse, ErrorResponse
+)
+from .mcp_client import MCPClient, MCPUnavailable, analysis_cache_key
+from .llm import LLMClient, LLMUnavailable, AnswerCache
+from .portfolio import value_portfolio
+from .screener import SCREEN_FIELDS, OVERVIEW_CATEGORIES
+from .responses import cached_json_response
+from .ratelimit import RateLimitExceeded
+from .providers import ProviderUnavailable
+from .streaming import QuoteBroadcaster
+from .symbol_index import SymbolIndexService
 from .schemas import HealthResponse
+from .metrics import metrics, MetricsMiddleware, cache_collector, stats_collector
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,10 +42,51 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop long-lived resources with the application"""
+    await stock_service.startup()
+    await mcp_client.startup()
+    await llm_client.startup()
+    await shared_cache.connect()
+    cache_service.start_sweeper()
+    cache_snapshot.start()
+    prefetcher.start()
+    metrics.start()
+    symbol_index.start(stock_service.get_listing_status)
+    await asyncio.to_thread(rolling_stats.load)
+    # Replaying stored history can take a while; serve requests meanwhile
+    rolling_stats.start_catch_up(history_service.store)
+    rolling_stats.start_autosave()
+    try:
+        yield
+    finally:
+        await metrics.stop()
+        await prefetcher.stop()
+        await cache_snapshot.stop()
+        await symbol_index.stop()
+        await history_service.shutdown()
+        await rolling_stats.stop()
+        await quote_broadcaster.shutdown()
+        await data_loader.shutdown()
+        await cache_service.stop_sweeper()
+        await shared_cache.close()
+        await mcp_client.shutdown()
+        await llm_client.shutdown()
+        await stock_service.shutdown()
+
+async def load_quote(symbol: str):
+    """Cached quote lookup shared by the quote endpoint and the stream pollers"""
+    return await data_loader.load(f"quote_{symbol}", lambda: market_data.get_stock_quote(symbol))
+
+quote_broadcaster = QuoteBroadcaster(load_quote)
+symbol_index = SymbolIndexService()
+
 app = FastAPI(
     title="Stock Information API",
     description="A simple API to get stock market information using Alpha Vantage",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -39,9 +98,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency and in-flight counts; added last so it wraps CORS too
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+metrics.add_collector(cache_collector(cache_service))
+metrics.add_collector(stats_collector("shared_cache", shared_cache.get_stats))
+metrics.add_collector(stats_collector("loader", data_loader.get_stats))
+metrics.add_collector(stats_collector("coalescer", request_coalescer.get_stats))
+metrics.add_collector(stats_collector("upstream", stock_service.pool_stats))
+metrics.add_collector(stats_collector("scheduler", stock_service.scheduler.get_stats))
+metrics.add_collector(stats_collector("quote_store", quote_store.get_stats))
+metrics.add_collector(stats_collector("providers", market_data.get_stats))
+
 openai.api_key = os.getenv('OPENAI_API_KEY')
 MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'http://localhost:8080')
 MCP_API_KEY = os.getenv('MCP_API_KEY')
+mcp_client = MCPClient(MCP_SERVER_URL, MCP_API_KEY)
+llm_client = LLMClient(api_key=openai.api_key)
+answer_cache = AnswerCache()
+
+ASK_SYSTEM_PROMPT = (
+    "You are StockGPT, a concise stock market assistant. Answer the user's question using the "
+    "market data provided, say when data is missing, and do not present opinions as financial advice."
+)
+
+# Upper-case words that look like tickers in questions but rarely are
+_NOT_TICKERS = {"I", "A", "AI", "CEO", "CFO", "EPS", "ETF", "IPO", "PE", "USA", "US", "USD", "Q", "YTD", "WHAT", "IS", "THE"}
 
 
 
@@ -50,6 +132,31 @@ MCP_API_KEY = os.getenv('MCP_API_KEY')
 ALPHA_VANTAGE_KEY = os.getenv("ALPHA_VANTAGE_KEY", "demo")
 BASE_URL = "https://www.alphavantage.co/query"
 
+# Quote streams: symbols per connection and heartbeat interval
+MAX_STREAM_SYMBOLS = int(os.getenv("MAX_STREAM_SYMBOLS", "50"))
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+
+# Batch quotes: watchlist size limit and how long a miss may wait for upstream quota
+MAX_BATCH_SYMBOLS = int(os.getenv("MAX_BATCH_SYMBOLS", "200"))
+BATCH_FETCH_TIMEOUT = float(os.getenv("BATCH_FETCH_TIMEOUT", "10"))
+MAX_PORTFOLIO_POSITIONS = int(os.getenv("MAX_PORTFOLIO_POSITIONS", "1000"))
+# Screener and movers run over cached data only; MAX_SCREEN_RESULTS caps the rows returned
+MAX_SCREEN_RESULTS = int(os.getenv("MAX_SCREEN_RESULTS", "500"))
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    """Upstream quota exhausted or throttled: tell the client when to retry"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after))}
+    )
+
+@app.exception_handler(ProviderUnavailable)
+async def provider_unavailable_handler(request: Request, exc: ProviderUnavailable):
+    """Every market data provider failed or timed out: a gateway error, not a missing symbol"""
+    return JSONResponse(status_code=504 if exc.timed_out else 503, content={"detail": str(exc)})
+
 @app.get("/", response_model=APIResponse)
 async def root():
     """Root endpoint with API information"""
@@ -62,84 +169,559 @@ async def root():
                 "stock_info": "/api/stock/{symbol}",
                 "stock_quote": "/api/quote/{symbol}",
                 "search_stocks": "/api/search/{keywords}",
-                "health": "/health"
+                "history": "/api/history/{symbol}?from=YYYY-MM-DD&to=YYYY-MM-DD",
+                "stream_quotes": "/api/stream/quotes?symbols=AAPL,MSFT",
+                "portfolio_valuation": "POST /api/portfolio/valuation",
+                "analyze": "POST /api/analyze",
+                "ask": "POST /api/ask",
+                "health": "/health",
+                "metrics": "/metrics",
+                "stats": "/stats"
             }
         }
     )
 
 @app.get("/api/stock/{symbol}", response_model=StockOverview)
-async def get_stock_info(symbol: str):
+async def get_stock_info(symbol: str, request: Request):
     """Get detailed stock information"""
-    # Check cache first
-
-    cache_key = f"overview_{symbol}"
-    cached_data = cache_service.get(cache_key)
-
-    if cached_data:
-        return cached_data
-    
-    stock_data = await stock_service.get_stock_overview(symbol)
+    # Served from cache when possible; concurrent misses share one upstream call
+    symbol = symbol.upper()
+    key = f"overview_{symbol}"
+    stock_data, age = await data_loader.load(key, lambda: market_data.get_stock_overview(symbol))
 
     if not stock_data:
         raise HTTPException(status_code=404, detail=f"Stock information not found for symbol: {symbol}")
+    prefetcher.record(key)
     
-    # Cache the result
-    cache_service.set(cache_key, stock_data)
-    return stock_data
+    # Moving averages / 52-week range from our own daily bars are fresher than OVERVIEW's,
+    # and a fresh quote from a day without a bar yet makes them intraday values
+    live = quote_store.price(symbol, max_age=cache_service.ttl_for("quote_"))
+    rolling_fields = rolling_stats.overview_fields(symbol, *(live or ()))
+    if not rolling_fields:
+        return cached_json_response(request, stock_data, age, cache_service, key)
+    # Encoded next to the cached overview, again only when a bar or the live quote changes
+    tag = f"{rolling_stats.get(symbol).last_day}:{quote_store.version(symbol) if live else ''}"
+    return cached_json_response(
+        request, stock_data.model_copy(update=rolling_fields), age, cache_service, key,
+        source=stock_data, variant="rolling", tag=tag
+    )
 
 @app.get("/api/quote/{symbol}", response_model=StockQuote)
-async def get_stock_quote(symbol: str):
+async def get_stock_quote(symbol: str, request: Request):
     """Get real-time stock quote"""
-    # Check cache first (shorter TTL for quotes)
-    cache_key = f"quote_{symbol}"
-    cached_data = cache_service.get(cache_key)
-    if cached_data:
-        return cached_data
-    
-    quote = await stock_service.get_stock_quote(symbol)
+    # Quotes use the shorter quote-namespace TTL in the cache
+    symbol = symbol.upper()
+    quote, age = await load_quote(symbol)
     if not quote:
         raise HTTPException(status_code=404, detail=f"Stock quote not found for symbol: {symbol}")
+    prefetcher.record(f"quote_{symbol}")
     
-    # Cache the result with shorter TTL (1 minute) for quotes
-    cache_service.set(cache_key, quote)
-    return quote
+    return cached_json_response(request, quote, age, cache_service, f"quote_{symbol}")
 
 @app.get("/api/search/{keywords}", response_model=StockSearchResponse)
-async def search_stocks(keywords: str):
+async def search_stocks(keywords: str, request: Request, response: Response):
     """Search for stocks by keywords"""
-    cache_key = f"search_{keywords}"
-    cached_data = cache_service.get(cache_key)
-    if cached_data:
-        return cached_data
-    
-    results = await stock_service.search_stocks(keywords)
+    # Answer from the local symbol index; only fall back upstream when it has nothing
+    matches = symbol_index.search(keywords)
+    if matches:
+        symbol_index.stats["index_hits"] += 1
+        response.headers["Age"] = "0"
+        return StockSearchResponse(search_term=keywords, results=matches)
+
+    symbol_index.stats["fallbacks"] += 1
+    key = f"search_{keywords}"
+    results, age = await data_loader.load(key, lambda: stock_service.search_stocks(keywords))
     
-    # Cache the result
-    cache_service.set(cache_key, results)
-    return results
+    return cached_json_response(request, results, age, cache_service, key)
+
+@app.get("/api/history/{symbol}")
+async def get_history(
+    symbol: str,
+    start: Optional[str] = Query(None, alias="from", description="First date (YYYY-MM-DD)"),
+    end: Optional[str] = Query(None, alias="to", description="Last date (YYYY-MM-DD)")
+):
+    """Daily OHLCV bars for a date range, served from the local history store"""
+    symbol = symbol.upper()
+    try:
+        start_day = to_day(start) if start else None
+        end_day = to_day(end) if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be formatted as YYYY-MM-DD")
+
+    try:
+        columns = await history_service.get_range(symbol, start_day, end_day)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if columns is None:
+        raise HTTPException(status_code=404, detail=f"No price history found for symbol: {symbol}")
+
+    return history_service.to_response(symbol, columns)
 
-@app.get("/api/batch/quotes", response_model=Dict[str, Optional[StockQuote]])
+async def load_quotes(symbols: List[str]):
+    """Quotes for many symbols through the cache; misses are fetched concurrently
+
+    Returns (quotes, status) where status is cached/fetched/not_found/rate_limited/error per symbol.
+    Fetches go through the provider router, which raises when no provider could answer, so
+    "not_found" only means a provider said the symbol is unknown and "error" an upstream failure.
+    """
+    quotes: Dict[str, Optional[StockQuote]] = {}
+    status: Dict[str, str] = {}
+    # Quotes still within their TTL in the compact store skip the cache entirely
+    ttl = cache_service.ttl_for("quote_")
+    missing = []
+    for symbol in symbols:
+        age = quote_store.age(symbol)
+        if age is not None and age < ttl:
+            quotes[symbol] = quote_store.get(symbol)
+            status[symbol] = "cached"
+        else:
+            missing.append(symbol)
+
+    loaded = await data_loader.load_many(
+        [f"quote_{symbol}" for symbol in missing],
+        lambda key: lambda: market_data.get_stock_quote(key.split("_", 1)[1], queue_timeout=BATCH_FETCH_TIMEOUT)
+    )
+    for symbol in missing:
+        result = loaded[f"quote_{symbol}"]
+        quotes[symbol] = None
+        if isinstance(result, RateLimitExceeded):
+            status[symbol] = "rate_limited"
+        elif isinstance(result, BaseException):
+            logger.error(f"Batch quote for {symbol} failed: {result}")
+            status[symbol] = "error"
+        elif result[0] is None:
+            status[symbol] = "not_found"
+        else:
+            quotes[symbol] = result[0]
+            status[symbol] = "cached" if result[1] > 0 else "fetched"
+    # Keep the caller's symbol order
+    return {symbol: quotes[symbol] for symbol in symbols}, {symbol: status[symbol] for symbol in symbols}
+
+@app.get("/api/batch/quotes", response_model=BatchQuoteResponse)
 async def get_batch_quotes(symbols: List[str] = Query(..., description="List of stock symbols")):
-    """Get quotes for multiple stocks (max 5 symbols)"""
-    if len(symbols) > 5:
-        raise HTTPException(status_code=400, detail="Maximum 5 symbols allowed per request")
+    """Get quotes for a watchlist; cached symbols are served directly, misses are fetched concurrently"""
+    # Accept both ?symbols=A&symbols=B and ?symbols=A,B
+    symbols = list(dict.fromkeys(
+        part.strip().upper() for symbol in symbols for part in symbol.split(",") if part.strip()
+    ))
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_BATCH_SYMBOLS} symbols allowed per request")
     
-    results = await stock_service.get_multiple_quotes(symbols)
-    return results
+    quotes, status = await load_quotes(symbols)
+    counts = list(status.values())
+    return BatchQuoteResponse(
+        quotes=quotes,
+        status=status,
+        fetched=counts.count("fetched"),
+        cached=counts.count("cached"),
+        failed=len(counts) - counts.count("fetched") - counts.count("cached")
+    )
+
+@app.get("/api/movers", response_model=MoversResponse)
+async def get_movers(
+    n: int = Query(10, ge=1, le=100),
+    field: str = Query("change_pct", pattern="^(change_pct|change|volume)$"),
+    max_age: Optional[float] = Query(None, gt=0, description="Only quotes updated within this many seconds")
+):
+    """Top gainers and losers among cached quotes; never calls upstream"""
+    gainers, losers = quote_store.movers(n, field, max_age)
+    return MoversResponse(gainers=gainers, losers=losers, field=field, universe=len(quote_store))
+
+@app.get("/api/screener", response_model=ScreenerResponse)
+async def screen_stocks(
+    request: Request,
+    sort: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1),
+    max_age: Optional[float] = Query(None, gt=0, description="Only quotes updated within this many seconds")
+):
+    """Filter and sort cached quotes and overviews
+
+    Range filters are <field>_min / <field>_max for any numeric field (e.g.
+    pe_ratio_max=15, market_cap_min=1e10, change_pct_min=2); sector, industry
+    and exchange filter by name. Never calls upstream.
+    """
+    if sort is not None and sort not in SCREEN_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by {sort}; use one of {', '.join(SCREEN_FIELDS)}")
+    ranges: Dict[str, List[Optional[float]]] = {}
+    categories: Dict[str, str] = {}
+    for name, value in request.query_params.items():
+        if name in OVERVIEW_CATEGORIES:
+            categories[name] = value
+            continue
+        field, _, bound = name.rpartition("_")
+        if field not in SCREEN_FIELDS or bound not in ("min", "max"):
+            if name not in ("sort", "order", "limit", "max_age"):
+                raise HTTPException(status_code=400, detail=f"Unknown screener parameter: {name}")
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"{name} must be a number")
+        ranges.setdefault(field, [None, None])[0 if bound == "min" else 1] = number
+
+    result = screener.screen(
+        {field: tuple(bounds) for field, bounds in ranges.items()},
+        categories,
+        sort=sort,
+        descending=order == "desc",
+        limit=min(limit, MAX_SCREEN_RESULTS),
+        max_age=max_age
+    )
+    return ScreenerResponse(**result, universe=max(len(quote_store), len(screener.overviews)))
+
+@app.post("/api/portfolio/valuation", response_model=PortfolioValuation)
+async def portfolio_valuation(portfolio: PortfolioRequest):
+    """Total value, P&L, weights, day change and sector exposure for a list of positions"""
+    if len(portfolio.positions) > MAX_PORTFOLIO_POSITIONS:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_PORTFOLIO_POSITIONS} positions allowed per request")
+
+    symbols = [position.symbol.strip().upper() for position in portfolio.positions]
+    unique = list(dict.fromkeys(symbols))
+    quotes, status = await load_quotes(unique)
+    # Sectors come only from overviews already cached; valuing a portfolio never spends quota on them
+    overviews = await data_loader.peek_many([f"overview_{symbol}" for symbol in unique])
+    sectors = {key.split("_", 1)[1]: overview.sector for key, overview in overviews.items() if overview}
+
+    return value_portfolio(
+        symbols,
+        [position.quantity for position in portfolio.positions],
+        [position.cost_basis for position in portfolio.positions],
+        quotes,
+        sectors,
+        status
+    )
+
+@app.post("/api/analyze", response_model=AnalysisResponse)
+async def analyze_stock(request: AnalysisRequest):
+    """Analysis from the MCP server, cached per (symbol, normalized query, data version)"""
+    symbol = request.symbol.strip().upper()
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+
+    quote_task = asyncio.ensure_future(load_quote(symbol))
+    overview_task = asyncio.ensure_future(
+        data_loader.load(f"overview_{symbol}", lambda: market_data.get_stock_overview(symbol))
+    )
+
+    async def analysis():
+        # The MCP call only needs the quote; the overview keeps loading alongside it
+        try:
+            quote, _ = await quote_task
+        except Exception:
+            # Surfaced from quote_task below
+            return None, None
+        if quote is None:
+            return None, None
+        data_version = f"{quote.latest_trading_day}:{quote.price}"
+        overview = overview_task.result()[0] if overview_task.done() and not overview_task.exception() else None
+        stock_data = {
+            "companyName": overview.name if overview else symbol,
+            "latestPrice": quote.price,
+            "changePercent": (quote.change_percent or "").rstrip("%") or None,
+        }
+        result, _ = await data_loader.load(
+            analysis_cache_key(symbol, request.query, data_version),
+            lambda: mcp_client.analyze_stock(symbol, request.query, stock_data)
+        )
+        return result, data_version
+
+    analysis_task = asyncio.ensure_future(analysis())
+    try:
+        await asyncio.wait({quote_task, overview_task, analysis_task})
+    except asyncio.CancelledError:
+        for task in (quote_task, overview_task, analysis_task):
+            task.cancel()
+        raise
+
+    quote, _ = quote_task.result()
+    if quote is None:
+        raise HTTPException(status_code=404, detail=f"Stock quote not found for symbol: {symbol}")
+    try:
+        overview, _ = overview_task.result()
+    except Exception as e:
+        logger.error(f"Overview for analysis of {symbol} unavailable: {e}")
+        overview = None
+
+    try:
+        result, data_version = analysis_task.result()
+        status = "ok"
+    except MCPUnavailable as e:
+        logger.error(f"MCP analysis for {symbol} unavailable: {e}")
+        result, data_version, status = None, None, "unavailable"
+
+    return AnalysisResponse(
+        symbol=symbol,
+        query=request.query,
+        quote=quote,
+        overview=overview,
+        analysis=result,
+        analysis_status=status,
+        data_version=data_version
+    )
+
+def extract_symbol(question: str) -> Optional[str]:
+    """First ticker-looking word in a question ($AAPL or AAPL), checked against the symbol index"""
+    for candidate in re.findall(r"\$?\b([A-Z][A-Z.]{0,5})\b", question):
+        listed = symbol_index.has(candidate)
+        if listed or (listed is None and candidate not in _NOT_TICKERS):
+            return candidate
+    return None
+
+def _ask_context(symbol: str, quote: Any, overview: Any, project: Any = None) -> Dict[str, Any]:
+    """Market data context for the model; missing or failed parts are left out"""
+    context: Dict[str, Any] = {"symbol": symbol}
+    if isinstance(quote, StockQuote):
+        context["quote"] = quote.model_dump(exclude_none=True)
+    if isinstance(overview, StockOverview):
+        context["overview"] = overview.model_dump(
+            include={"name", "sector", "industry", "market_cap", "pe_ratio", "eps", "beta", "dividend_yield",
+                     "week_52_high", "week_52_low", "moving_avg_50", "moving_avg_200"},
+            exclude_none=True
+        )
+    if project is not None and not isinstance(project, BaseException):
+        context["project"] = project
+    return context
+
+async def build_ask_context(symbol: str) -> Dict[str, Any]:
+    """Quote, overview and MCP project metrics for a symbol, loaded concurrently"""
+    quote, overview, project = await asyncio.gather(
+        load_quote(symbol),
+        data_loader.load(f"overview_{symbol}", lambda: market_data.get_stock_overview(symbol)),
+        data_loader.load(f"analysis_{symbol}_project", lambda: mcp_client.project_analysis(symbol)),
+        return_exceptions=True
+    )
+    first = lambda result: None if isinstance(result, BaseException) else result[0]
+    return _ask_context(symbol, first(quote), first(overview), first(project))
+
+def local_ask_context(symbol: str) -> Dict[str, Any]:
+    """Context from quotes and overviews already held locally; never waits on anything"""
+    overview_key = f"overview_{symbol}"
+    overview = cache_service.peek(overview_key).data if overview_key in cache_service else None
+    return _ask_context(symbol, quote_store.get(symbol), overview)
+
+def _answer_day(context: Dict[str, Any]) -> str:
+    """Trading day answers are cached under: the quote's, else today's date"""
+    return context.get("quote", {}).get("latest_trading_day") or datetime.utcnow().date().isoformat()
+
+def _stock_data(context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Quote summary in the shape the StockGPT page renders"""
+    quote = context.get("quote")
+    if not quote:
+        return None
+    return {
+        "symbol": context["symbol"],
+        "companyName": context.get("overview", {}).get("name", context["symbol"]),
+        "latestPrice": quote.get("price"),
+        "change": quote.get("change"),
+        "changePercent": (quote.get("change_percent") or "").rstrip("%") or None,
+        "open": quote.get("open"),
+        "high": quote.get("high"),
+        "low": quote.get("low"),
+        "volume": quote.get("volume"),
+    }
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/ask")
+async def ask(request: Request, body: AskRequest):
+    """Answer a stock question, streaming tokens as Server-Sent Events
+
+    Events: context (symbol and quote summary), token ({"text"}), done ({"cached"}) or error.
+    Answers are cached per symbol and trading day, so repeated or near-identical
+    questions are replayed without calling the model.
+    """
+    question = body.question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Question must not be empty")
+    if not llm_client.configured:
+        raise HTTPException(status_code=503, detail="Language model is not configured")
+    symbol = body.symbol.strip().upper() if body.symbol else extract_symbol(question)
+
+    async def events():
+        # Flush headers right away; context loading may wait on upstream quota
+        yield ": connected\n\n"
+        # When the trading day is known locally, a cached answer skips loading market data
+        checked_day = None
+        context = local_ask_context(symbol) if symbol else {}
+        if not symbol or "quote" in context:
+            checked_day = _answer_day(context)
+            cached = answer_cache.get(symbol or "", checked_day, question)
+            if cached is not None:
+                yield _sse("context", {"symbol": symbol, "stock_data": _stock_data(context)})
+                yield _sse("token", {"text": cached})
+                yield _sse("done", {"cached": True})
+                return
+
+        if symbol:
+            context = await build_ask_context(symbol)
+        day = _answer_day(context)
+        yield _sse("context", {"symbol": symbol, "stock_data": _stock_data(context)})
+
+        cached = answer_cache.get(symbol or "", day, question) if day != checked_day else None
+        if cached is not None:
+            yield _sse("token", {"text": cached})
+            yield _sse("done", {"cached": True})
+            return
+
+        messages = [
+            {"role": "system", "content": ASK_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Market data: {json.dumps(context)}\n\nQuestion: {question}"
+                if context else question},
+        ]
+        parts: List[str] = []
+        try:
+            async for text in llm_client.stream_chat(messages):
+                parts.append(text)
+                yield _sse("token", {"text": text})
+                if await request.is_disconnected():
+                    return
+        except LLMUnavailable as e:
+            logger.error(f"Answer generation failed: {e}")
+            yield _sse("error", {"detail": "The language model is unavailable, please try again later"})
+            return
+        # Only complete answers are cached
+        answer_cache.set(symbol or "", day, question, "".join(parts))
+        yield _sse("done", {"cached": False})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _parse_stream_symbols(symbols: str) -> List[str]:
+    """Split and validate the comma-separated symbols of a stream request"""
+    parsed = list(dict.fromkeys(part.strip().upper() for part in symbols.split(",") if part.strip()))
+    if not parsed:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    if len(parsed) > MAX_STREAM_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_STREAM_SYMBOLS} symbols allowed per stream")
+    return parsed
+
+@app.get("/api/stream/quotes")
+async def stream_quotes(request: Request, symbols: str = Query(..., description="Comma-separated stock symbols")):
+    """Server-Sent Events stream of quote changes (only changed fields are sent)"""
+    symbols = _parse_stream_symbols(symbols)
+
+    async def events():
+        subscription = quote_broadcaster.subscribe(symbols)
+        try:
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(STREAM_HEARTBEAT)
+                if not batch:
+                    yield ": keep-alive\n\n"
+                for changes in batch.values():
+                    yield f"event: quote\ndata: {json.dumps(changes)}\n\n"
+        finally:
+            quote_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/quotes")
+async def websocket_quotes(websocket: WebSocket, symbols: str):
+    """WebSocket variant of the quote stream"""
+    try:
+        symbols = _parse_stream_symbols(symbols)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+
+    await websocket.accept()
+    subscription = quote_broadcaster.subscribe(symbols)
+
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    disconnected = asyncio.create_task(wait_for_disconnect())
+    try:
+        while True:
+            next_batch = asyncio.ensure_future(subscription.next_batch(STREAM_HEARTBEAT))
+            await asyncio.wait({next_batch, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_batch.cancel()
+                break
+            batch = next_batch.result()
+            if not batch:
+                await websocket.send_json({"type": "heartbeat"})
+            for changes in batch.values():
+                await websocket.send_json({"type": "quote", **changes})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected.cancel()
+        quote_broadcaster.unsubscribe(subscription)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint"""
+    """Health check: uptime plus upstream and cache status ("degraded" if either is unhealthy)"""
+    upstream = stock_service.health()
+    cache_stats = cache_service.get_stats()
+    l2 = "disabled"
+    if shared_cache.url:
+        l2 = "ok" if await shared_cache.ping() else "unavailable"
+    cache = {
+        "status": "degraded" if l2 == "unavailable" else "ok",
+        "entries": cache_stats["entries"],
+        "bytes": cache_stats["bytes"],
+        "l2": l2,
+    }
+    checks = {
+        "upstream": upstream,
+        "cache": cache,
+        "event_loop_lag_seconds": metrics.get_stats()["loop_lag_seconds"],
+    }
+    healthy = upstream["status"] == "ok" and cache["status"] == "ok"
     return HealthResponse(
-        status="healthy",
+        status="healthy" if healthy else "degraded",
         service="stock-api",
-        timestamp="2024-01-01T00:00:00Z"  # This would be dynamic in real implementation
+        timestamp=datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        uptime_seconds=round(metrics.uptime(), 1),
+        checks=checks
     )
 
+@app.get("/stats")
+async def get_stats():
+    """Runtime statistics for upstream connections, coalescing and the cache"""
+    return {
+        "http_pool": stock_service.pool_stats(),
+        "coalescing": request_coalescer.get_stats(),
+        "loader": data_loader.get_stats(),
+        "scheduler": stock_service.scheduler.get_stats(),
+        "streams": quote_broadcaster.get_stats(),
+        "symbol_index": symbol_index.get_stats(),
+        "history": history_service.get_stats(),
+        "rolling": rolling_stats.get_stats(),
+        "quote_store": quote_store.get_stats(),
+        "screener": screener.get_stats(),
+        "metrics": metrics.get_stats(),
+        "snapshot": cache_snapshot.get_stats(),
+        "prefetch": prefetcher.get_stats(),
+        "providers": market_data.get_stats(),
+        "mcp": mcp_client.get_stats(),
+        "llm": llm_client.get_stats(),
+        "answers": answer_cache.get_stats(),
+        "cache": cache_service.get_stats(),
+        "shared_cache": shared_cache.get_stats()
+    }
+
 @app.get("/cache/clear")
 async def clear_cache():
     """Clear all cached data (for development)"""
+    # Also empties the quote store behind the quote namespace
     cache_service.clear()
+    overview_store.clear()
     return
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .resilience import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+class MCPUnavailable(Exception):
+    """The MCP server could not produce an analysis (circuit open, timeout or error)"""
+
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation-insensitive form of a question"""
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?!. ")
+
+
+def analysis_cache_key(symbol: str, query: str, data_version: str) -> str:
+    """Cache key for an analysis of symbol for query against a given data version"""
+    digest = hashlib.sha1(f"{normalize_query(query)}|{data_version}".encode()).hexdigest()[:16]
+    return f"analysis_{symbol}_{digest}"
+
+
+class MCPClient:
+    """Pooled HTTP client for the MCP analysis server"""
+
+    def __init__(
+        self,
+        base_url: str = os.getenv("MCP_SERVER_URL", "http://localhost:8080"),
+        api_key: Optional[str] = os.getenv("MCP_API_KEY"),
+        timeout: float = float(os.getenv("MCP_TIMEOUT", "10")),
+        max_connections: int = int(os.getenv("MCP_MAX_CONNECTIONS", "10")),
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        # Total budget for one call, including waiting for a pooled connection
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("MCP_CIRCUIT_FAILURES", "5")),
+            reset_timeout=float(os.getenv("MCP_CIRCUIT_RESET", "30")),
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "timeouts": 0,
+        }
+
+    async def startup(self) -> None:
+        if self._client is None:
+            self._client = self._build_client()
+
+    async def shutdown(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    def _build_client(self) -> httpx.AsyncClient:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 3.0)),
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+        )
+
+    async def _request(self, method: str, path: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """Call MCP through the circuit breaker within the per-call timeout budget; None on 404"""
+        if not self.breaker.allow():
+            raise MCPUnavailable(f"MCP circuit open; retry in {self.breaker.retry_after():.0f}s")
+
+        self.stats["calls"] += 1
+        try:
+            response = await asyncio.wait_for(self.client.request(method, path, **kwargs), self.timeout)
+            if response.status_code == 404:
+                # The server is healthy, it just has nothing for this symbol
+                result = None
+            else:
+                response.raise_for_status()
+                result = response.json()
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self.breaker.record_failure()
+            raise MCPUnavailable(f"MCP call to {path} timed out after {self.timeout}s")
+        except (httpx.HTTPError, ValueError) as e:
+            self.stats["failures"] += 1
+            self.breaker.record_failure()
+            raise MCPUnavailable(f"MCP call to {path} failed: {e}")
+        except asyncio.CancelledError:
+            # Caller went away; don't leave a half-open trial slot taken
+            self.breaker.release()
+            raise
+
+        self.breaker.record_success()
+        return result
+
+    async def analyze_stock(self, symbol: str, query: str, stock_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the MCP server's /analyze/stock"""
+        return await self._request("POST", "/analyze/stock", json={
+            "symbol": symbol,
+            "query": query,
+            "stock_data": stock_data,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        })
+
+    async def project_analysis(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Project metrics and recommendations for a symbol, or None if MCP has none"""
+        return await self._request("GET", "/project/analysis", params={"symbol": symbol})
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "base_url": self.base_url, "circuit": self.breaker.get_stats()}
@@ -1,17 +1,34 @@
-# mcp_server.py - Example MCP Server
-from fastapi import FastAPI, HTTPException, Header
+# mcp_server.py - Example MCP Server (run with: python -m app.mcp_server)
+from fastapi import FastAPI, HTTPException, Header, Response
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import asyncio
 import json
+import os
+from contextlib import asynccontextmanager
 from datetime import datetime
 import pandas as pd
 import numpy as np
 
-app = FastAPI(title="MCP Server for Stock Analysis")
+from . import indicators
+from .history import HistoryStore
+from .rolling import RollingStatsStore
+from .analysis_store import AnalysisStore
 
-# In-memory storage for project analysis data (replace with your database)
+# Daily bars written by the backend's history ingestion (shared data directory)
+history_store = HistoryStore()
+
+# Rolling indicator state persisted by the backend; reloaded in the background when the file changes
+rolling_store = RollingStatsStore()
+ROLLING_RELOAD_INTERVAL = float(os.getenv("ROLLING_STATE_RELOAD", "10"))
+
+# Bars of look-back needed for the longest indicator window (SMA 200)
+INDICATOR_LOOKBACK = 260
+
+# Built-in project analysis data, used until PROJECT_ANALYSIS_PATH provides a file or database
 project_analysis_data = {
     "AAPL": {
+        "sector": "Technology",
         "project_metrics": {
             "revenue_growth": "15%",
             "profit_margin": "25%",
@@ -25,6 +42,7 @@ project_analysis_data = {
         ]
     },
     "MSFT": {
+        "sector": "Technology",
         "project_metrics": {
             "cloud_growth": "22%",
             "enterprise_adoption": "75%",
@@ -39,6 +57,44 @@ project_analysis_data = {
     }
 }
 
+analysis_store = AnalysisStore(defaults=project_analysis_data)
+
+async def watch_rolling_state():
+    """Swap in the backend's rolling state whenever its file changes
+
+    The file is parsed in a worker thread and only the finished dict is
+    installed on the loop, so request handlers never wait on disk.
+    """
+    loaded_mtime = None
+    while True:
+        try:
+            mtime = await asyncio.to_thread(os.path.getmtime, rolling_store.path)
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime != loaded_mtime:
+            states = await asyncio.to_thread(rolling_store.read)
+            if states is not None:
+                rolling_store.states = states
+                loaded_mtime = mtime
+        await asyncio.sleep(ROLLING_RELOAD_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load project analysis data and rolling state, and watch both for changes"""
+    analysis_store.start()
+    rolling_watcher = asyncio.create_task(watch_rolling_state())
+    try:
+        yield
+    finally:
+        rolling_watcher.cancel()
+        try:
+            await rolling_watcher
+        except asyncio.CancelledError:
+            pass
+        await analysis_store.stop()
+
+app = FastAPI(title="MCP Server for Stock Analysis", lifespan=lifespan)
+
 class StockAnalysisRequest(BaseModel):
     symbol: str
     query: str
@@ -53,15 +109,19 @@ async def analyze_stock(request: StockAnalysisRequest):
     symbol = request.symbol.upper()
     
     # Get project analysis data
-    project_data = project_analysis_data.get(symbol, {})
+    record = analysis_store.get(symbol)
+    
+    # Technical indicators from stored price history, when we have it
+    technicals = compute_technicals(symbol)
     
     # Generate analysis based on project data and stock data
-    analysis = generate_analysis(symbol, request.query, request.stock_data, project_data)
+    analysis = generate_analysis(symbol, request.query, request.stock_data, record, technicals)
     
     return {
         "analysis": analysis,
-        "metrics": project_data.get("project_metrics", {}),
-        "recommendations": project_data.get("recommendations", []),
+        "metrics": record.display if record else {},
+        "technicals": technicals,
+        "recommendations": record.recommendations if record else [],
         "confidence_score": 0.87,
         "source": "mcp_project_analysis"
     }
@@ -71,11 +131,23 @@ async def get_project_analysis(symbol: str, project_id: Optional[str] = None):
     """
     Get project-specific analysis data
     """
-    symbol = symbol.upper()
-    if symbol not in project_analysis_data:
+    record = analysis_store.get(symbol.upper())
+    if record is None:
         raise HTTPException(status_code=404, detail="Project analysis not found")
     
-    return project_analysis_data[symbol]
+    # Serialized once when the data was loaded
+    return Response(content=record.payload, media_type="application/json")
+
+@app.get("/project/sector/{sector}")
+async def get_sector_analysis(sector: str):
+    """
+    Project analysis for every symbol in a sector
+    """
+    payload = analysis_store.sector_payload(sector)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="No project analysis for sector")
+    
+    return Response(content=payload, media_type="application/json")
 
 @app.get("/analysis/historical/{symbol}")
 async def get_historical_analysis(symbol: str, days: int = 30):
@@ -83,8 +155,9 @@ async def get_historical_analysis(symbol: str, days: int = 30):
     Get historical analysis data
     """
     symbol = symbol.upper()
-    # Generate mock historical analysis
     historical_data = generate_historical_analysis(symbol, days)
+    if historical_data is None:
+        raise HTTPException(status_code=404, detail="No price history available for symbol")
     
     return historical_data
 
@@ -93,12 +166,23 @@ async def health_check():
     return {
         "healthy": True,
         "timestamp": datetime.now().isoformat(),
-        "capabilities": ["stock_analysis", "project_data", "historical_analysis"]
+        "capabilities": ["stock_analysis", "project_data", "historical_analysis"],
+        "project_analysis": analysis_store.get_stats()
     }
 
-def generate_analysis(symbol, query, stock_data, project_data):
+def generate_analysis(symbol, query, stock_data, record, technicals=None):
     """Generate analysis based on available data"""
-    # This is where you'd integrate your actual analysis models
+    display = record.display if record else {}
+    recommendations = record.recommendations if record else []
+    technical_lines = ""
+    if technicals:
+        latest = technicals["indicators"]
+        technical_lines = f"""
+    Technicals:
+    - Trend: {technicals['trend']}, volatility: {technicals['volatility']}
+    - RSI(14): {latest.get('rsi_14', 'N/A')}, MACD histogram: {latest.get('macd_hist', 'N/A')}
+    - SMA50: {latest.get('sma_50', 'N/A')}, SMA200: {latest.get('sma_200', 'N/A')}
+    """
     return f"""
     Based on our project analysis for {symbol} ({stock_data.get('companyName', '')}):
     
@@ -106,25 +190,74 @@ def generate_analysis(symbol, query, stock_data, project_data):
     Change: {stock_data.get('changePercent', 'N/A')}%
     
     Project Insights:
-    - {project_data.get('project_metrics', {}).get('revenue_growth', 'N/A')} revenue growth
-    - {project_data.get('project_metrics', {}).get('profit_margin', 'N/A')} profit margin
-    
-    Recommendation: {project_data.get('recommendations', ['No data'])[0]}
+    - {display.get('revenue_growth', 'N/A')} revenue growth
+    - {display.get('profit_margin', 'N/A')} profit margin
     
+    Recommendation: {recommendations[0] if recommendations else 'No data'}
+    {technical_lines}    
     Analysis tailored to your query: "{query}"
     """
 
+def load_closes(symbol, bars):
+    """Last `bars` rows of stored daily history, or None"""
+    try:
+        columns = history_store.read_range(symbol)
+    except ValueError:
+        return None
+    if columns is None or len(columns["close"]) == 0:
+        return None
+    return {name: np.asarray(values[-bars:]) for name, values in columns.items()}
+
+def rolling_snapshot(symbol):
+    """Latest O(1)-maintained indicator values from the backend's rolling state (in memory only)"""
+    state = rolling_store.get(symbol)
+    return state.snapshot() if state is not None else None
+
+def compute_technicals(symbol, days=30):
+    """Indicator values and trend summary for a symbol, or None without history"""
+    columns = load_closes(symbol, days + INDICATOR_LOOKBACK)
+    if columns is None:
+        return None
+    values = indicators.latest(indicators.compute_all(columns["close"], columns["high"], columns["low"]))
+    return {
+        **indicators.summarize(columns["close"], values, days),
+        "as_of": str(np.datetime64(int(columns["date"][-1]), "D")),
+        "indicators": values,
+        "rolling": rolling_snapshot(symbol)
+    }
+
 def generate_historical_analysis(symbol, days):
-    """Generate mock historical analysis"""
+    """Historical analysis computed from stored daily bars"""
+    technicals = compute_technicals(symbol, days)
+    if technicals is None:
+        return None
     return {
         "symbol": symbol,
         "period_days": days,
-        "analysis": f"Historical analysis for {symbol} over {days} days",
-        "trend": "bullish",
-        "volatility": "medium",
-        "performance_score": 8.2
+        "analysis": (
+            f"Historical analysis for {symbol} over {days} days: "
+            f"{technicals['trend']} trend, {technicals['volatility']} volatility, "
+            f"{technicals['period_return'] * 100:.1f}% return"
+        ),
+        "trend": technicals["trend"],
+        "volatility": technicals["volatility"],
+        "performance_score": technicals["performance_score"],
+        "period_return": technicals["period_return"],
+        "max_drawdown": technicals["max_drawdown"],
+        "as_of": technicals["as_of"],
+        "indicators": technicals["indicators"]
     }
 
+@app.post("/analysis/indicators")
+async def get_batch_indicators(symbols: List[str], days: int = 30):
+    """Latest indicator values for many symbols in one vectorized pass"""
+    series = {}
+    for symbol in dict.fromkeys(s.upper() for s in symbols):
+        columns = load_closes(symbol, days + INDICATOR_LOOKBACK)
+        if columns is not None:
+            series[symbol] = columns
+    return indicators.compute_batch(series)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
@@ -0,0 +1,340 @@
+import asyncio
+import bisect
+import cProfile
+import importlib.util
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# pyinstrument is an optional sampling profiler that follows await points; cProfile is the fallback
+pyinstrument = None
+if importlib.util.find_spec("pyinstrument") is not None:
+    import pyinstrument
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[Any, ...], float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def set(self, *labels: Any, value: float) -> None:
+        self.values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, *labels: Any, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and two adds"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self.series: Dict[Tuple[Any, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def stats_collector(prefix: str, get_stats: Callable[[], Dict[str, Any]]) -> Callable[[], List[Gauge]]:
+    """Collector exporting the numeric top-level fields of a get_stats() dict as gauges"""
+
+    def collect() -> List[Gauge]:
+        gauges = []
+        for key, value in get_stats().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            gauge = Gauge(f"{prefix}_{_NAME_RE.sub('_', key)}", f"{prefix} {key}")
+            gauge.set(value=value)
+            gauges.append(gauge)
+        return gauges
+
+    return collect
+
+
+def cache_collector(cache: Any) -> Callable[[], List[Counter]]:
+    """Collector for CacheService: per-namespace entries and hit/miss/eviction counters"""
+
+    def collect() -> List[Counter]:
+        stats = cache.get_stats()
+        entries = Gauge("cache_entries", "Entries in the in-process cache", ("namespace",))
+        size = Gauge("cache_bytes", "Approximate bytes held by the in-process cache")
+        size.set(value=stats["bytes"])
+        events = Counter("cache_events_total", "In-process cache events by namespace", ("namespace", "event"))
+        for namespace, counters in stats["namespaces"].items():
+            entries.set(namespace, value=counters["entries"])
+            for event in ("hits", "stale_hits", "misses", "sets", "evictions", "expirations"):
+                if event in counters:
+                    events.set(namespace, event, value=counters[event])
+        return [entries, size, events]
+
+    return collect
+
+
+class RequestProfiler:
+    """Opt-in profiler for a random sample of requests
+
+    Off unless PROFILE_SAMPLE_RATE > 0. A sampled request that takes at least
+    PROFILE_MIN_MS has its profile written to PROFILE_DIR. Only one request is
+    profiled at a time, so concurrent requests never stack profilers.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+        min_ms: float = float(os.getenv("PROFILE_MIN_MS", "100")),
+        out_dir: str = os.getenv("PROFILE_DIR", "data/profiles"),
+    ):
+        self.sample_rate = sample_rate
+        self.min_ms = min_ms
+        self.out_dir = out_dir
+        self._active = False
+        self.stats = {
+            "sampled": 0,
+            "written": 0,
+        }
+
+    def start(self) -> Optional[Any]:
+        if self.sample_rate <= 0 or self._active or random.random() >= self.sample_rate:
+            return None
+        self._active = True
+        self.stats["sampled"] += 1
+        try:
+            if pyinstrument is not None:
+                profiler = pyinstrument.Profiler(interval=0.001, async_mode="enabled")
+                profiler.start()
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+        except Exception as e:
+            self._active = False
+            logger.error(f"Could not start request profiler: {e}")
+            return None
+        return profiler
+
+    def finish(self, profiler: Any, method: str, route: str, elapsed: float) -> None:
+        try:
+            if pyinstrument is not None:
+                profiler.stop()
+            else:
+                profiler.disable()
+            if elapsed * 1000 < self.min_ms:
+                return
+            if pyinstrument is not None:
+                report = profiler.output_text(unicode=False, color=False)
+            else:
+                buffer = io.StringIO()
+                pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(40)
+                report = buffer.getvalue()
+            os.makedirs(self.out_dir, exist_ok=True)
+            name = _NAME_RE.sub("_", f"{method}_{route}").strip("_")
+            path = os.path.join(self.out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"{method} {route} {elapsed * 1000:.1f}ms\n\n{report}")
+            self.stats["written"] += 1
+            logger.info(f"Profiled {method} {route} ({elapsed * 1000:.1f}ms) -> {path}")
+        except Exception as e:
+            logger.error(f"Could not write request profile: {e}")
+        finally:
+            self._active = False
+
+
+class Metrics:
+    """Process-wide metrics registry and the hot-path metrics the app records"""
+
+    def __init__(self, loop_lag_interval: float = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))):
+        self.started_at = time.time()
+        self.loop_lag_interval = loop_lag_interval
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], Iterable[Any]]] = []
+        self._lag_task: Optional[asyncio.Task] = None
+
+        self.requests = self.register(Histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+        ))
+        self.in_flight = self.register(Gauge("http_requests_in_flight", "HTTP requests being handled"))
+        self.upstream = self.register(Histogram(
+            "upstream_request_duration_seconds", "Alpha Vantage call latency by function", ("function", "outcome")
+        ))
+        self.loop_lag = self.register(Histogram(
+            "event_loop_lag_seconds", "Delay of a scheduled event-loop wakeup", (), LOOP_LAG_BUCKETS
+        ))
+        self.loop_lag_last = self.register(Gauge("event_loop_lag_last_seconds", "Most recent event-loop lag sample"))
+        self.in_flight.set(value=0)
+        self.profiler = RequestProfiler()
+
+    def register(self, metric: Any) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect: Callable[[], Iterable[Any]]) -> None:
+        """Register a callable returning metrics built at scrape time"""
+        self._collectors.append(collect)
+
+    def uptime(self) -> float:
+        return time.time() - self.started_at
+
+    def observe_upstream(self, function: str, outcome: str, elapsed: float) -> None:
+        self.upstream.observe(elapsed, function, outcome)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = [
+            "# HELP process_uptime_seconds Seconds since the process started",
+            "# TYPE process_uptime_seconds gauge",
+            f"process_uptime_seconds {self.uptime():.3f}",
+        ]
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                for metric in collect():
+                    lines.extend(metric.render())
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+    def start(self) -> None:
+        """Start sampling event-loop lag"""
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.create_task(self._sample_loop_lag())
+
+    async def stop(self) -> None:
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+    async def _sample_loop_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.loop_lag_interval
+            await asyncio.sleep(self.loop_lag_interval)
+            lag = max(0.0, loop.time() - expected)
+            self.loop_lag.observe(lag)
+            self.loop_lag_last.set(value=lag)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "uptime_seconds": round(self.uptime(), 1),
+            "in_flight": int(self.in_flight.values.get((), 0)),
+            "loop_lag_seconds": round(self.loop_lag_last.values.get((), 0.0), 4),
+            "profiler": {**self.profiler.stats, "sample_rate": self.profiler.sample_rate},
+        }
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and in-flight requests
+
+    Routes are labelled by their template (/api/quote/{symbol}), so label
+    cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app: Any, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight.inc()
+        profiler = metrics.profiler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            metrics.requests.observe(elapsed, scope["method"], route, status)
+            if profiler is not None:
+                metrics.profiler.finish(profiler, scope["method"], route, elapsed)
+
+
+metrics = Metrics()
@@ -70,6 +70,90 @@ class StockSearchResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BatchQuoteResponse(BaseModel):
+    """Response model for batch quotes, with a status per requested symbol"""
+    quotes: Dict[str, Optional[StockQuote]]
+    status: Dict[str, str]
+    fetched: int = 0
+    cached: int = 0
+    failed: int = 0
+    
+    class Config:
+        from_attributes = True
+
+class Position(BaseModel):
+    """A holding: quantity and total cost basis"""
+    symbol: str
+    quantity: float
+    cost_basis: Optional[float] = None
+
+class PortfolioRequest(BaseModel):
+    """Request model for portfolio valuation"""
+    positions: List[Position]
+
+class PositionValuation(BaseModel):
+    """Valuation of one position"""
+    symbol: str
+    quantity: float
+    price: Optional[float] = None
+    market_value: Optional[float] = None
+    cost_basis: Optional[float] = None
+    unrealized_pnl: Optional[float] = None
+    unrealized_pnl_percent: Optional[float] = None
+    day_change: Optional[float] = None
+    weight: Optional[float] = None
+    sector: Optional[str] = None
+    status: str
+
+class PortfolioValuation(BaseModel):
+    """Response model for portfolio valuation"""
+    total_value: float
+    total_cost: float
+    unrealized_pnl: float
+    unrealized_pnl_percent: Optional[float] = None
+    day_change: float
+    day_change_percent: Optional[float] = None
+    sector_exposure: Dict[str, float]
+    positions: List[PositionValuation]
+    priced: int = 0
+    unpriced: int = 0
+
+    class Config:
+        from_attributes = True
+
+class MoversResponse(BaseModel):
+    """Top gainers and losers among cached quotes"""
+    gainers: List[StockQuote]
+    losers: List[StockQuote]
+    field: str
+    universe: int = 0
+
+class ScreenerResponse(BaseModel):
+    """Screen results: one row of typed quote and overview fields per symbol"""
+    results: List[Dict[str, Any]]
+    total_matched: int = 0
+    universe: int = 0
+
+class AnalysisRequest(BaseModel):
+    """Request model for stock analysis"""
+    symbol: str
+    query: str
+
+class AnalysisResponse(BaseModel):
+    """Stock analysis from the MCP server with the data it was based on"""
+    symbol: str
+    query: str
+    quote: Optional[StockQuote] = None
+    overview: Optional[StockOverview] = None
+    analysis: Optional[Dict[str, Any]] = None
+    analysis_status: str
+    data_version: Optional[str] = None
+
+class AskRequest(BaseModel):
+    """Request model for a stock question"""
+    question: str
+    symbol: Optional[str] = None
+
 class APIResponse(BaseModel):
     """Generic API response model"""
     success: bool
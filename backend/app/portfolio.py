@@ -0,0 +1,107 @@
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .models import PortfolioValuation, PositionValuation
+
+UNKNOWN_SECTOR = "Unknown"
+
+
+def _optional(values: np.ndarray, digits: int = 4) -> List[Optional[float]]:
+    """Array -> list of rounded floats with NaN as None"""
+    return [None if math.isnan(v) else round(v, digits) for v in np.round(values, digits).tolist()]
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return round(numerator / denominator, 6) if denominator else None
+
+
+def value_portfolio(
+    symbols: List[str],
+    quantities: List[float],
+    cost_bases: List[Optional[float]],
+    quotes: Dict[str, Any],
+    sectors: Dict[str, Optional[str]],
+    status: Dict[str, str],
+) -> PortfolioValuation:
+    """Value positions against quotes in one vectorized pass
+
+    quotes maps symbol -> StockQuote (missing symbols are unpriced), sectors
+    maps symbol -> sector name and status maps symbol -> quote status. Several
+    positions may share a symbol (one per lot).
+    """
+    n = len(symbols)
+    quantity = np.asarray(quantities, dtype=np.float64)
+    cost = np.array([np.nan if c is None else c for c in cost_bases], dtype=np.float64)
+    price = np.full(n, np.nan)
+    change = np.full(n, np.nan)
+    for i, symbol in enumerate(symbols):
+        quote = quotes.get(symbol)
+        if quote is not None and quote.price is not None:
+            price[i] = quote.price
+            if quote.change is not None:
+                change[i] = quote.change
+
+    priced = ~np.isnan(price)
+    value = quantity * price
+    pnl = value - cost
+    day_change = quantity * change
+
+    total_value = float(value[priced].sum())
+    has_pnl = ~np.isnan(pnl)
+    total_pnl = float(pnl[has_pnl].sum())
+    total_cost = float(cost[has_pnl].sum())
+    has_change = ~np.isnan(day_change)
+    total_day_change = float(day_change[has_change].sum())
+    # Day change relative to yesterday's value of the same holdings
+    previous_value = float(value[has_change].sum()) - total_day_change
+
+    weight = value / total_value if total_value else np.full(n, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_percent = np.where(cost != 0, pnl / np.abs(cost), np.nan)
+
+    # Sector exposure: bucket weights by sector code
+    sector_names = [sectors.get(symbol) or UNKNOWN_SECTOR for symbol in symbols]
+    labels, codes = np.unique(np.array(sector_names, dtype=object), return_inverse=True)
+    exposure = np.bincount(codes[priced], weights=weight[priced], minlength=len(labels)) if total_value else np.zeros(len(labels))
+    sector_exposure = {
+        str(label): round(float(share), 6)
+        for label, share in sorted(zip(labels, exposure), key=lambda item: -item[1])
+        if share
+    }
+
+    rows = zip(
+        symbols, quantity.tolist(), _optional(price), _optional(value), _optional(cost),
+        _optional(pnl), _optional(pnl_percent, 6), _optional(day_change), _optional(weight, 6), sector_names
+    )
+    positions = [
+        PositionValuation(
+            symbol=symbol,
+            quantity=qty,
+            price=p,
+            market_value=mv,
+            cost_basis=c,
+            unrealized_pnl=u,
+            unrealized_pnl_percent=up,
+            day_change=d,
+            weight=w,
+            sector=sector if sector != UNKNOWN_SECTOR else None,
+            status=status.get(symbol, "error"),
+        )
+        for symbol, qty, p, mv, c, u, up, d, w, sector in rows
+    ]
+
+    priced_count = int(priced.sum())
+    return PortfolioValuation(
+        total_value=round(total_value, 4),
+        total_cost=round(total_cost, 4),
+        unrealized_pnl=round(total_pnl, 4),
+        unrealized_pnl_percent=_ratio(total_pnl, abs(total_cost)),
+        day_change=round(total_day_change, 4),
+        day_change_percent=_ratio(total_day_change, previous_value),
+        sector_exposure=sector_exposure,
+        positions=positions,
+        priced=priced_count,
+        unpriced=n - priced_count,
+    )
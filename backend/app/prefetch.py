@@ -0,0 +1,228 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .cache import CacheService
+from .ratelimit import DailyBudget, Priority, RateLimitExceeded, TokenBucket, upstream_priority
+
+logger = logging.getLogger(__name__)
+
+try:
+    from zoneinfo import ZoneInfo
+    _EXCHANGE_TZ: Any = ZoneInfo("America/New_York")
+except Exception:
+    # No tz database (e.g. slim images without tzdata): US Eastern standard time, ignoring DST
+    _EXCHANGE_TZ = timezone(timedelta(hours=-5))
+
+# Regular NYSE/Nasdaq session in exchange time; holidays are not modelled
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE = (16, 0)
+
+
+def market_open(now: Optional[datetime] = None) -> bool:
+    """Whether US equity markets are in their regular session"""
+    local = (now or datetime.now(timezone.utc)).astimezone(_EXCHANGE_TZ)
+    if local.weekday() >= 5:
+        return False
+    return MARKET_OPEN <= (local.hour, local.minute) < MARKET_CLOSE
+
+
+class AccessTracker:
+    """Exponentially decayed access counts per cache key
+
+    Uses forward decay: each hit adds exp((t - t0) / tau) instead of decaying
+    every counter on every tick, so recording is O(1) and scores stay
+    comparable. Counters are rescaled when the weights grow large and the
+    coldest keys are dropped past max_keys.
+    """
+
+    def __init__(
+        self,
+        half_life: float = float(os.getenv("PREFETCH_HALF_LIFE", "1800")),
+        max_keys: int = int(os.getenv("PREFETCH_MAX_TRACKED", "5000")),
+    ):
+        self.tau = half_life / math.log(2)
+        self.max_keys = max_keys
+        self.scores: Dict[str, float] = {}
+        self._landmark = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def record(self, key: str) -> None:
+        exponent = (time.monotonic() - self._landmark) / self.tau
+        if exponent > 50:
+            self._rescale()
+            exponent = 0.0
+        self.scores[key] = self.scores.get(key, 0.0) + math.exp(exponent)
+        if len(self.scores) > 2 * self.max_keys:
+            self._prune()
+
+    def _rescale(self) -> None:
+        now = time.monotonic()
+        factor = math.exp(-(now - self._landmark) / self.tau)
+        self.scores = {key: score * factor for key, score in self.scores.items() if score * factor > 1e-6}
+        self._landmark = now
+
+    def _prune(self) -> None:
+        self.scores = dict(heapq.nlargest(self.max_keys, self.scores.items(), key=lambda item: item[1]))
+
+    def discard(self, key: str) -> None:
+        """Stop tracking a key"""
+        self.scores.pop(key, None)
+
+    def score(self, key: str) -> float:
+        """Decayed hit count as of now"""
+        return self.scores.get(key, 0.0) * math.exp(-(time.monotonic() - self._landmark) / self.tau)
+
+    def top(self, k: int) -> List[Tuple[str, float]]:
+        """The k hottest keys with their current decayed counts"""
+        factor = math.exp(-(time.monotonic() - self._landmark) / self.tau)
+        return [(key, score * factor) for key, score in heapq.nlargest(k, self.scores.items(), key=lambda item: item[1])]
+
+
+class Prefetcher:
+    """Refreshes the hottest cache keys shortly before they expire
+
+    Every interval it takes the top-K keys by decayed access count and
+    refreshes those that are missing or expire within the lead time, hottest
+    first, at background priority. Its own budget (a share of the upstream
+    per-minute and daily quota) caps how much of the key it can spend; the
+    scheduler still sheds background work when quota runs low. Paused outside
+    market hours unless PREFETCH_MARKET_HOURS_ONLY is off.
+    """
+
+    def __init__(
+        self,
+        cache: CacheService,
+        refresh: Callable[[str, Callable[[], Awaitable[Any]]], Awaitable[Any]],
+        fetch_for: Callable[[str], Optional[Callable[[], Awaitable[Any]]]],
+        tracker: AccessTracker,
+        per_minute: float,
+        per_day: int,
+        budget_share: float = float(os.getenv("PREFETCH_BUDGET_SHARE", "0.2")),
+        top_k: int = int(os.getenv("PREFETCH_TOP_K", "20")),
+        lead: float = float(os.getenv("PREFETCH_LEAD", "10")),
+        interval: float = float(os.getenv("PREFETCH_INTERVAL", "5")),
+        market_hours_only: bool = os.getenv("PREFETCH_MARKET_HOURS_ONLY", "true").lower() in ("1", "true", "yes"),
+    ):
+        self.cache = cache
+        self.refresh = refresh
+        # fetch_for(key) -> upstream fetch for that key, or None if the key is not prefetchable
+        self.fetch_for = fetch_for
+        self.tracker = tracker
+        self.budget_share = budget_share
+        minute_share = per_minute * budget_share
+        # No bucket when prefetching is disabled with a zero share
+        self.minute_bucket = (
+            TokenBucket(minute_share, period=60.0, capacity=max(1.0, minute_share)) if minute_share > 0 else None
+        )
+        self.daily_budget = DailyBudget(int(per_day * budget_share))
+        self.top_k = top_k
+        self.lead = lead
+        self.interval = interval
+        self.market_hours_only = market_hours_only
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "rounds": 0,
+            "paused_rounds": 0,
+            "prefetched": 0,
+            "over_budget": 0,
+            "deferred": 0,
+            "failures": 0,
+            "empty": 0,
+        }
+
+    def record(self, key: str) -> None:
+        """Count an access; call after a successful load so misses never become prefetch work"""
+        self.tracker.record(key)
+
+    def due(self) -> List[str]:
+        """Hot keys that are missing or expire within the lead time, hottest first"""
+        now = self.cache.now()
+        keys = []
+        for key, _ in self.tracker.top(self.top_k):
+            entry = self.cache.peek(key)
+            # Leave room for the fetch itself, as XFetch does
+            if entry is None or entry.expiry - now <= max(self.lead, 2 * entry.delta) + self.interval:
+                keys.append(key)
+        return keys
+
+    async def run_once(self) -> int:
+        """One prefetch round; returns the number of keys refreshed"""
+        self.stats["rounds"] += 1
+        if self.market_hours_only and not market_open():
+            self.stats["paused_rounds"] += 1
+            return 0
+
+        # Lowered for this round only; user requests keep their priority
+        token = upstream_priority.set(Priority.BACKGROUND)
+        try:
+            refreshed = await self._prefetch_due()
+        finally:
+            upstream_priority.reset(token)
+        self.stats["prefetched"] += refreshed
+        return refreshed
+
+    async def _prefetch_due(self) -> int:
+        refreshed = 0
+        for key in self.due():
+            fetch = self.fetch_for(key)
+            if fetch is None:
+                continue
+            if self.minute_bucket is None or self.daily_budget.remaining() <= 0 or not self.minute_bucket.try_acquire():
+                self.stats["over_budget"] += 1
+                break
+            self.daily_budget.consume()
+            try:
+                data = await self.refresh(key, fetch)
+            except RateLimitExceeded:
+                # The scheduler is keeping quota for user traffic; try again next round
+                self.stats["deferred"] += 1
+                break
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.error(f"Prefetch of {key} failed: {e}")
+                continue
+            if data is None:
+                # Nothing to cache (e.g. the symbol no longer exists), so it would be due every round
+                self.stats["empty"] += 1
+                self.tracker.discard(key)
+                continue
+            refreshed += 1
+        return refreshed
+
+    def start(self) -> None:
+        if self.top_k > 0 and self.budget_share > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Prefetch round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "tracked_keys": len(self.tracker),
+            "market_open": market_open(),
+            "daily_remaining": self.daily_budget.remaining(),
+            "hot": [{"key": key, "score": round(score, 2)} for key, score in self.tracker.top(10)],
+        }
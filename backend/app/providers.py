@@ -0,0 +1,398 @@
+import asyncio
+import importlib.util
+import json
+import logging
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .models import StockOverview, StockQuote
+from .ratelimit import RateLimitExceeded
+from .resilience import CircuitBreaker
+from .utils import format_quote_data, format_stock_data
+
+logger = logging.getLogger(__name__)
+
+# yfinance is optional; without it the adapter is skipped
+yf = None
+if importlib.util.find_spec("yfinance") is not None:
+    import yfinance as yf
+
+# Hedge delay when a provider has too few samples for a p95, and its bounds otherwise
+HEDGE_DEFAULT_DELAY = float(os.getenv("PROVIDER_HEDGE_DELAY", "2"))
+HEDGE_MIN_DELAY = float(os.getenv("PROVIDER_HEDGE_MIN_DELAY", "0.25"))
+HEDGE_MAX_DELAY = float(os.getenv("PROVIDER_HEDGE_MAX_DELAY", "5"))
+PROVIDER_TIMEOUT = float(os.getenv("PROVIDER_TIMEOUT", "15"))
+# Half-life over which a demoted provider's success rate drifts back to healthy, so it gets traffic again
+RECOVERY_HALF_LIFE = float(os.getenv("PROVIDER_RECOVERY_HALF_LIFE", "120"))
+
+
+class ProviderError(Exception):
+    """A provider failed to answer (as opposed to answering "not found")"""
+
+
+class ProviderNotEntitled(ProviderError):
+    """The provider refused the call for the API key's plan (a premium-only endpoint or parameter)"""
+
+
+class ProviderUnavailable(ProviderError):
+    """No provider answered at all: every one failed, or PROVIDER_TIMEOUT ran out"""
+
+    def __init__(self, message: str, timed_out: bool = False):
+        super().__init__(message)
+        self.timed_out = timed_out
+
+
+class MarketDataProvider(ABC):
+    """Source of quotes and overviews
+
+    Methods return None when the provider answers that the symbol is unknown
+    and raise (ProviderError, RateLimitExceeded, httpx errors) when it could
+    not answer. Results are normalized into StockQuote/StockOverview.
+    """
+
+    name = "provider"
+
+    @abstractmethod
+    async def get_quote(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockQuote]:
+        """Latest quote, or None when the symbol is unknown"""
+
+    @abstractmethod
+    async def get_overview(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockOverview]:
+        """Company overview, or None when the symbol is unknown"""
+
+
+class AlphaVantageProvider(MarketDataProvider):
+    """Alpha Vantage through StockService (its scheduler, pool and quota)"""
+
+    name = "alphavantage"
+
+    def __init__(self, service: Any):
+        self.service = service
+
+    async def get_quote(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockQuote]:
+        return await self.service.fetch_quote(symbol, queue_timeout)
+
+    async def get_overview(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockOverview]:
+        return await self.service.fetch_overview(symbol, queue_timeout)
+
+
+def _text(value: Any) -> Optional[str]:
+    """yfinance number -> the string form StockOverview uses"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return str(value)
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance via yfinance (blocking, so calls run in a worker thread)"""
+
+    name = "yfinance"
+
+    @staticmethod
+    def _quote(symbol: str) -> Optional[StockQuote]:
+        info = yf.Ticker(symbol).fast_info
+        try:
+            price = info["last_price"]
+        except KeyError:
+            return None
+        if price is None or math.isnan(price):
+            return None
+        previous = info.get("previous_close")
+        change = price - previous if previous else None
+        return StockQuote(
+            symbol=symbol,
+            price=round(price, 4),
+            change=round(change, 4) if change is not None else None,
+            change_percent=f"{change / previous * 100:.4f}%" if change is not None else None,
+            volume=int(info["last_volume"]) if info.get("last_volume") else None,
+            previous_close=previous,
+            open=info.get("open"),
+            high=info.get("day_high"),
+            low=info.get("day_low"),
+        )
+
+    @staticmethod
+    def _overview(symbol: str) -> Optional[StockOverview]:
+        info = yf.Ticker(symbol).info
+        name = info.get("longName") or info.get("shortName")
+        if not name:
+            return None
+        return StockOverview(
+            symbol=symbol,
+            name=name,
+            sector=info.get("sector"),
+            industry=info.get("industry"),
+            description=info.get("longBusinessSummary"),
+            exchange=info.get("exchange"),
+            currency=info.get("currency"),
+            country=info.get("country"),
+            market_cap=_text(info.get("marketCap")),
+            pe_ratio=_text(info.get("trailingPE")),
+            peg_ratio=_text(info.get("pegRatio")),
+            dividend_yield=_text(info.get("dividendYield")),
+            eps=_text(info.get("trailingEps")),
+            beta=_text(info.get("beta")),
+            week_52_high=_text(info.get("fiftyTwoWeekHigh")),
+            week_52_low=_text(info.get("fiftyTwoWeekLow")),
+            moving_avg_50=_text(info.get("fiftyDayAverage")),
+            moving_avg_200=_text(info.get("twoHundredDayAverage")),
+        )
+
+    async def get_quote(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockQuote]:
+        return await asyncio.to_thread(self._quote, symbol.upper())
+
+    async def get_overview(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockOverview]:
+        return await asyncio.to_thread(self._overview, symbol.upper())
+
+
+class FixtureProvider(MarketDataProvider):
+    """Alpha Vantage-format JSON files on disk, for offline runs and tests
+
+    Reads <path>/GLOBAL_QUOTE_<SYMBOL>.json and <path>/OVERVIEW_<SYMBOL>.json
+    (the fixture layout bench/fake_alpha_vantage.py uses); a missing file
+    means the symbol is unknown.
+    """
+
+    name = "fixture"
+
+    def __init__(self, path: str = os.getenv("PROVIDER_FIXTURES_PATH", "data/fixtures")):
+        self.path = path
+
+    def _load(self, function: str, symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.path, f"{function}_{symbol}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    async def get_quote(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockQuote]:
+        data = await asyncio.to_thread(self._load, "GLOBAL_QUOTE", symbol.upper())
+        if not data or not data.get("Global Quote"):
+            return None
+        return StockQuote(**format_quote_data(data["Global Quote"]))
+
+    async def get_overview(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockOverview]:
+        data = await asyncio.to_thread(self._load, "OVERVIEW", symbol.upper())
+        if not data or "Symbol" not in data:
+            return None
+        return StockOverview(**format_stock_data(data))
+
+
+class ProviderHealth:
+    """Recent latency and success rate of one provider, plus its circuit breaker"""
+
+    def __init__(self, window: int = 200, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.latencies: deque = deque(maxlen=window)
+        # Exponentially weighted success rate, starting optimistic
+        self._success_rate = 1.0
+        self._updated = time.monotonic()
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "wins": 0,
+            "hedges": 0,
+        }
+
+    def record(self, ok: bool, latency: float) -> None:
+        self.stats["calls"] += 1
+        self._success_rate = 0.9 * self.success_rate + 0.1 * (1.0 if ok else 0.0)
+        self._updated = time.monotonic()
+        if ok:
+            self.stats["successes"] += 1
+            self.latencies.append(latency)
+            self.breaker.record_success()
+        else:
+            self.stats["failures"] += 1
+            self.breaker.record_failure()
+
+    @property
+    def success_rate(self) -> float:
+        """Success rate, with failures fading when the provider is not being called"""
+        idle = time.monotonic() - self._updated
+        return 1.0 - (1.0 - self._success_rate) * 0.5 ** (idle / RECOVERY_HALF_LIFE)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Latency quantile over the window; None with fewer than 20 samples"""
+        if len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self) -> float:
+        """How long to wait for this provider before asking the next one: its p95"""
+        p95 = self.quantile(0.95)
+        if p95 is None:
+            return HEDGE_DEFAULT_DELAY
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, p95))
+
+    def score(self) -> float:
+        """Higher is better: success rate discounted by median latency"""
+        p50 = self.quantile(0.5)
+        return self.success_rate / (1.0 + (p50 if p50 is not None else 0.0))
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50, p95 = self.quantile(0.5), self.quantile(0.95)
+        return {
+            **self.stats,
+            "success_rate": round(self.success_rate, 3),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "score": round(self.score(), 4),
+            "circuit": self.breaker.get_stats(),
+        }
+
+
+class ProviderRouter:
+    """Quotes and overviews from the healthiest provider, hedged and with failover
+
+    Providers are tried best score first (configured order breaks ties and
+    keeps the first one preferred while healthy). If the current provider has
+    not answered by its p95 latency a hedge goes to the next one, and an error
+    moves on immediately; the first result wins and the rest are cancelled.
+    "Unknown symbol" (None) is returned only when a provider actually said so and
+    none still in flight has data; when nobody answers ProviderUnavailable is raised.
+    Providers with an open circuit are skipped. get_stock_quote/get_stock_overview
+    are the only way the app reads quotes and overviews; StockService keeps
+    just the raw Alpha Vantage calls that AlphaVantageProvider wraps.
+    """
+
+    def __init__(self, providers: List[MarketDataProvider], hedge: bool = True, timeout: float = PROVIDER_TIMEOUT):
+        self.providers = providers
+        self.hedge = hedge
+        self.timeout = timeout
+        self.health: Dict[str, ProviderHealth] = {provider.name: ProviderHealth() for provider in providers}
+        self.stats = {
+            "hedged": 0,
+            "failovers": 0,
+            "exhausted": 0,
+        }
+
+    def ranked(self) -> List[MarketDataProvider]:
+        """Available providers, best first; the primary keeps its place unless clearly worse"""
+        available = [p for p in self.providers if self.health[p.name].breaker.state != "open"]
+        if not available:
+            # Every circuit is open: still try the configured order rather than fail outright
+            return list(self.providers)
+        order = {p.name: i for i, p in enumerate(self.providers)}
+        return sorted(available, key=lambda p: (-round(self.health[p.name].score(), 1), order[p.name]))
+
+    async def get_stock_quote(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockQuote]:
+        return await self._route(symbol, lambda p: p.get_quote(symbol, queue_timeout), "quote")
+
+    async def get_stock_overview(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockOverview]:
+        return await self._route(symbol, lambda p: p.get_overview(symbol, queue_timeout), "overview")
+
+    async def _timed(self, provider: MarketDataProvider, call: Callable[[MarketDataProvider], Awaitable[Any]]) -> Any:
+        health = self.health[provider.name]
+        started = time.monotonic()
+        try:
+            result = await call(provider)
+        except asyncio.CancelledError:
+            # Lost the race: neither a success nor a failure, and no latency sample either
+            health.breaker.release()
+            raise
+        except Exception:
+            health.record(False, time.monotonic() - started)
+            raise
+        health.record(True, time.monotonic() - started)
+        return result
+
+    async def _route(self, symbol: str, call: Callable[[MarketDataProvider], Awaitable[Any]], kind: str) -> Any:
+        candidates = self.ranked()
+        pending: Dict[asyncio.Task, MarketDataProvider] = {}
+        errors: List[BaseException] = []
+        answered = False
+        timed_out = False
+        deadline = time.monotonic() + self.timeout
+
+        def launch() -> Optional[MarketDataProvider]:
+            while candidates:
+                provider = candidates.pop(0)
+                if self.health[provider.name].breaker.allow():
+                    pending[asyncio.ensure_future(self._timed(provider, call))] = provider
+                    return provider
+            return None
+
+        current = launch()
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                wait = remaining
+                if self.hedge and candidates and current is not None:
+                    wait = min(remaining, self.health[current.name].hedge_delay())
+                done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than this provider's p95: hedge to the next one
+                    self.stats["hedged"] += 1
+                    hedged = launch()
+                    if hedged is not None:
+                        self.health[hedged.name].stats["hedges"] += 1
+                        current = hedged
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        if task.result() is None:
+                            # "Unknown symbol" only stands once no other provider can still answer
+                            answered = True
+                            continue
+                        self.health[provider.name].stats["wins"] += 1
+                        return task.result()
+                    errors.append(task.exception())
+                    logger.error(f"{provider.name} {kind} for {symbol} failed: {type(task.exception()).__name__}: {task.exception()}")
+                if not pending and not answered:
+                    self.stats["failovers"] += 1
+                    current = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if answered:
+            return None
+        self.stats["exhausted"] += 1
+        # Throttling everywhere is reported as such so callers answer 503 with Retry-After
+        for error in errors:
+            if isinstance(error, RateLimitExceeded):
+                raise error
+        logger.error(f"No provider answered {kind} for {symbol}")
+        if timed_out:
+            raise ProviderUnavailable(f"No market data provider answered {kind} for {symbol} in {self.timeout:g}s", timed_out=True)
+        raise ProviderUnavailable(f"All market data providers failed {kind} for {symbol}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "order": [provider.name for provider in self.ranked()],
+            "providers": {name: health.get_stats() for name, health in self.health.items()},
+        }
+
+
+def build_providers(names: str, stock_service: Any) -> List[MarketDataProvider]:
+    """Providers named in a comma-separated list; unavailable ones are skipped with a warning"""
+    providers: List[MarketDataProvider] = []
+    for name in (part.strip().lower() for part in names.split(",") if part.strip()):
+        if name == "alphavantage":
+            providers.append(AlphaVantageProvider(stock_service))
+        elif name == "yfinance":
+            if yf is None:
+                logger.warning("yfinance provider requested but the 'yfinance' package is not installed; skipping it")
+                continue
+            providers.append(YFinanceProvider())
+        elif name == "fixture":
+            providers.append(FixtureProvider())
+        else:
+            logger.warning(f"Unknown market data provider '{name}'; skipping it")
+    if not providers:
+        providers.append(AlphaVantageProvider(stock_service))
+    return providers
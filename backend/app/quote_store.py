@@ -0,0 +1,200 @@
+import math
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .models import StockQuote
+
+_FLOAT_FIELDS = ("price", "change", "change_pct", "open", "high", "low", "previous_close")
+
+
+def _percent(value: Optional[str]) -> float:
+    """ "0.5053%" -> 0.5053 (NaN when missing)"""
+    if not value:
+        return math.nan
+    try:
+        return float(value.rstrip("%"))
+    except ValueError:
+        return math.nan
+
+
+def _day(value: Optional[str]) -> int:
+    """ISO date -> days since epoch (-1 when missing or malformed)"""
+    if not value:
+        return -1
+    try:
+        return int(np.datetime64(value, "D").astype(np.int64))
+    except ValueError:
+        return -1
+
+
+class QuoteStore:
+    """Latest quote per symbol as a struct of arrays
+
+    Each symbol owns a slot; every field is one NumPy column indexed by slot,
+    so a quote costs a few dozen bytes instead of a Pydantic model, and bulk
+    reads (movers, screens) are vectorized over columns. This is where the
+    cache's quote namespace keeps its values (CacheService only holds their
+    expiry); StockQuote objects are only built at the API boundary. A row
+    stays after its cache entry expires or is evicted, so bulk reads cover
+    every symbol ever quoted; filter them with max_age / updated_at.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.slots: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.columns: Dict[str, np.ndarray] = {name: np.full(capacity, np.nan) for name in _FLOAT_FIELDS}
+        # Volume and trading day (days since epoch) use -1 for unknown
+        self.columns["volume"] = np.full(capacity, -1, dtype=np.int64)
+        self.columns["day"] = np.full(capacity, -1, dtype=np.int32)
+        # Wall-clock time of the last update
+        self.columns["updated_at"] = np.zeros(capacity)
+        # Store-wide write counter at the last update, so readers can tell a row changed
+        self.columns["version"] = np.full(capacity, -1, dtype=np.int64)
+        self._writes = 0
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.slots
+
+    def _slot(self, symbol: str) -> int:
+        slot = self.slots.get(symbol)
+        if slot is None:
+            slot = len(self.symbols)
+            if slot == len(self.columns["price"]):
+                self._grow()
+            self.slots[symbol] = slot
+            self.symbols.append(symbol)
+        return slot
+
+    @staticmethod
+    def _fill(name: str) -> float:
+        return np.nan if name in _FLOAT_FIELDS else (0 if name == "updated_at" else -1)
+
+    def _grow(self) -> None:
+        for name, column in self.columns.items():
+            extra = np.full_like(column, self._fill(name))
+            self.columns[name] = np.concatenate([column, extra])
+
+    def update(self, quote: StockQuote, updated_at: Optional[float] = None, symbol: Optional[str] = None) -> None:
+        """Store a quote (overwrites the symbol's previous values); symbol defaults to quote.symbol"""
+        slot = self._slot(symbol or quote.symbol)
+        c = self.columns
+        for name in ("price", "change", "open", "high", "low", "previous_close"):
+            value = getattr(quote, name)
+            c[name][slot] = math.nan if value is None else value
+        c["change_pct"][slot] = _percent(quote.change_percent)
+        c["volume"][slot] = -1 if quote.volume is None else quote.volume
+        c["day"][slot] = _day(quote.latest_trading_day)
+        c["updated_at"][slot] = time.time() if updated_at is None else updated_at
+        self._writes += 1
+        c["version"][slot] = self._writes
+
+    def update_many(self, quotes: Iterable[StockQuote]) -> None:
+        now = time.time()
+        for quote in quotes:
+            self.update(quote, now)
+
+    def clear(self) -> None:
+        """Forget every symbol, keeping the allocated columns"""
+        for name, column in self.columns.items():
+            column.fill(self._fill(name))
+        self.slots.clear()
+        self.symbols.clear()
+
+    def row_bytes(self) -> int:
+        """Bytes of column storage per symbol"""
+        return sum(column.itemsize for column in self.columns.values())
+
+    def get(self, symbol: str) -> Optional[StockQuote]:
+        slot = self.slots.get(symbol)
+        return None if slot is None else self._build(slot)
+
+    def version(self, symbol: str) -> int:
+        """Changes whenever the symbol's row is written; -1 when the symbol is unknown"""
+        slot = self.slots.get(symbol)
+        return -1 if slot is None else int(self.columns["version"][slot])
+
+    def price(self, symbol: str, max_age: Optional[float] = None) -> Optional[Tuple[float, int]]:
+        """(price, trading day as days since epoch) without building a StockQuote
+
+        None when the symbol is unknown, has no price or trading day, or was
+        updated more than max_age seconds ago.
+        """
+        slot = self.slots.get(symbol)
+        if slot is None:
+            return None
+        c = self.columns
+        if max_age is not None and c["updated_at"][slot] < time.time() - max_age:
+            return None
+        price, day = float(c["price"][slot]), int(c["day"][slot])
+        if math.isnan(price) or day < 0:
+            return None
+        return price, day
+
+    def age(self, symbol: str) -> Optional[float]:
+        slot = self.slots.get(symbol)
+        return None if slot is None else time.time() - float(self.columns["updated_at"][slot])
+
+    def _build(self, slot: int) -> StockQuote:
+        c = self.columns
+
+        def number(name: str) -> Optional[float]:
+            value = float(c[name][slot])
+            return None if math.isnan(value) else value
+
+        change_pct = number("change_pct")
+        day = int(c["day"][slot])
+        volume = int(c["volume"][slot])
+        return StockQuote(
+            symbol=self.symbols[slot],
+            price=number("price"),
+            change=number("change"),
+            change_percent=f"{change_pct:.4f}%" if change_pct is not None else None,
+            volume=volume if volume >= 0 else None,
+            latest_trading_day=str(np.datetime64(day, "D")) if day >= 0 else None,
+            previous_close=number("previous_close"),
+            open=number("open"),
+            high=number("high"),
+            low=number("low"),
+        )
+
+    def valid_slots(self, max_age: Optional[float] = None) -> np.ndarray:
+        """Slots with a price, optionally only those updated within max_age seconds"""
+        n = len(self.symbols)
+        mask = ~np.isnan(self.columns["price"][:n])
+        if max_age is not None:
+            mask &= self.columns["updated_at"][:n] >= time.time() - max_age
+        return np.flatnonzero(mask)
+
+    def movers(self, n: int = 10, field: str = "change_pct", max_age: Optional[float] = None) -> Tuple[List[StockQuote], List[StockQuote]]:
+        """Top n gainers and losers by field, selected with argpartition (O(symbols))"""
+        slots = self.valid_slots(max_age)
+        values = self.columns[field][slots]
+        keep = ~np.isnan(values)
+        slots, values = slots[keep], values[keep]
+        if not len(slots):
+            return [], []
+        k = min(n, len(slots))
+        top = np.argpartition(-values, k - 1)[:k]
+        bottom = np.argpartition(values, k - 1)[:k]
+        gainers = slots[top[np.argsort(-values[top], kind="stable")]]
+        losers = slots[bottom[np.argsort(values[bottom], kind="stable")]]
+        return [self._build(int(s)) for s in gainers], [self._build(int(s)) for s in losers]
+
+    def memory_bytes(self) -> int:
+        """Approximate memory used by columns, slot index and symbol list"""
+        columns = sum(column.nbytes for column in self.columns.values())
+        index = sys.getsizeof(self.slots) + sys.getsizeof(self.symbols) + sum(sys.getsizeof(s) for s in self.slots)
+        return columns + index
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "symbols": len(self.slots),
+            "capacity": len(self.columns["price"]),
+            "memory_bytes": self.memory_bytes(),
+        }
@@ -0,0 +1,340 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when an upstream call cannot get a rate-limit token in time"""
+
+    def __init__(self, message: str = "Upstream rate limit exceeded", retry_after: float = 60.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UpstreamThrottled(RateLimitExceeded):
+    """Raised when Alpha Vantage answers with a "Note"/"Information" throttle payload"""
+
+
+class Priority(IntEnum):
+    """Upstream call priorities; lower values are dispatched first"""
+    QUOTE = 0
+    OVERVIEW = 1
+    SEARCH = 2
+    BACKGROUND = 3
+
+
+# Lets background work (cache refreshes, prefetch) lower the priority of the calls it makes
+upstream_priority: ContextVar[Optional[Priority]] = ContextVar("upstream_priority", default=None)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per `period` seconds"""
+
+    def __init__(self, rate: float, period: float = 60.0, capacity: Optional[float] = None):
+        if rate <= 0 or period <= 0:
+            raise ValueError(f"Token bucket rate and period must be positive, got {rate} per {period}s")
+        self.rate = rate
+        self.period = period
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate / self.period)
+            self._updated = now
+
+    def available(self) -> float:
+        """Tokens currently available"""
+        self._refill()
+        return self._tokens
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` tokens will be available"""
+        self._refill()
+        missing = tokens - self._tokens
+        if missing <= 0:
+            return 0.0
+        return missing * self.period / self.rate
+
+    def drain(self) -> None:
+        """Empty the bucket; it refills from zero at the normal rate"""
+        self._refill()
+        self._tokens = 0.0
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if they are available right now"""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "period_seconds": self.period,
+            "capacity": self.capacity,
+            "available": round(self.available(), 3),
+        }
+
+
+class DailyBudget:
+    """Request counter that resets at midnight UTC, like the Alpha Vantage daily quota"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._day = self._today()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def remaining(self) -> int:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self.used = 0
+        return max(0, self.limit - self.used)
+
+    def consume(self) -> None:
+        self.remaining()
+        self.used += 1
+
+    def seconds_until_reset(self) -> float:
+        now = datetime.now(timezone.utc)
+        return 86400 - (now.hour * 3600 + now.minute * 60 + now.second)
+
+
+class _QueuedCall:
+    __slots__ = ("priority", "seq", "fn", "future", "dispatched", "cancelled")
+
+    def __init__(self, priority: Priority, seq: int, fn: Callable[[], Awaitable[Any]], future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.fn = fn
+        self.future = future
+        self.dispatched = False
+        self.cancelled = False
+
+    def __lt__(self, other: "_QueuedCall") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class UpstreamScheduler:
+    """Central priority queue that every upstream call passes through
+
+    Enforces per-minute and per-day budgets, dispatches higher priorities
+    first, sheds low-priority work when the budget is tight and backs off
+    when the upstream reports throttling.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        per_day: int,
+        background_reserve: float = 0.2,
+        search_reserve: float = 0.05,
+        min_backoff: float = 15.0,
+        max_backoff: float = 300.0,
+    ):
+        self.minute_bucket = TokenBucket(per_minute, period=60.0)
+        self.daily_budget = DailyBudget(per_day)
+        # Share of the daily budget kept back from background / search work
+        self.background_reserve = background_reserve
+        self.search_reserve = search_reserve
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self._queue: List[_QueuedCall] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: set = set()
+        self._backoff = 0.0
+        self._backoff_until = 0.0
+        self.stats = {
+            "dispatched": 0,
+            "shed": 0,
+            "timed_out": 0,
+            "throttled": 0,
+        }
+
+    def start(self) -> None:
+        """Start the dispatcher on the running event loop"""
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self) -> None:
+        """Stop dispatching and fail anything still queued"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        self._fail_queued(RateLimitExceeded("Upstream scheduler stopped"))
+
+    async def submit(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.QUOTE,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Queue an upstream call and return its result
+
+        timeout bounds only the time spent waiting in the queue; raises
+        RateLimitExceeded if the call is shed or not dispatched in time.
+        """
+        self._check_shed(priority)
+        self.start()
+
+        item = _QueuedCall(priority, next(self._seq), fn, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, item)
+        self._wakeup.set()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(item.future), timeout)
+        except asyncio.TimeoutError:
+            if item.dispatched:
+                return await item.future
+            item.cancelled = True
+            self.stats["timed_out"] += 1
+            raise RateLimitExceeded(
+                "Upstream quota not available in time", retry_after=self._retry_after()
+            )
+        except asyncio.CancelledError:
+            item.cancelled = True
+            raise
+
+    def _check_shed(self, priority: Priority) -> None:
+        remaining = self.daily_budget.remaining()
+        limit = self.daily_budget.limit
+        shed = remaining <= 0
+        if priority >= Priority.BACKGROUND:
+            # Background work only runs on spare capacity
+            shed = shed or (
+                remaining <= limit * self.background_reserve
+                or self.minute_bucket.available() < 1
+                or self._in_backoff()
+                or any(not item.cancelled for item in self._queue)
+            )
+        elif priority >= Priority.SEARCH:
+            shed = shed or remaining <= limit * self.search_reserve
+        if shed:
+            self.stats["shed"] += 1
+            raise RateLimitExceeded("Upstream budget reserved for higher-priority requests",
+                                    retry_after=self._retry_after())
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            while not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            # Drop callers that gave up while queued
+            while self._queue and self._queue[0].cancelled:
+                heapq.heappop(self._queue)
+            if not self._queue:
+                continue
+
+            if self.daily_budget.remaining() <= 0:
+                self._fail_queued(RateLimitExceeded(
+                    "Daily upstream budget exhausted", retry_after=self.daily_budget.seconds_until_reset()
+                ))
+                continue
+
+            wait = max(self._backoff_until - time.monotonic(), self.minute_bucket.time_until_available())
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            item = heapq.heappop(self._queue)
+            if item.cancelled:
+                continue
+            self.minute_bucket.try_acquire()
+            self.daily_budget.consume()
+            item.dispatched = True
+            self.stats["dispatched"] += 1
+            task = asyncio.create_task(self._run(item))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, item: _QueuedCall) -> None:
+        try:
+            result = await item.fn()
+        except UpstreamThrottled as e:
+            self.report_throttled()
+            e.retry_after = self._retry_after()
+            self._resolve(item, exception=e)
+        except BaseException as e:
+            self._resolve(item, exception=e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        else:
+            self.report_success()
+            self._resolve(item, result=result)
+
+    @staticmethod
+    def _resolve(item: _QueuedCall, result: Any = None, exception: Optional[BaseException] = None) -> None:
+        if item.future.done():
+            return
+        if exception is not None:
+            item.future.set_exception(exception)
+            # Mark retrieved in case the caller already gave up
+            item.future.exception()
+        else:
+            item.future.set_result(result)
+
+    def report_throttled(self) -> None:
+        """Upstream said we are over quota: pause dispatch with exponential backoff"""
+        self.stats["throttled"] += 1
+        self._backoff = min(self.max_backoff, max(self.min_backoff, self._backoff * 2))
+        self._backoff_until = time.monotonic() + self._backoff
+        # Whatever we believed about the minute budget was wrong; start from empty
+        self.minute_bucket.drain()
+        logger.warning(f"Alpha Vantage throttled us; backing off for {self._backoff:.0f}s")
+
+    def report_success(self) -> None:
+        """Successful call: decay the backoff"""
+        self._backoff = self._backoff / 2 if self._backoff >= self.min_backoff else 0.0
+
+    def _in_backoff(self) -> bool:
+        return time.monotonic() < self._backoff_until
+
+    def _retry_after(self) -> float:
+        return max(1.0, self._backoff_until - time.monotonic(), self.minute_bucket.time_until_available())
+
+    def _fail_queued(self, exception: RateLimitExceeded) -> None:
+        while self._queue:
+            item = heapq.heappop(self._queue)
+            if not item.cancelled:
+                self._resolve(item, exception=exception)
+
+    def get_stats(self) -> Dict[str, Any]:
+        queued: Dict[str, int] = {}
+        for item in self._queue:
+            if not item.cancelled:
+                queued[item.priority.name.lower()] = queued.get(item.priority.name.lower(), 0) + 1
+        return {
+            **self.stats,
+            "queued": queued,
+            "running": len(self._running),
+            "minute_bucket": self.minute_bucket.get_stats(),
+            "daily_limit": self.daily_budget.limit,
+            "daily_remaining": self.daily_budget.remaining(),
+            "backoff_seconds": round(max(0.0, self._backoff_until - time.monotonic()), 1),
+        }
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import StockOverview, StockQuote, StockSearchResponse
+
+logger = logging.getLogger(__name__)
+
+# Field order is part of the wire format: values are stored positionally, without keys
+_QUOTE_FIELDS = tuple(StockQuote.model_fields)
+_OVERVIEW_FIELDS = tuple(StockOverview.model_fields)
+
+
+def encode_value(data: Any, stored_at: float) -> bytes:
+    """Serialize a cached value compactly as tag byte + JSON [stored_at, payload]"""
+    if isinstance(data, StockQuote):
+        tag, payload = b"Q", [getattr(data, f) for f in _QUOTE_FIELDS]
+    elif isinstance(data, StockOverview):
+        tag, payload = b"O", [getattr(data, f) for f in _OVERVIEW_FIELDS]
+    elif isinstance(data, StockSearchResponse):
+        tag, payload = b"S", data.model_dump(exclude_none=True)
+    else:
+        tag, payload = b"J", data
+    return tag + json.dumps([round(stored_at, 3), payload], separators=(",", ":")).encode()
+
+
+def decode_value(raw: bytes) -> Tuple[Any, float]:
+    """Inverse of encode_value; returns (data, stored_at)"""
+    tag, body = raw[:1], raw[1:]
+    stored_at, payload = json.loads(body)
+    if tag == b"Q":
+        return StockQuote(**dict(zip(_QUOTE_FIELDS, payload))), stored_at
+    if tag == b"O":
+        return StockOverview(**dict(zip(_OVERVIEW_FIELDS, payload))), stored_at
+    if tag == b"S":
+        return StockSearchResponse(**payload), stored_at
+    return payload, stored_at
+
+
+class InMemoryRedis:
+    """Tiny in-process stand-in for the redis.asyncio client (REDIS_URL=memory://)
+
+    Implements just the commands the cache tier uses, so the two-tier cache
+    can run locally without a Redis server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def ping(self) -> bool:
+        return True
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._live(key)
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self._live(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ex: Optional[float] = None) -> bool:
+        self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    async def flushdb(self) -> bool:
+        self._data.clear()
+        return True
+
+    def pipeline(self, transaction: bool = False) -> "_InMemoryPipeline":
+        return _InMemoryPipeline(self)
+
+    async def aclose(self) -> None:
+        self._data.clear()
+
+
+class _InMemoryPipeline:
+    """Buffers commands and runs them on execute(), like a redis pipeline"""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def get(self, key: str) -> "_InMemoryPipeline":
+        self._commands.append(("get", (key,), {}))
+        return self
+
+    def set(self, key: str, value: bytes, ex: Optional[float] = None) -> "_InMemoryPipeline":
+        self._commands.append(("set", (key, value), {"ex": ex}))
+        return self
+
+    async def execute(self) -> List[Any]:
+        results = []
+        for name, args, kwargs in self._commands:
+            results.append(await getattr(self._client, name)(*args, **kwargs))
+        self._commands.clear()
+        return results
+
+    async def __aenter__(self) -> "_InMemoryPipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._commands.clear()
+
+
+class RedisCache:
+    """Shared L2 cache tier in Redis, used behind the per-worker CacheService"""
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "stockgpt:"):
+        self.url = url if url is not None else os.getenv("REDIS_URL", "")
+        self.prefix = prefix
+        self.client: Any = None
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    async def connect(self) -> None:
+        """Connect to Redis (or the in-memory stand-in); disabled when REDIS_URL is unset"""
+        if not self.url or self.client is not None:
+            return
+        if self.url.startswith("memory://"):
+            self.client = InMemoryRedis()
+            return
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            logger.warning("REDIS_URL is set but the 'redis' package is not installed; L2 cache disabled")
+            return
+        try:
+            client = redis.from_url(self.url)
+            await client.ping()
+            self.client = client
+        except Exception as e:
+            logger.error(f"Could not connect to Redis at {self.url}: {e}; L2 cache disabled")
+
+    async def ping(self, timeout: float = 1.0) -> bool:
+        """True when the L2 server answers within timeout"""
+        if self.client is None:
+            return False
+        try:
+            return bool(await asyncio.wait_for(self.client.ping(), timeout))
+        except Exception as e:
+            logger.error(f"Redis ping failed: {e}")
+            return False
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get (data, age_seconds) for a key"""
+        if self.client is None:
+            return None
+        try:
+            raw = await self.client.get(self.prefix + key)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Redis get failed for {key}: {e}")
+            return None
+        return self._decode(key, raw)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Tuple[Any, float]]:
+        """Pipelined multi-get; returns only the keys that were found"""
+        if self.client is None or not keys:
+            return {}
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.get(self.prefix + key)
+                raw_values = await pipe.execute()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Redis multi-get failed: {e}")
+            return {}
+
+        found = {}
+        for key, raw in zip(keys, raw_values):
+            hit = self._decode(key, raw)
+            if hit is not None:
+                found[key] = hit
+        return found
+
+    async def set(self, key: str, data: Any, ttl: float) -> None:
+        """Store a value with a Redis-side expiry of ttl seconds"""
+        if self.client is None:
+            return
+        try:
+            await self.client.set(self.prefix + key, encode_value(data, time.time()), ex=max(1, int(ttl)))
+            self.stats["sets"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Redis set failed for {key}: {e}")
+
+    def _decode(self, key: str, raw: Optional[bytes]) -> Optional[Tuple[Any, float]]:
+        if raw is None:
+            self.stats["misses"] += 1
+            return None
+        try:
+            data, stored_at = decode_value(raw)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Could not decode cached value for {key}: {e}")
+            return None
+        self.stats["hits"] += 1
+        return data, max(0.0, time.time() - stored_at)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """L2 counters"""
+        return {"enabled": self.enabled, **self.stats}
@@ -0,0 +1,66 @@
+import time
+from typing import Any, Dict, Optional
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a cool-down period
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail fast. Once reset_timeout has passed a single trial call is let
+    through (half-open); its success closes the circuit, its failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.stats = {
+            "opened": 0,
+            "rejected": 0,
+        }
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through now"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_in_flight:
+                self.stats["opened"] += 1
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Give back a half-open trial slot whose call never completed"""
+        self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "state": self.state, "consecutive_failures": self.failures}
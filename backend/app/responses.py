@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from .cache import CacheService
+
+# brotli is optional; without it clients that accept br get gzip instead
+brotli = None
+if importlib.util.find_spec("brotli") is not None:
+    import brotli
+
+# Bodies smaller than this are sent uncompressed; the headers would eat the savings
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+
+class EncodedBody:
+    """A response body encoded once: JSON bytes, ETag and compressed variants"""
+
+    __slots__ = ("identity", "etag", "gzip", "br", "size", "tag")
+
+    def __init__(self, data: Any, tag: Optional[str] = None):
+        if isinstance(data, BaseModel):
+            body = data.model_dump_json().encode()
+        else:
+            body = json.dumps(jsonable_encoder(data), separators=(",", ":")).encode()
+        self.identity = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        self.gzip = self.br = None
+        if len(body) >= COMPRESS_MIN_BYTES:
+            self.gzip = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                self.br = brotli.compress(body, quality=5)
+        self.size = len(body) + len(self.gzip or b"") + len(self.br or b"")
+        # What the body was derived from, for variants that change while the entry lives
+        self.tag = tag
+
+    def negotiate(self, accept_encoding: str):
+        """(body, content_encoding) for a request's Accept-Encoding header"""
+        accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+        if self.br is not None and "br" in accepted:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.identity, None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as for GET conditional requests
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def cached_json_response(
+    request: Request,
+    data: Any,
+    age: float,
+    cache: Optional[CacheService] = None,
+    key: Optional[str] = None,
+    source: Any = None,
+    variant: str = "",
+    tag: Optional[str] = None,
+) -> Response:
+    """JSON response for a cached value, reusing bytes encoded on an earlier hit
+
+    The encoded body is kept on the cache entry for key while that entry still
+    holds `source` (default: data itself; for store-backed entries, while the
+    row is unchanged); variant distinguishes bodies derived
+    from the same entry, and a variant body is re-encoded (replacing the old
+    one) when its tag changes. Honors If-None-Match with 304 and negotiates gzip/br.
+    """
+    encoded = None
+    entry = cache.peek(key) if cache is not None and key is not None else None
+    if entry is not None and not entry.holds(data if source is None else source):
+        entry = None
+    if entry is not None and entry.encoded is not None:
+        encoded = entry.encoded.get(variant)
+        if encoded is not None and encoded.tag != tag:
+            encoded = None
+    if encoded is None:
+        encoded = EncodedBody(data, tag)
+        if entry is not None:
+            cache.attach(key, entry, variant, encoded, encoded.size)
+
+    headers = {"ETag": encoded.etag, "Age": str(int(age)), "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, encoded.etag):
+        return Response(status_code=304, headers=headers)
+
+    body, content_encoding = encoded.negotiate(request.headers.get("accept-encoding", ""))
+    if content_encoding is not None:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,380 @@
+import asyncio
+import json
+import logging
+import math
+import os
+from collections import deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+
+class RollingWindow:
+    """Fixed-size window with O(1) running sum, mean and Welford variance"""
+
+    __slots__ = ("size", "values", "mean", "m2")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: deque = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, x: float) -> None:
+        if len(self.values) == self.size:
+            self._remove(self.values.popleft())
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (x - self.mean)
+
+    def _remove(self, y: float) -> None:
+        # Called after y has left the deque
+        n = len(self.values)
+        if n == 0:
+            self.mean = self.m2 = 0.0
+            return
+        delta = y - self.mean
+        self.mean -= delta / n
+        self.m2 -= delta * (y - self.mean)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def variance(self, ddof: int = 1) -> Optional[float]:
+        n = len(self.values)
+        if n <= ddof:
+            return None
+        return max(self.m2, 0.0) / (n - ddof)
+
+    def mean_with(self, x: float) -> Optional[float]:
+        """Mean if x were pushed next, without changing the window"""
+        if not self.values:
+            return x
+        if self.full:
+            return self.mean + (x - self.values[0]) / self.size
+        return (self.mean * len(self.values) + x) / (len(self.values) + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"size": self.size, "values": list(self.values), "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RollingWindow":
+        window = cls(data["size"])
+        window.values = deque(data["values"])
+        window.mean = data["mean"]
+        window.m2 = data["m2"]
+        return window
+
+
+class MonotonicExtreme:
+    """Rolling max (or min) over the last `size` observations with a monotonic deque"""
+
+    __slots__ = ("size", "maximum", "items", "count")
+
+    def __init__(self, size: int, maximum: bool = True):
+        self.size = size
+        self.maximum = maximum
+        self.items: deque = deque()  # (sequence number, value), monotonic in value
+        self.count = 0
+
+    def push(self, x: float) -> None:
+        items = self.items
+        if self.maximum:
+            while items and items[-1][1] <= x:
+                items.pop()
+        else:
+            while items and items[-1][1] >= x:
+                items.pop()
+        items.append((self.count, x))
+        self.count += 1
+        while items[0][0] <= self.count - 1 - self.size:
+            items.popleft()
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.items[0][1] if self.items else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"size": self.size, "maximum": self.maximum, "count": self.count, "items": list(self.items)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MonotonicExtreme":
+        extreme = cls(data["size"], data["maximum"])
+        extreme.count = data["count"]
+        extreme.items = deque(tuple(item) for item in data["items"])
+        return extreme
+
+
+class EMAState:
+    """Exponential moving average seeded with the first observation"""
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, span: int, value: Optional[float] = None):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = value
+
+    def push(self, x: float) -> float:
+        self.value = x if self.value is None else self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+
+class SymbolRollingState:
+    """O(1)-per-bar indicator state for one symbol"""
+
+    def __init__(self):
+        self.last_day: Optional[int] = None
+        self.last_close: Optional[float] = None
+        self.bars = 0
+        self.sma_50 = RollingWindow(50)
+        self.sma_200 = RollingWindow(200)
+        self.returns_20 = RollingWindow(20)
+        self.high_52w = MonotonicExtreme(TRADING_DAYS, maximum=True)
+        self.low_52w = MonotonicExtreme(TRADING_DAYS, maximum=False)
+        self.ema_12 = EMAState(12)
+        self.ema_26 = EMAState(26)
+        self.macd_signal = EMAState(9)
+
+    def update(self, day: int, high: float, low: float, close: float) -> None:
+        """Fold in one new daily bar"""
+        if self.last_close is not None and self.last_close > 0 and close > 0:
+            self.returns_20.push(math.log(close / self.last_close))
+        self.sma_50.push(close)
+        self.sma_200.push(close)
+        self.high_52w.push(high)
+        self.low_52w.push(low)
+        macd = self.ema_12.push(close) - self.ema_26.push(close)
+        self.macd_signal.push(macd)
+        self.last_day = day
+        self.last_close = close
+        self.bars += 1
+
+    def snapshot(self, price: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """Current indicator values; with price, SMAs are provisional for an intraday quote"""
+        def mean(window: RollingWindow) -> Optional[float]:
+            if price is not None:
+                return window.mean_with(price) if len(window.values) >= window.size - 1 else None
+            return window.mean if window.full else None
+
+        variance = self.returns_20.variance()
+        macd = None
+        if self.ema_12.value is not None and self.ema_26.value is not None:
+            macd = self.ema_12.value - self.ema_26.value
+        high, low = self.high_52w.value, self.low_52w.value
+        if price is not None and high is not None:
+            high, low = max(high, price), min(low, price)
+        return {
+            "sma_50": mean(self.sma_50),
+            "sma_200": mean(self.sma_200),
+            "week_52_high": high,
+            "week_52_low": low,
+            "volatility_20": math.sqrt(variance * TRADING_DAYS) if variance is not None and self.returns_20.full else None,
+            "macd": macd,
+            "macd_signal": self.macd_signal.value,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "last_day": self.last_day,
+            "last_close": self.last_close,
+            "bars": self.bars,
+            "sma_50": self.sma_50.to_dict(),
+            "sma_200": self.sma_200.to_dict(),
+            "returns_20": self.returns_20.to_dict(),
+            "high_52w": self.high_52w.to_dict(),
+            "low_52w": self.low_52w.to_dict(),
+            "ema": [self.ema_12.value, self.ema_26.value, self.macd_signal.value],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SymbolRollingState":
+        state = cls()
+        state.last_day = data["last_day"]
+        state.last_close = data["last_close"]
+        state.bars = data["bars"]
+        state.sma_50 = RollingWindow.from_dict(data["sma_50"])
+        state.sma_200 = RollingWindow.from_dict(data["sma_200"])
+        state.returns_20 = RollingWindow.from_dict(data["returns_20"])
+        state.high_52w = MonotonicExtreme.from_dict(data["high_52w"])
+        state.low_52w = MonotonicExtreme.from_dict(data["low_52w"])
+        state.ema_12.value, state.ema_26.value, state.macd_signal.value = data["ema"]
+        return state
+
+
+class RollingStatsStore:
+    """Rolling indicator state for every symbol, persisted across restarts"""
+
+    def __init__(self, path: str = os.getenv("ROLLING_STATE_PATH", "data/rolling_state.json")):
+        self.path = path
+        self.states: Dict[str, SymbolRollingState] = {}
+        self.dirty = False
+        self._autosave: Optional[asyncio.Task] = None
+        self._catch_up: Optional[asyncio.Task] = None
+        self.stats = {
+            "bars_applied": 0,
+        }
+
+    def get(self, symbol: str) -> Optional[SymbolRollingState]:
+        return self.states.get(symbol)
+
+    def catch_up(self, symbol: str, columns: Dict[str, np.ndarray]) -> int:
+        """Apply bars newer than the state's last day; cost is O(new bars)"""
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = SymbolRollingState()
+        dates = columns["date"]
+        start = 0 if state.last_day is None else int(np.searchsorted(dates, state.last_day, side="right"))
+        if start >= len(dates):
+            return 0
+        for day, high, low, close in zip(
+            dates[start:].tolist(), columns["high"][start:].tolist(),
+            columns["low"][start:].tolist(), columns["close"][start:].tolist()
+        ):
+            state.update(day, high, low, close)
+        applied = len(dates) - start
+        self.stats["bars_applied"] += applied
+        self.dirty = True
+        return applied
+
+    async def catch_up_all(self, store) -> int:
+        """Bring every symbol in a HistoryStore up to date (startup, or after losing the state file)
+
+        Files are read in a worker thread; state is only updated on the event loop, one
+        symbol per turn, so request handlers and saves never see it half-applied.
+        """
+        if not os.path.isdir(store.root):
+            return 0
+        applied = 0
+        for symbol in await asyncio.to_thread(os.listdir, store.root):
+            try:
+                columns = await asyncio.to_thread(store.columns, symbol)
+            except ValueError:
+                continue
+            if columns is not None:
+                applied += self.catch_up(symbol, columns)
+        return applied
+
+    def start_catch_up(self, store) -> None:
+        """Replay history in the background so startup does not wait for it"""
+        if self._catch_up is None or self._catch_up.done():
+            self._catch_up = asyncio.create_task(self._run_catch_up(store))
+
+    async def _run_catch_up(self, store) -> None:
+        try:
+            applied = await self.catch_up_all(store)
+        except Exception as e:
+            logger.error(f"Could not catch up rolling state: {e}")
+            return
+        if applied:
+            logger.info(f"Caught up rolling state with {applied} bars")
+
+    def overview_fields(self, symbol: str, price: Optional[float] = None, day: Optional[int] = None) -> Dict[str, str]:
+        """StockOverview fields that can be served from rolling state
+
+        price is a live quote for trading day `day`; it is folded in provisionally
+        (see SymbolRollingState.snapshot) only when that day has no bar yet.
+        """
+        state = self.states.get(symbol)
+        if state is None:
+            return {}
+        intraday = price is not None and day is not None and (state.last_day is None or day > state.last_day)
+        values = state.snapshot(price if intraday else None)
+        fields = {
+            "moving_avg_50": values["sma_50"],
+            "moving_avg_200": values["sma_200"],
+            "week_52_high": values["week_52_high"] if state.bars >= TRADING_DAYS else None,
+            "week_52_low": values["week_52_low"] if state.bars >= TRADING_DAYS else None,
+        }
+        # StockOverview carries these as strings, like Alpha Vantage does
+        return {name: f"{value:.4f}" for name, value in fields.items() if value is not None}
+
+    def snapshot(self) -> Optional[bytes]:
+        """Serialized state if anything changed since the last save, else None
+
+        Called on the event loop, where catch_up runs, so the state is consistent.
+        Clears the dirty flag; updates made while the bytes are written mark it again.
+        """
+        if not self.dirty:
+            return None
+        data = json.dumps({symbol: state.to_dict() for symbol, state in self.states.items()}, separators=(",", ":"))
+        self.dirty = False
+        return data.encode("utf-8")
+
+    def _write(self, data: bytes) -> None:
+        """Write serialized state atomically (temp file + rename)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    async def save(self) -> None:
+        """Snapshot on the loop, write the bytes in a worker thread"""
+        data = self.snapshot()
+        if data is None:
+            return
+        try:
+            await asyncio.to_thread(self._write, data)
+        except Exception:
+            # Not on disk: try again next time
+            self.dirty = True
+            raise
+
+    def read(self) -> Optional[Dict[str, SymbolRollingState]]:
+        """Parse the saved state without installing it (safe to run in a worker thread)"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                raw = json.load(f)
+            return {symbol: SymbolRollingState.from_dict(data) for symbol, data in raw.items()}
+        except Exception as e:
+            logger.error(f"Could not restore rolling state from {self.path}: {e}")
+            return None
+
+    def load(self) -> None:
+        """Restore state saved by a previous run"""
+        states = self.read()
+        if states is not None:
+            self.states = states
+            logger.info(f"Restored rolling indicator state for {len(self.states)} symbols")
+
+    def start_autosave(self, interval: float = float(os.getenv("ROLLING_SAVE_INTERVAL", "300"))) -> None:
+        """Periodically persist state in the background"""
+        if self._autosave is None or self._autosave.done():
+            self._autosave = asyncio.create_task(self._autosave_loop(interval))
+
+    async def stop(self) -> None:
+        """Stop the catch-up and autosave tasks and write a final copy"""
+        for task in (self._catch_up, self._autosave):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._catch_up = self._autosave = None
+        try:
+            await self.save()
+        except Exception as e:
+            logger.error(f"Could not save rolling state: {e}")
+
+    async def _autosave_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Could not save rolling state: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "symbols": len(self.states)}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, Optional
 
 class StockRequest(BaseModel):
     symbol: str
@@ -11,4 +11,6 @@ class HealthResponse(BaseModel):
     status: str
     service: str
     timestamp: str
-    version: str = "1.0.0"
\ No newline at end of file
+    version: str = "1.0.0"
+    uptime_seconds: Optional[float] = None
+    checks: Dict[str, Any] = {}
\ No newline at end of file
@@ -0,0 +1,217 @@
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .models import StockOverview
+from .quote_store import QuoteStore
+
+# StockOverview string fields parsed once into float columns
+OVERVIEW_NUMERIC = (
+    "market_cap", "pe_ratio", "peg_ratio", "dividend_yield", "eps", "beta",
+    "week_52_high", "week_52_low", "moving_avg_50", "moving_avg_200",
+)
+OVERVIEW_CATEGORIES = ("sector", "industry", "exchange")
+# Quote columns available to screens, joined by symbol
+QUOTE_NUMERIC = ("price", "change", "change_pct", "volume")
+
+SCREEN_FIELDS = OVERVIEW_NUMERIC + QUOTE_NUMERIC
+
+
+def _number(value: Optional[str]) -> float:
+    if value in (None, "", "None", "-"):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class OverviewStore:
+    """Screenable company fundamentals as typed columns
+
+    Numeric strings from OVERVIEW are parsed once on update; sector, industry
+    and exchange are stored as integer category codes so equality filters are
+    a single vectorized comparison.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.slots: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.names: List[str] = []
+        self.columns: Dict[str, np.ndarray] = {name: np.full(capacity, np.nan) for name in OVERVIEW_NUMERIC}
+        for name in OVERVIEW_CATEGORIES:
+            self.columns[name] = np.full(capacity, -1, dtype=np.int32)
+        # Category label <-> code per categorical column (labels compared case-insensitively)
+        self.codes: Dict[str, Dict[str, int]] = {name: {} for name in OVERVIEW_CATEGORIES}
+        self.labels: Dict[str, List[str]] = {name: [] for name in OVERVIEW_CATEGORIES}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _code(self, category: str, label: Optional[str]) -> int:
+        if not label or label == "None":
+            return -1
+        codes = self.codes[category]
+        code = codes.get(label.lower())
+        if code is None:
+            code = codes[label.lower()] = len(self.labels[category])
+            self.labels[category].append(label)
+        return code
+
+    def clear(self) -> None:
+        """Forget every company, keeping the allocated columns"""
+        for column in self.columns.values():
+            column.fill(-1 if column.dtype.kind == "i" else np.nan)
+        self.slots.clear()
+        self.symbols.clear()
+        self.names.clear()
+        for name in OVERVIEW_CATEGORIES:
+            self.codes[name].clear()
+            self.labels[name].clear()
+
+    def code_for(self, category: str, label: str) -> Optional[int]:
+        return self.codes[category].get(label.lower())
+
+    def update(self, overview: StockOverview) -> None:
+        slot = self.slots.get(overview.symbol)
+        if slot is None:
+            slot = len(self.symbols)
+            if slot == len(self.columns["market_cap"]):
+                for name, column in self.columns.items():
+                    self.columns[name] = np.concatenate([column, np.full_like(column, -1 if column.dtype.kind == "i" else np.nan)])
+            self.slots[overview.symbol] = slot
+            self.symbols.append(overview.symbol)
+            self.names.append(overview.name)
+        else:
+            self.names[slot] = overview.name
+        for name in OVERVIEW_NUMERIC:
+            self.columns[name][slot] = _number(getattr(overview, name))
+        for name in OVERVIEW_CATEGORIES:
+            self.columns[name][slot] = self._code(name, getattr(overview, name))
+
+
+class Screener:
+    """Filters and sorts over the quote and overview stores"""
+
+    def __init__(self, quotes: QuoteStore, overviews: OverviewStore):
+        self.quotes = quotes
+        self.overviews = overviews
+
+    def _universe(self, needs_overview: bool, needs_quote: bool, max_age: Optional[float]) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """Symbols and aligned columns for a screen
+
+        With overview filters the universe is the overview store (quote columns
+        joined by symbol, NaN when there is no quote); otherwise it is every
+        symbol with a quote.
+        """
+        quotes, overviews = self.quotes, self.overviews
+        if needs_overview or not needs_quote and len(overviews):
+            n = len(overviews)
+            symbols = overviews.symbols
+            columns = {name: column[:n] for name, column in overviews.columns.items()}
+            quote_slots = np.fromiter((quotes.slots.get(s, -1) for s in symbols), np.int64, n)
+            has_quote = quote_slots >= 0
+            if max_age is not None:
+                fresh = quotes.columns["updated_at"][np.maximum(quote_slots, 0)] >= time.time() - max_age
+                has_quote &= fresh
+            for name in QUOTE_NUMERIC:
+                joined = np.full(n, np.nan)
+                joined[has_quote] = quotes.columns[name][quote_slots[has_quote]]
+                if name == "volume":
+                    joined[joined < 0] = np.nan
+                columns[name] = joined
+            return symbols, columns
+
+        slots = quotes.valid_slots(max_age)
+        symbols = [quotes.symbols[s] for s in slots]
+        columns = {name: quotes.columns[name][slots].astype(np.float64) for name in QUOTE_NUMERIC}
+        columns["volume"][columns["volume"] < 0] = np.nan
+        # Overview columns joined the other way round
+        overview_slots = np.fromiter((overviews.slots.get(s, -1) for s in symbols), np.int64, len(symbols))
+        has_overview = overview_slots >= 0
+        for name, column in overviews.columns.items():
+            joined = np.full(len(symbols), -1 if column.dtype.kind == "i" else np.nan, dtype=column.dtype)
+            joined[has_overview] = column[overview_slots[has_overview]]
+            columns[name] = joined
+        return symbols, columns
+
+    def screen(
+        self,
+        ranges: Dict[str, Tuple[Optional[float], Optional[float]]],
+        categories: Dict[str, str],
+        sort: Optional[str] = None,
+        descending: bool = True,
+        limit: int = 50,
+        max_age: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Rows matching every range and category filter, top `limit` by sort field
+
+        ranges maps a field to (min, max) (either may be None); categories maps
+        sector/industry/exchange to a label. Rows missing a filtered or sorted
+        value never match.
+        """
+        needs_overview = bool(categories) or any(field in OVERVIEW_NUMERIC for field in ranges) or sort in OVERVIEW_NUMERIC
+        needs_quote = any(field in QUOTE_NUMERIC for field in ranges) or sort in QUOTE_NUMERIC
+        symbols, columns = self._universe(needs_overview, needs_quote, max_age)
+
+        mask = np.ones(len(symbols), dtype=bool)
+        for category, label in categories.items():
+            code = self.overviews.code_for(category, label)
+            if code is None:
+                mask[:] = False
+                break
+            mask &= columns[category] == code
+        for field, (low, high) in ranges.items():
+            values = columns[field]
+            # NaN compares False, so missing values drop out here
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+
+        matched = np.flatnonzero(mask)
+        if sort is not None:
+            keys = columns[sort][matched]
+            present = ~np.isnan(keys)
+            matched, keys = matched[present], keys[present]
+            if descending:
+                keys = -keys
+        total = len(matched)
+        if sort is not None:
+            k = min(limit, len(matched))
+            if 0 < k < len(matched):
+                # Partial sort: only the top k are ordered
+                top = np.argpartition(keys, k - 1)[:k]
+                matched, keys = matched[top], keys[top]
+            rows = matched[np.argsort(keys, kind="stable")][:limit]
+        else:
+            rows = matched[:limit]
+
+        return {
+            "total_matched": total,
+            "results": [self._row(symbols, columns, int(i)) for i in rows],
+        }
+
+    def _row(self, symbols: List[str], columns: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+        symbol = symbols[i]
+        overview_slot = self.overviews.slots.get(symbol)
+        row: Dict[str, Any] = {
+            "symbol": symbol,
+            "name": self.overviews.names[overview_slot] if overview_slot is not None else None,
+        }
+        for category in OVERVIEW_CATEGORIES:
+            code = int(columns[category][i])
+            row[category] = self.overviews.labels[category][code] if code >= 0 else None
+        for field in SCREEN_FIELDS:
+            value = float(columns[field][i])
+            row[field] = None if math.isnan(value) else (int(value) if field == "volume" else value)
+        return row
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "quotes": len(self.quotes),
+            "overviews": len(self.overviews),
+            "sectors": len(self.overviews.labels["sector"]),
+        }
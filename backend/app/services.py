@@ -1,76 +1,260 @@
+import asyncio
 import httpx
 import os
+import time
 import logging
-from typing import Dict, List, Optional, Any
+import importlib.util
+import re
+from typing import Dict, List, Optional, Any, Callable, Awaitable, Tuple
 from .models import StockOverview, StockQuote, StockSearchResult, StockSearchResponse
-from .utils import format_stock_data, format_quote_data, format_search_results
+from .utils import format_stock_data, format_quote_data, format_search_matches
+from .cache import CacheService, CacheEntry
+from .redis_cache import RedisCache
+from .history import HistoryStore, HistoryService, parse_daily_series
+from .rolling import RollingStatsStore
+from .metrics import metrics
+from .quote_store import QuoteStore
+from .screener import OverviewStore, Screener
+from .snapshot import CacheSnapshot
+from .prefetch import AccessTracker, Prefetcher
+from .providers import ProviderError, ProviderNotEntitled, ProviderRouter, build_providers
+from .ratelimit import RateLimitExceeded, UpstreamThrottled, UpstreamScheduler, Priority, upstream_priority
 
 logger = logging.getLogger(__name__)
 
+# Consecutive upstream errors before /health reports the upstream as degraded
+UPSTREAM_FAILURE_THRESHOLD = int(os.getenv("UPSTREAM_FAILURE_THRESHOLD", "3"))
+
+# "Information" notices about the key's plan, as opposed to rate-limit notes (which also link the premium page)
+_ENTITLEMENT_NOTICE = re.compile(r"premium (feature|endpoint)", re.IGNORECASE)
+
 class StockService:
     """Service class for handling stock data operations"""
     
     def __init__(self):
 #        self.alpha_vantage_key = os.getenv("ALPHA_VANTAGE_KEY", "demo")
         self.alpha_vantage_key = "BQYX29228EUYW7O0"
-        self.base_url = "https://www.alphavantage.co/query"
+        # Overridable so benchmarks can point at a local stand-in (bench/fake_alpha_vantage.py)
+        self.base_url = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
         self.timeout = 30.0
-    
-    async def get_stock_overview(self, symbol: str) -> Optional[StockOverview]:
-        """Get comprehensive stock overview"""
-        try:
-            params = {
-                "function": "OVERVIEW",
-                "symbol": symbol.upper(),
-                "apikey": self.alpha_vantage_key
-            }
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.base_url, params=params)
-                response.raise_for_status()
-                data = response.json()
 
-              
+        # Connection pool settings for the shared upstream client
+        self.max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+        self.max_keepalive_connections = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+        self.keepalive_expiry = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+        self.http2 = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
 
-                if not data or "Symbol" not in data:
-                    return None
-                
-                return StockOverview(**format_stock_data(data))
-                
-        except httpx.RequestError as e:
-            logger.error(f"Request error for stock overview {symbol}: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Error getting stock overview for {symbol}: {e}")
-            return None
-    
-    async def get_stock_quote(self, symbol: str) -> Optional[StockQuote]:
-        """Get real-time stock quote"""
+        # Every upstream call is queued through the scheduler, which owns the key's quota
+        self.scheduler = UpstreamScheduler(
+            per_minute=float(os.getenv("ALPHA_VANTAGE_RPM", "5")),
+            per_day=int(os.getenv("ALPHA_VANTAGE_RPD", "25")),
+        )
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._stats = {
+            "requests": 0,
+            "tcp_connects": 0,
+            "tls_handshakes": 0,
+            "errors": 0,
+        }
+        # Upstream health as seen by the last calls
+        self.consecutive_failures = 0
+        self.last_success: Optional[float] = None
+        self.last_failure: Optional[float] = None
+
+    async def startup(self) -> None:
+        """Create the shared HTTP client (called from the app lifespan)"""
+        if self._client is not None:
+            return
+
+        http2 = self.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+
+        self._client = self._build_client(http2=http2)
+        self.scheduler.start()
+
+    async def shutdown(self) -> None:
+        """Close the shared HTTP client and its pooled connections"""
+        await self.scheduler.stop()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared client; created lazily if the lifespan hook has not run"""
+        if self._client is None:
+            # Outside of the app lifespan (scripts, REPL) fall back to a lazily built client
+            self._client = self._build_client(http2=False)
+        return self._client
+
+    def _build_client(self, http2: bool) -> httpx.AsyncClient:
+        """Build an AsyncClient with the configured pool limits"""
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        )
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """httpcore trace hook used to count new connections and TLS handshakes"""
+        if event_name == "connection.connect_tcp.complete":
+            self._stats["tcp_connects"] += 1
+        elif event_name == "connection.start_tls.complete":
+            self._stats["tls_handshakes"] += 1
+
+    async def _get(
+        self,
+        params: Dict[str, Any],
+        priority: Priority = Priority.QUOTE,
+        queue_timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Perform a GET against Alpha Vantage through the upstream scheduler"""
+        # Background callers (cache refresh, prefetch) override the per-endpoint priority
+        override = upstream_priority.get()
+        if override is not None:
+            priority = override
+        return await self.scheduler.submit(lambda: self._request(params), priority, queue_timeout)
+
+    async def _request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Single GET using the pooled client
+
+        Raises UpstreamThrottled on quota notes and ProviderNotEntitled when the
+        key's plan does not include the endpoint or parameter; the latter must
+        not trip the scheduler's backoff.
+        """
+        started = time.perf_counter()
+        outcome = "error"
         try:
-            params = {
-                "function": "GLOBAL_QUOTE",
-                "symbol": symbol.upper(),
-                "apikey": self.alpha_vantage_key
-            }
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.base_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                if "Global Quote" not in data or not data["Global Quote"]:
-                    return None
-                
-                quote_data = format_quote_data(data["Global Quote"])
-                return StockQuote(**quote_data)
-                
-        except httpx.RequestError as e:
-            logger.error(f"Request error for stock quote {symbol}: {e}")
+            response = await self._send(params)
+            data = response.json()
+            if isinstance(data, dict) and ("Note" in data or "Information" in data) and len(data) == 1:
+                message = data.get("Note") or data.get("Information")
+                if _ENTITLEMENT_NOTICE.search(message):
+                    outcome = "not_entitled"
+                    raise ProviderNotEntitled(message)
+                outcome = "throttled"
+                raise UpstreamThrottled(message)
+            outcome = "ok"
+            return data
+        finally:
+            self._record(params, outcome, started)
+
+    async def _request_text(self, params: Dict[str, Any]) -> str:
+        """Single GET returning the raw body (CSV endpoints such as LISTING_STATUS)"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._send(params)
+            outcome = "ok"
+            return response.text
+        finally:
+            self._record(params, outcome, started)
+
+    async def _send(self, params: Dict[str, Any]) -> httpx.Response:
+        self._stats["requests"] += 1
+        response = await self.client.get(
+            self.base_url,
+            params=params,
+            extensions={"trace": self._trace},
+        )
+        response.raise_for_status()
+        return response
+
+    def _record(self, params: Dict[str, Any], outcome: str, started: float) -> None:
+        """Upstream latency by function plus the failure streak used by /health"""
+        metrics.observe_upstream(params.get("function", "unknown"), outcome, time.perf_counter() - started)
+        if outcome == "error":
+            self._stats["errors"] += 1
+            self.consecutive_failures += 1
+            self.last_failure = time.time()
+        else:
+            self.consecutive_failures = 0
+            self.last_success = time.time()
+
+    def health(self) -> Dict[str, Any]:
+        """Upstream status for /health: degraded on a failure streak, backoff or an exhausted daily quota"""
+        scheduler = self.scheduler.get_stats()
+        healthy = (
+            self.consecutive_failures < UPSTREAM_FAILURE_THRESHOLD
+            and scheduler["daily_remaining"] > 0
+            and scheduler["backoff_seconds"] == 0
+        )
+        return {
+            "status": "ok" if healthy else "degraded",
+            "consecutive_failures": self.consecutive_failures,
+            "last_success_age": round(time.time() - self.last_success, 1) if self.last_success else None,
+            "last_failure_age": round(time.time() - self.last_failure, 1) if self.last_failure else None,
+            "daily_remaining": scheduler["daily_remaining"],
+            "backoff_seconds": scheduler["backoff_seconds"],
+        }
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics for the shared client"""
+        active = idle = 0
+        http2_connections = 0
+        if self._client is not None:
+            pool = getattr(self._client._transport, "_pool", None)
+            for connection in getattr(pool, "connections", []):
+                if connection.is_idle():
+                    idle += 1
+                else:
+                    active += 1
+                if "HTTP/2" in connection.info():
+                    http2_connections += 1
+
+        return {
+            "open": self._client is not None,
+            "active_connections": active,
+            "idle_connections": idle,
+            "http2_connections": http2_connections,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "keepalive_expiry": self.keepalive_expiry,
+            **self._stats,
+        }
+
+    async def fetch_overview(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockOverview]:
+        """OVERVIEW for a symbol; None when unknown, upstream errors are raised"""
+        params = {
+            "function": "OVERVIEW",
+            "symbol": symbol.upper(),
+            "apikey": self.alpha_vantage_key
+        }
+
+        data = await self._get(params, Priority.OVERVIEW, queue_timeout)
+
+        if "Error Message" in data:
+            raise ProviderError(data["Error Message"])
+        if not data or "Symbol" not in data:
             return None
-        except Exception as e:
-            logger.error(f"Error getting stock quote for {symbol}: {e}")
+
+        return StockOverview(**format_stock_data(data))
+
+    async def fetch_quote(self, symbol: str, queue_timeout: Optional[float] = None) -> Optional[StockQuote]:
+        """GLOBAL_QUOTE for a symbol; None when unknown, upstream errors are raised"""
+        params = {
+            "function": "GLOBAL_QUOTE",
+            "symbol": symbol.upper(),
+            "apikey": self.alpha_vantage_key
+        }
+
+        data = await self._get(params, Priority.QUOTE, queue_timeout)
+
+        if "Error Message" in data:
+            raise ProviderError(data["Error Message"])
+        if "Global Quote" not in data or not data["Global Quote"]:
             return None
-    
+
+        quote_data = format_quote_data(data["Global Quote"])
+        return StockQuote(**quote_data)
+
     async def search_stocks(self, keywords: str) -> StockSearchResponse:
         """Search for stocks by keywords"""
         try:
@@ -80,23 +264,18 @@ class StockService:
                 "apikey": self.alpha_vantage_key
             }
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.base_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                results = []
-                if "bestMatches" in data and data["bestMatches"]:
-                    results = [
-                        StockSearchResult(**format_search_results(match))
-                        for match in data["bestMatches"]
-                    ]
-                
-                return StockSearchResponse(
-                    search_term=keywords,
-                    results=results
-                )
+            data = await self._get(params, Priority.SEARCH)
+            
+            results = [StockSearchResult(**match) for match in format_search_matches(data)]
+            
+            return StockSearchResponse(
+                search_term=keywords,
+                results=results
+            )
                 
+        except RateLimitExceeded:
+            # Throttling is not "not found": let callers surface it and skip caching
+            raise
         except httpx.RequestError as e:
             logger.error(f"Request error for stock search '{keywords}': {e}")
             return StockSearchResponse(search_term=keywords, results=[])
@@ -104,47 +283,273 @@ class StockService:
             logger.error(f"Error searching stocks for '{keywords}': {e}")
             return StockSearchResponse(search_term=keywords, results=[])
     
-    async def get_multiple_quotes(self, symbols: List[str]) -> Dict[str, Optional[StockQuote]]:
-        """Get quotes for multiple stocks (limited by API constraints)"""
-        results = {}
-        for symbol in symbols[:5]:  # Limit to 5 symbols to avoid rate limiting
-            quote = await self.get_stock_quote(symbol)
-            results[symbol] = quote
-        return results
-
-class CacheService:
-    """Simple in-memory cache service to reduce API calls"""
-    
-    def __init__(self, ttl_seconds: int = 300):  # 5 minutes TTL
-        self.cache = {}
-        self.ttl = ttl_seconds
-    
-    def get(self, key: str) -> Optional[Any]:
-        """Get item from cache if not expired"""
-        if key in self.cache:
-            item = self.cache[key]
-            if item['expiry'] > self._current_time():
-                return item['data']
-            else:
-                del self.cache[key]  # Remove expired item
-        return None
-    
-    def set(self, key: str, data: Any) -> None:
-        """Set item in cache with TTL"""
-        self.cache[key] = {
-            'data': data,
-            'expiry': self._current_time() + self.ttl
+    async def get_daily_series(self, symbol: str, outputsize: str = "compact") -> Optional[Dict[str, Any]]:
+        """Get daily OHLCV bars as column arrays (see history.parse_daily_series)"""
+        try:
+            params = {
+                "function": "TIME_SERIES_DAILY",
+                "symbol": symbol.upper(),
+                "outputsize": outputsize,
+                "apikey": self.alpha_vantage_key
+            }
+            
+            data = await self._get(params, Priority.OVERVIEW)
+            return parse_daily_series(data)
+            
+        except RateLimitExceeded:
+            raise
+        except ProviderNotEntitled:
+            if outputsize == "full":
+                # HistoryService falls back to compact
+                raise
+            logger.error(f"Daily series for {symbol} not available for this API key")
+            return None
+        except httpx.RequestError as e:
+            logger.error(f"Request error for daily series {symbol}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error getting daily series for {symbol}: {e}")
+            return None
+
+    async def get_listing_status(self) -> Optional[str]:
+        """Download the LISTING_STATUS CSV of active US listings (background priority)"""
+        params = {
+            "function": "LISTING_STATUS",
+            "apikey": self.alpha_vantage_key
         }
-    
-    def _current_time(self) -> int:
-        """Get current time in seconds"""
-        import time
-        return int(time.time())
-    
-    def clear(self) -> None:
-        """Clear all cache"""
-        self.cache.clear()
+        try:
+            return await self.scheduler.submit(lambda: self._request_text(params), Priority.BACKGROUND)
+        except RateLimitExceeded as e:
+            logger.info(f"Deferred listing download: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error downloading listing status: {e}")
+            return None
+
+class RequestCoalescer:
+    """Single-flight helper: concurrent calls for the same key share one upstream fetch"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "leaders": 0,
+            "coalesced": 0,
+            "errors": 0,
+        }
+
+    async def run(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fetch() once per key; concurrent callers await the same result or error"""
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["leaders"] += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.stats["coalesced"] += 1
+
+        # Shield so a disconnecting caller doesn't cancel the fetch for everyone else
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        """Drop the finished fetch and mark its exception as retrieved"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["errors"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Coalescing counters"""
+        return {**self.stats, "in_flight": len(self._inflight)}
+
+class DataLoader:
+    """Read-through cache access with coalescing, stale-while-revalidate and early refresh"""
+
+    def __init__(
+        self,
+        cache: CacheService,
+        coalescer: RequestCoalescer,
+        shared_cache: Optional[RedisCache] = None,
+        beta: float = 1.0,
+        on_store: Optional[Callable[[str, Any, float], None]] = None,
+    ):
+        self.cache = cache
+        self.coalescer = coalescer
+        # Optional L2 shared between workers; the in-process cache stays the L1
+        self.shared_cache = shared_cache
+        self.beta = beta
+        # on_store(key, data, age) sees every value written to L1 (fetched or promoted from L2)
+        self.on_store = on_store
+        self._background: set = set()
+        self.stats = {
+            "fresh_hits": 0,
+            "stale_served": 0,
+            "early_refreshes": 0,
+            "misses": 0,
+            "refresh_failures": 0,
+            "refreshes_deferred": 0,
+        }
+
+    async def load(
+        self, key: str, fetch: Callable[[], Awaitable[Any]], check_shared: bool = True
+    ) -> Tuple[Optional[Any], float]:
+        """Return (data, age_seconds) for a key, fetching upstream only when needed"""
+        entry = self.cache.lookup(key)
+        if entry is None and check_shared and self._shared_enabled():
+            entry = await self.coalescer.run(f"l2:{key}", lambda: self._promote(key))
+        if entry is not None:
+            now = self.cache.now()
+            if entry.is_fresh(now):
+                self.stats["fresh_hits"] += 1
+                if entry.should_refresh_early(now, self.beta):
+                    self.stats["early_refreshes"] += 1
+                    self._refresh_in_background(key, fetch)
+            else:
+                # Serve the stale value now and let one background task refresh it
+                self.stats["stale_served"] += 1
+                self._refresh_in_background(key, fetch)
+            return entry.data, entry.age(now)
+
+        self.stats["misses"] += 1
+        data = await self.refresh(key, fetch)
+        return data, 0.0
+
+    async def refresh(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        """Fetch upstream (coalesced per key) and cache a non-empty result"""
+        return await self.coalescer.run(key, lambda: self._fetch_and_store(key, fetch))
+
+    async def load_many(
+        self, keys: List[str], fetch_for: Callable[[str], Callable[[], Awaitable[Any]]]
+    ) -> Dict[str, Any]:
+        """Load several keys: L1 first, one pipelined L2 round trip, then concurrent upstream fetches
+
+        Each value is (data, age_seconds), or the exception raised while fetching that key.
+        """
+        checked_shared = False
+        if self._shared_enabled():
+            missing = [key for key in keys if key not in self.cache]
+            for key, (data, age) in (await self.shared_cache.get_many(missing)).items():
+                self._store_l1(key, data, age)
+            checked_shared = True
+
+        loaded = await asyncio.gather(
+            *(self.load(key, fetch_for(key), check_shared=not checked_shared) for key in keys),
+            return_exceptions=True
+        )
+        return dict(zip(keys, loaded))
+
+    async def peek_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Values already cached in L1 or L2 (fresh or stale); never calls upstream"""
+        found = {}
+        missing = []
+        for key in keys:
+            entry = self.cache.lookup(key)
+            if entry is not None:
+                found[key] = entry.data
+            else:
+                missing.append(key)
+        if missing and self._shared_enabled():
+            for key, (data, age) in (await self.shared_cache.get_many(missing)).items():
+                self._store_l1(key, data, age)
+                found[key] = data
+        return found
+
+    async def _promote(self, key: str) -> Optional[CacheEntry]:
+        """Copy a value from the shared L2 tier into the local cache"""
+        hit = await self.shared_cache.get(key)
+        if hit is None:
+            return None
+        data, age = hit
+        return self._store_l1(key, data, age)
+
+    def _store_l1(self, key: str, data: Any, age: float) -> Optional[CacheEntry]:
+        ttl = self.cache.ttl_for(key) - age
+        if ttl + self.cache.max_stale_for(key) <= 0:
+            return None
+        if self.on_store is not None:
+            self.on_store(key, data, age)
+        return self.cache.set(key, data, ttl=ttl, age=age)
+
+    def _shared_enabled(self) -> bool:
+        return self.shared_cache is not None and self.shared_cache.enabled
+
+    async def _fetch_and_store(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        started = time.monotonic()
+        data = await fetch()
+        if data:
+            # A store-backed namespace normalizes the value; serve what later hits will see
+            data = self.cache.set(key, data, delta=time.monotonic() - started).data
+            if self.on_store is not None:
+                self.on_store(key, data, 0.0)
+            if self._shared_enabled():
+                ttl = self.cache.ttl_for(key) + self.cache.max_stale_for(key)
+                await self.shared_cache.set(key, data, ttl)
+        return data
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> None:
+        task = asyncio.ensure_future(self._background_refresh(key, fetch))
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    async def _background_refresh(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        # Runs in its own task context, so this only lowers the priority of the refresh
+        upstream_priority.set(Priority.BACKGROUND)
+        return await self.refresh(key, fetch)
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and isinstance(task.exception(), RateLimitExceeded):
+            self.stats["refreshes_deferred"] += 1
+        elif not task.cancelled() and task.exception() is not None:
+            self.stats["refresh_failures"] += 1
+            logger.error(f"Background cache refresh failed: {task.exception()}")
+
+    async def shutdown(self) -> None:
+        """Cancel outstanding background refreshes"""
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Loader counters"""
+        return {**self.stats, "background_refreshes": len(self._background)}
 
 # Create service instances
 stock_service = StockService()
-cache_service = CacheService()
\ No newline at end of file
+# Quotes live in the columnar store; the cache only tracks their expiry
+quote_store = QuoteStore()
+cache_service = CacheService(stores={"quote": quote_store})
+request_coalescer = RequestCoalescer()
+shared_cache = RedisCache()
+overview_store = OverviewStore()
+screener = Screener(quote_store, overview_store)
+# Quotes and overviews go through the provider router; search and daily series stay on Alpha Vantage
+market_data = ProviderRouter(build_providers(os.getenv("MARKET_DATA_PROVIDERS", "alphavantage,yfinance"), stock_service))
+
+def _record_value(key: str, data: Any, age: float) -> None:
+    """Mirror cached overviews into the screener's columns"""
+    if key.startswith("overview_") and isinstance(data, StockOverview):
+        overview_store.update(data)
+
+data_loader = DataLoader(cache_service, request_coalescer, shared_cache, on_store=_record_value)
+cache_snapshot = CacheSnapshot(cache_service, on_restore=_record_value)
+
+def _prefetch_fetch(key: str) -> Optional[Callable[[], Awaitable[Any]]]:
+    """Upstream fetch for a prefetchable key (quotes and overviews)"""
+    namespace, _, symbol = key.partition("_")
+    if namespace == "quote":
+        return lambda: market_data.get_stock_quote(symbol)
+    if namespace == "overview":
+        return lambda: market_data.get_stock_overview(symbol)
+    return None
+
+prefetcher = Prefetcher(
+    cache_service,
+    data_loader.refresh,
+    _prefetch_fetch,
+    AccessTracker(),
+    per_minute=stock_service.scheduler.minute_bucket.rate,
+    per_day=stock_service.scheduler.daily_budget.limit,
+)
+rolling_stats = RollingStatsStore()
+history_service = HistoryService(HistoryStore(), stock_service.get_daily_series, on_append=rolling_stats.catch_up)
\ No newline at end of file
@@ -0,0 +1,164 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import CacheService
+from .redis_cache import decode_value, encode_value
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+# Entries restored per event-loop turn, so a large restore never stalls requests
+RESTORE_CHUNK = 500
+
+
+class CacheSnapshot:
+    """Periodic on-disk snapshot of the L1 cache for warm restarts
+
+    The file is gzip-compressed text: a JSON header line, then one line per
+    entry with its key and wall-clock expiry next to the value in the compact
+    encoding the Redis tier uses. Entries are restored with their original
+    age and expiry; anything past its max staleness is dropped.
+    """
+
+    def __init__(
+        self,
+        cache: CacheService,
+        path: str = os.getenv("CACHE_SNAPSHOT_PATH", "data/cache_snapshot.gz"),
+        interval: float = float(os.getenv("CACHE_SNAPSHOT_INTERVAL", "300")),
+        namespaces: Tuple[str, ...] = tuple(os.getenv("CACHE_SNAPSHOT_NAMESPACES", "quote,overview,search,analysis").split(",")),
+        on_restore: Optional[Callable[[str, Any, float], None]] = None,
+    ):
+        self.cache = cache
+        self.path = path
+        self.interval = interval
+        self.namespaces = namespaces
+        # on_restore(key, data, age) sees every restored value, like DataLoader.on_store
+        self.on_restore = on_restore
+        self._task: Optional[asyncio.Task] = None
+        self._restore_task: Optional[asyncio.Task] = None
+        # Until the restore finishes, saving would overwrite the file with a partial cache
+        self._restored = False
+        self.stats = {
+            "saves": 0,
+            "saved_entries": 0,
+            "restored": 0,
+            "discarded": 0,
+            "errors": 0,
+        }
+
+    def collect(self) -> List[Tuple[str, Any, float, float, float, float]]:
+        """(key, data, stored_at, expiry, stale_until, delta) for every live entry, in wall-clock time"""
+        wall, now = time.time(), time.monotonic()
+        return [
+            (key, entry.data, wall - (now - entry.stored_at), wall + (entry.expiry - now),
+             wall + (entry.stale_until - now), entry.delta)
+            for key, entry in self.cache.cache.items()
+            if entry.namespace in self.namespaces and entry.stale_until > now
+        ]
+
+    def _write(self, entries: List[Tuple[str, Any, float, float, float, float]]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wb", compresslevel=5) as f:
+            f.write(json.dumps({"version": SNAPSHOT_VERSION, "written_at": time.time(), "entries": len(entries)}).encode() + b"\n")
+            for key, data, stored_at, expiry, stale_until, delta in entries:
+                meta = json.dumps([key, round(expiry, 3), round(stale_until, 3), round(delta, 4)], separators=(",", ":"))
+                f.write(meta.encode() + b"\t" + encode_value(data, stored_at) + b"\n")
+        os.replace(tmp_path, self.path)
+
+    def _read(self) -> List[Tuple[str, Any, float, float, float]]:
+        """(key, data, age, ttl_left, delta) for entries still servable now"""
+        entries = []
+        with gzip.open(self.path, "rb") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != SNAPSHOT_VERSION:
+                logger.info(f"Ignoring cache snapshot version {header.get('version')}")
+                return entries
+            now = time.time()
+            for line in f:
+                meta, _, value = line.rstrip(b"\n").partition(b"\t")
+                key, expiry, stale_until, delta = json.loads(meta)
+                if stale_until <= now:
+                    self.stats["discarded"] += 1
+                    continue
+                data, stored_at = decode_value(value)
+                entries.append((key, data, max(0.0, now - stored_at), expiry - now, delta))
+        return entries
+
+    async def save(self) -> int:
+        """Write the snapshot; entries are gathered on the loop and encoded off it"""
+        if not self._restored:
+            return 0
+        entries = self.collect()
+        try:
+            await asyncio.to_thread(self._write, entries)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Could not write cache snapshot to {self.path}: {e}")
+            return 0
+        self.stats["saves"] += 1
+        self.stats["saved_entries"] = len(entries)
+        return len(entries)
+
+    async def restore(self) -> int:
+        """Load the snapshot into the cache; keys set since startup are left alone"""
+        if not os.path.exists(self.path):
+            self._restored = True
+            return 0
+        try:
+            entries = await asyncio.to_thread(self._read)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Could not read cache snapshot from {self.path}: {e}")
+            self._restored = True
+            return 0
+
+        restored = 0
+        for start in range(0, len(entries), RESTORE_CHUNK):
+            for key, data, age, ttl_left, delta in entries[start:start + RESTORE_CHUNK]:
+                if key in self.cache:
+                    continue
+                # A negative TTL restores the entry as stale: served once, refreshed in the background
+                self.cache.set(key, data, ttl=ttl_left, delta=delta, age=age)
+                if self.on_restore is not None:
+                    self.on_restore(key, data, age)
+                restored += 1
+            await asyncio.sleep(0)
+        self.stats["restored"] += restored
+        self._restored = True
+        logger.info(f"Restored {restored} cache entries from {self.path}")
+        return restored
+
+    def start(self) -> None:
+        """Restore in the background (readiness does not wait for it) and save periodically"""
+        if self._restore_task is None:
+            self._restore_task = asyncio.create_task(self.restore())
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._save_loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic save and write a final snapshot"""
+        for task in (self._restore_task, self._task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._restore_task = None
+        await self.save()
+
+    async def _save_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "path": self.path}
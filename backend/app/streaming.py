@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .ratelimit import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One client's view of the quote stream
+
+    Pending updates are merged per symbol, so a slow client never holds more
+    than one update per symbol: it skips intermediate values instead of
+    building an unbounded backlog.
+    """
+
+    def __init__(self, symbols: List[str]):
+        self.symbols = symbols
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._event = asyncio.Event()
+        self.merged = 0
+
+    def push(self, symbol: str, changes: Dict[str, Any]) -> None:
+        pending = self._pending.get(symbol)
+        if pending is None:
+            self._pending[symbol] = dict(changes)
+        else:
+            pending.update(changes)
+            self.merged += 1
+        self._event.set()
+
+    async def next_batch(self, timeout: float) -> Dict[str, Dict[str, Any]]:
+        """Wait up to timeout for updates; returns {} on timeout (for heartbeats)"""
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return {}
+        batch, self._pending = self._pending, {}
+        self._event.clear()
+        return batch
+
+
+class QuoteBroadcaster:
+    """Runs one poller per subscribed symbol and fans changes out to every subscriber"""
+
+    def __init__(
+        self,
+        load_quote: Callable[[str], Awaitable[Tuple[Optional[Any], float]]],
+        poll_interval: float = float(os.getenv("STREAM_POLL_INTERVAL", "15")),
+    ):
+        self.load_quote = load_quote
+        self.poll_interval = poll_interval
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._pollers: Dict[str, asyncio.Task] = {}
+        # Last full snapshot per symbol; new subscribers start from it
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self.stats = {
+            "polls": 0,
+            "updates_published": 0,
+            "poll_errors": 0,
+        }
+
+    def subscribe(self, symbols: List[str]) -> Subscription:
+        subscription = Subscription(symbols)
+        for symbol in symbols:
+            self._subscribers.setdefault(symbol, set()).add(subscription)
+            if symbol in self._latest:
+                subscription.push(symbol, self._latest[symbol])
+            if symbol not in self._pollers or self._pollers[symbol].done():
+                self._pollers[symbol] = asyncio.create_task(self._poll(symbol))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for symbol in subscription.symbols:
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                # Last viewer left: stop polling this symbol
+                del self._subscribers[symbol]
+                self._latest.pop(symbol, None)
+                poller = self._pollers.pop(symbol, None)
+                if poller is not None:
+                    poller.cancel()
+
+    async def shutdown(self) -> None:
+        pollers = list(self._pollers.values())
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+        self._pollers.clear()
+        self._subscribers.clear()
+        self._latest.clear()
+
+    async def _poll(self, symbol: str) -> None:
+        while True:
+            delay = self.poll_interval
+            try:
+                self.stats["polls"] += 1
+                quote, age = await self.load_quote(symbol)
+                if quote is not None:
+                    self._publish(symbol, quote.model_dump(), age)
+            except RateLimitExceeded as e:
+                delay = max(delay, e.retry_after)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["poll_errors"] += 1
+                logger.error(f"Quote stream poll failed for {symbol}: {e}")
+            await asyncio.sleep(delay)
+
+    def _publish(self, symbol: str, snapshot: Dict[str, Any], age: float) -> None:
+        previous = self._latest.get(symbol, {})
+        changes = {k: v for k, v in snapshot.items() if previous.get(k) != v or k not in previous}
+        self._latest[symbol] = snapshot
+        if not changes:
+            return
+        changes["symbol"] = symbol
+        changes["age"] = int(age)
+        self.stats["updates_published"] += 1
+        for subscription in self._subscribers.get(symbol, ()):
+            subscription.push(symbol, changes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        subscriptions = {s for subs in self._subscribers.values() for s in subs}
+        return {
+            **self.stats,
+            "symbols": len(self._pollers),
+            "subscribers": len(subscriptions),
+            "merged_updates": sum(s.merged for s in subscriptions),
+        }
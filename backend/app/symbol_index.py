@@ -0,0 +1,236 @@
+import asyncio
+import csv
+import io
+import logging
+import os
+import time
+from array import array
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .models import StockSearchResult
+
+logger = logging.getLogger(__name__)
+
+# LISTING_STATUS only covers US listings, so the market metadata is the same for every row
+_US_MARKET = {
+    "region": "United States",
+    "market_open": "09:30",
+    "market_close": "16:00",
+    "timezone": "UTC-04",
+    "currency": "USD",
+}
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    """Immutable in-memory index over the symbol universe
+
+    Sorted symbol and name-token arrays answer prefix queries with bisect;
+    a trigram inverted index handles typos. Build a new index and swap it in
+    to refresh.
+    """
+
+    def __init__(self, rows: List[Tuple[str, str, str, str]]):
+        # rows: (symbol, name, exchange, asset_type), deduplicated and sorted by symbol
+        unique = {row[0]: row for row in rows if row[0]}
+        self.rows = [unique[symbol] for symbol in sorted(unique)]
+        self.symbols = [row[0] for row in self.rows]
+
+        tokens = []
+        trigrams: Dict[str, array] = {}
+        for row_id, (symbol, name, _, _) in enumerate(self.rows):
+            lowered = name.lower()
+            for token in lowered.replace(",", " ").replace(".", " ").split():
+                tokens.append((token, row_id))
+            for gram in _trigrams(symbol.lower()) | _trigrams(lowered):
+                postings = trigrams.get(gram)
+                if postings is None:
+                    postings = trigrams[gram] = array("I")
+                postings.append(row_id)
+        tokens.sort()
+        self.name_tokens = [token for token, _ in tokens]
+        self.name_token_rows = array("I", (row_id for _, row_id in tokens))
+        self.trigrams = trigrams
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, symbol: str) -> bool:
+        position = bisect_left(self.symbols, symbol)
+        return position < len(self.symbols) and self.symbols[position] == symbol
+
+    @classmethod
+    def from_csv(cls, text: str) -> "SymbolIndex":
+        """Build from LISTING_STATUS CSV text (symbol,name,exchange,assetType,...,status)"""
+        reader = csv.DictReader(io.StringIO(text))
+        rows = [
+            (
+                (record.get("symbol") or "").strip().upper(),
+                (record.get("name") or "").strip(),
+                (record.get("exchange") or "").strip(),
+                (record.get("assetType") or "").strip(),
+            )
+            for record in reader
+            if (record.get("status") or "Active").strip().lower() == "active"
+        ]
+        return cls(rows)
+
+    def search(self, keywords: str, limit: int = 10) -> List[StockSearchResult]:
+        """Prefix matches on symbol and name words first, then trigram fuzzy matches"""
+        query = keywords.strip()
+        if not query:
+            return []
+        upper, lower = query.upper(), query.lower()
+        scores: Dict[int, float] = {}
+
+        def add(row_id: int, score: float) -> None:
+            if score > scores.get(row_id, 0.0):
+                scores[row_id] = score
+
+        # Symbol prefix: exact match scores 1.0, longer symbols a bit less
+        start = bisect_left(self.symbols, upper)
+        for row_id in range(start, min(start + limit * 4, len(self.symbols))):
+            symbol = self.symbols[row_id]
+            if not symbol.startswith(upper):
+                break
+            add(row_id, 1.0 if symbol == upper else 0.9 - 0.02 * (len(symbol) - len(upper)))
+
+        # Name word prefix (every query word must prefix-match some word of the name)
+        words = lower.split()
+        start = bisect_left(self.name_tokens, words[-1])
+        candidates = []
+        for position in range(start, min(start + limit * 20, len(self.name_tokens))):
+            if not self.name_tokens[position].startswith(words[-1]):
+                break
+            candidates.append(self.name_token_rows[position])
+        for row_id in candidates:
+            name = self.rows[row_id][1].lower()
+            if all(word in name for word in words[:-1]):
+                add(row_id, 0.8 if name.startswith(lower) else 0.7)
+
+        # Fuzzy fallback for typos: trigram overlap
+        if len(scores) < limit and len(lower) >= 3:
+            grams = _trigrams(lower)
+            counts: Dict[int, int] = {}
+            for gram in grams:
+                for row_id in self.trigrams.get(gram, ()):
+                    counts[row_id] = counts.get(row_id, 0) + 1
+            threshold = max(2, int(len(grams) * 0.5))
+            for row_id, shared in counts.items():
+                if shared >= threshold:
+                    add(row_id, 0.6 * shared / len(grams))
+
+        best = sorted(scores.items(), key=lambda item: (-item[1], self.rows[item[0]][0]))[:limit]
+        return [self._result(row_id, score) for row_id, score in best]
+
+    def _result(self, row_id: int, score: float) -> StockSearchResult:
+        symbol, name, _, asset_type = self.rows[row_id]
+        return StockSearchResult(
+            symbol=symbol,
+            name=name,
+            type=asset_type or None,
+            match_score=round(score, 4),
+            **_US_MARKET,
+        )
+
+
+class SymbolIndexService:
+    """Holds the current SymbolIndex and refreshes it from the listing file in the background"""
+
+    def __init__(
+        self,
+        path: str = os.getenv("SYMBOL_LISTING_PATH", "data/listing_status.csv"),
+        refresh_interval: float = float(os.getenv("SYMBOL_INDEX_REFRESH", "3600")),
+        max_file_age: float = float(os.getenv("SYMBOL_LISTING_MAX_AGE", "86400")),
+    ):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.max_file_age = max_file_age
+        self.index: Optional[SymbolIndex] = None
+        self._loaded_mtime = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "loads": 0,
+            "downloads": 0,
+            "index_hits": 0,
+            "fallbacks": 0,
+        }
+
+    def search(self, keywords: str, limit: int = 10) -> List[StockSearchResult]:
+        """Search the local index; returns [] when no index is loaded"""
+        index = self.index
+        if index is None:
+            return []
+        return index.search(keywords, limit)
+
+    def has(self, symbol: str) -> Optional[bool]:
+        """Whether symbol is listed; None when no index is loaded"""
+        index = self.index
+        return None if index is None else symbol in index
+
+    def start(self, download: Optional[Callable[[], Awaitable[Optional[str]]]] = None) -> None:
+        """Start the background loader; download() fetches fresh LISTING_STATUS CSV text"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop(download))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self, download: Optional[Callable[[], Awaitable[Optional[str]]]] = None) -> None:
+        """Download the listing if missing or old, then reload the index if the file changed"""
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else 0.0
+        if download is not None and time.time() - mtime > self.max_file_age:
+            text = await download()
+            if text and text.lstrip().lower().startswith("symbol"):
+                await asyncio.to_thread(self._write_file, text)
+                self.stats["downloads"] += 1
+                mtime = os.path.getmtime(self.path)
+
+        if mtime and mtime != self._loaded_mtime:
+            index = await asyncio.to_thread(self._load_file)
+            # Swap in the new index in one assignment; readers never see a partial build
+            self.index = index
+            self._loaded_mtime = mtime
+            self.stats["loads"] += 1
+            logger.info(f"Symbol index loaded with {len(index)} symbols")
+
+    async def _refresh_loop(self, download: Optional[Callable[[], Awaitable[Optional[str]]]]) -> None:
+        while True:
+            try:
+                await self.refresh(download)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Symbol index refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def _load_file(self) -> SymbolIndex:
+        with open(self.path, encoding="utf-8") as f:
+            return SymbolIndex.from_csv(f.read())
+
+    def _write_file(self, text: str) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            **self.stats,
+            "symbols": len(self.index) if self.index is not None else 0,
+            "path": self.path,
+        }
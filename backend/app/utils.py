@@ -1,40 +1,62 @@
 from typing import Dict, Any, List, Optional
+import math
 import re
 
+import numpy as np
+
+# (output field, Alpha Vantage key) pairs, built once
+_OVERVIEW_FIELDS = (
+    ("symbol", "Symbol"),
+    ("name", "Name"),
+    ("sector", "Sector"),
+    ("industry", "Industry"),
+    ("description", "Description"),
+    ("exchange", "Exchange"),
+    ("currency", "Currency"),
+    ("country", "Country"),
+    # Financial metrics
+    ("market_cap", "MarketCapitalization"),
+    ("pe_ratio", "PERatio"),
+    ("peg_ratio", "PEGRatio"),
+    ("dividend_yield", "DividendYield"),
+    ("eps", "EPS"),
+    ("beta", "Beta"),
+    # Price metrics
+    ("price", "Price"),
+    ("week_52_high", "52WeekHigh"),
+    ("week_52_low", "52WeekLow"),
+    ("moving_avg_50", "50DayMovingAverage"),
+    ("moving_avg_200", "200DayMovingAverage"),
+)
+
+_SEARCH_FIELDS = (
+    ("symbol", "1. symbol"),
+    ("name", "2. name"),
+    ("type", "3. type"),
+    ("region", "4. region"),
+    ("market_open", "5. marketOpen"),
+    ("market_close", "6. marketClose"),
+    ("timezone", "7. timezone"),
+    ("currency", "8. currency"),
+)
+
+# Values Alpha Vantage uses for "no data"
+_EMPTY = (None, "", "None")
+
+_NON_NUMERIC = re.compile(r'[^\d.-]')
+_NON_DIGIT = re.compile(r'[^\d]')
+
 def format_stock_data(raw_data: Dict[str, Any]) -> Dict[str, Any]:
     """Format raw stock overview data into a more readable format"""
     if not raw_data:
         return {}
     
-    # Clean and format the data
-    formatted = {
-        "symbol": raw_data.get("Symbol", ""),
-        "name": raw_data.get("Name", ""),
-        "sector": raw_data.get("Sector", ""),
-        "industry": raw_data.get("Industry", ""),
-        "description": raw_data.get("Description", ""),
-        "exchange": raw_data.get("Exchange", ""),
-        "currency": raw_data.get("Currency", ""),
-        "country": raw_data.get("Country", ""),
-        
-        # Financial metrics
-        "market_cap": raw_data.get("MarketCapitalization", ""),
-        "pe_ratio": raw_data.get("PERatio", ""),
-        "peg_ratio": raw_data.get("PEGRatio", ""),
-        "dividend_yield": raw_data.get("DividendYield", ""),
-        "eps": raw_data.get("EPS", ""),
-        "beta": raw_data.get("Beta", ""),
-        
-        # Price metrics
-        "price": raw_data.get("Price", ""),
-        "week_52_high": raw_data.get("52WeekHigh", ""),
-        "week_52_low": raw_data.get("52WeekLow", ""),
-        "moving_avg_50": raw_data.get("50DayMovingAverage", ""),
-        "moving_avg_200": raw_data.get("200DayMovingAverage", "")
-    }
-    
-    # Clean empty values
-    return {k: v for k, v in formatted.items() if v not in [None, "", "None"]}
+    formatted = {}
+    for field, key in _OVERVIEW_FIELDS:
+        value = raw_data.get(key)
+        if value not in _EMPTY:
+            formatted[field] = value
+    return formatted
 
 def format_quote_data(quote_data: Dict[str, Any]) -> Dict[str, Any]:
     """Format raw quote data"""
@@ -61,39 +83,85 @@ def format_search_results(match_data: Dict[str, Any]) -> Dict[str, Any]:
     if not match_data:
         return {}
     
-    formatted = {
-        "symbol": match_data.get("1. symbol", ""),
-        "name": match_data.get("2. name", ""),
-        "type": match_data.get("3. type", ""),
-        "region": match_data.get("4. region", ""),
-        "market_open": match_data.get("5. marketOpen", ""),
-        "market_close": match_data.get("6. marketClose", ""),
-        "timezone": match_data.get("7. timezone", ""),
-        "currency": match_data.get("8. currency", ""),
-        "match_score": _parse_float(match_data.get("9. matchScore", ""))
-    }
-    
-    return {k: v for k, v in formatted.items() if v not in [None, "", "None"]}
+    formatted = {}
+    for field, key in _SEARCH_FIELDS:
+        value = match_data.get(key)
+        if value not in _EMPTY:
+            formatted[field] = value
+    score = _parse_float(match_data.get("9. matchScore"))
+    if score is not None:
+        formatted["match_score"] = score
+    return formatted
+
+def format_search_matches(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every entry of a SYMBOL_SEARCH payload's bestMatches, formatted in one pass"""
+    return [format_search_results(match) for match in payload.get("bestMatches") or () if match]
+
+def parse_time_series(payload: Dict[str, Any]) -> Optional[Dict[str, np.ndarray]]:
+    """Any TIME_SERIES_* payload -> column arrays in one pass, or None without a series
+
+    Returns "timestamp" (datetime64[D] for daily and longer series, datetime64[s]
+    for intraday) plus one float64 column per bar field named without its
+    "N. " prefix (open, high, low, close, volume, adjusted close, ...).
+    Rows keep the payload's order (newest first).
+    """
+    series = next((value for key, value in payload.items() if key.startswith(("Time Series", "Weekly", "Monthly"))), None)
+    if not series:
+        return None
+    stamps = list(series.keys())
+    bars = list(series.values())
+    keys = list(bars[0].keys())
+
+    count = len(bars) * len(keys)
+    try:
+        if not all(list(bar.keys()) == keys for bar in bars):
+            raise ValueError("bars have different fields")
+        # Every bar has the same field order: parse all values in one flat pass
+        flat = np.fromiter(map(float, (value for bar in bars for value in bar.values())), np.float64, count)
+    except (ValueError, TypeError):
+        # Missing or malformed fields: fall back to the forgiving per-value parser
+        flat = np.array([_float_or_nan(bar.get(key)) for bar in bars for key in keys], dtype=np.float64)
+    matrix = flat.reshape(len(bars), len(keys))
+
+    unit = "s" if len(stamps[0]) > 10 else "D"
+    columns = {"timestamp": np.array(stamps, dtype=f"datetime64[{unit}]")}
+    for position, key in enumerate(keys):
+        columns[key.split(". ", 1)[-1]] = matrix[:, position]
+    return columns
 
 def _parse_float(value: Any) -> Optional[float]:
     """Safely parse float values"""
-    if value is None or value == "None" or value == "":
+    if value in _EMPTY:
         return None
+    # Fast path: well-formed numbers need no cleaning
+    try:
+        number = float(value)
+        if math.isfinite(number):
+            return number
+    except (ValueError, TypeError):
+        pass
     try:
         # Remove any non-numeric characters except decimal point and minus sign
-        cleaned = re.sub(r'[^\d.-]', '', str(value))
-        return float(cleaned)
+        return float(_NON_NUMERIC.sub('', str(value)))
     except (ValueError, TypeError):
         return None
 
+def _float_or_nan(value: Any) -> float:
+    number = _parse_float(value)
+    return math.nan if number is None else number
+
 def _parse_int(value: Any) -> Optional[int]:
     """Safely parse integer values"""
-    if value is None or value == "None" or value == "":
+    if value in _EMPTY:
         return None
+    # Fast path: plain integer strings
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        pass
     try:
         # Remove any non-numeric characters
-        cleaned = re.sub(r'[^\d]', '', str(value))
-        return int(cleaned)
+        return int(_NON_DIGIT.sub('', str(value)))
     except (ValueError, TypeError):
         return None
 
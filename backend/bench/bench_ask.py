@@ -0,0 +1,63 @@
+"""Time-to-first-byte and answer-cache behaviour of /api/ask against the stub model
+
+Start the stub model and the API first (from backend/):
+    python -m uvicorn bench.stub_llm:app --port 8099
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 python -m uvicorn app.main:app --port 8000
+then run:  python -m bench.bench_ask [api_url] [stub_url]
+"""
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+
+async def ask(client: httpx.AsyncClient, question: str, symbol: str = None) -> dict:
+    started = time.perf_counter()
+    first_byte = first_token = None
+    tokens, done = [], None
+    async with client.stream("POST", "/api/ask", json={"question": question, "symbol": symbol}) as response:
+        response.raise_for_status()
+        event = None
+        async for line in response.aiter_lines():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[5:])
+                if event == "token":
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                    tokens.append(data["text"])
+                elif event in ("done", "error"):
+                    done = {"event": event, **data}
+    return {
+        "first_byte_ms": round(first_byte * 1000, 1),
+        "first_token_ms": round((first_token or 0) * 1000, 1),
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        "answer": "".join(tokens),
+        "done": done,
+    }
+
+
+async def main(api_url: str = "http://127.0.0.1:8000", stub_url: str = "http://127.0.0.1:8099") -> None:
+    questions = [
+        ("What is the outlook for AAPL?", None),
+        ("what is the outlook for AAPL", None),        # exact after normalization
+        ("AAPL outlook?", None),                        # near-duplicate
+        ("Should I worry about AAPL debt levels?", None),
+    ]
+    async with httpx.AsyncClient(base_url=api_url, timeout=60) as client, httpx.AsyncClient(base_url=stub_url) as stub:
+        before = (await stub.get("/calls")).json()["count"]
+        for question, symbol in questions:
+            result = await ask(client, question, symbol)
+            print(f"{question!r:45} first byte {result['first_byte_ms']:7.1f} ms  first token "
+                  f"{result['first_token_ms']:7.1f} ms  total {result['total_ms']:7.1f} ms  {result['done']}")
+        after = (await stub.get("/calls")).json()["count"]
+        print(f"model calls: {after - before} for {len(questions)} questions")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*sys.argv[1:3]))
@@ -0,0 +1,127 @@
+"""Alpha Vantage payload parsing: current utils vs the previous implementations
+
+Run from backend/:  python -m bench.bench_parsing [bars]
+"""
+import re
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app import utils
+from app.history import COLUMNS, parse_daily_series, to_day
+
+
+# Previous implementations, kept here as the baseline
+def legacy_parse_float(value):
+    if value is None or value == "None" or value == "":
+        return None
+    try:
+        cleaned = re.sub(r'[^\d.-]', '', str(value))
+        return float(cleaned)
+    except (ValueError, TypeError):
+        return None
+
+
+def legacy_parse_int(value):
+    if value is None or value == "None" or value == "":
+        return None
+    try:
+        cleaned = re.sub(r'[^\d]', '', str(value))
+        return int(cleaned)
+    except (ValueError, TypeError):
+        return None
+
+
+def legacy_format_stock_data(raw_data):
+    formatted = {
+        "symbol": raw_data.get("Symbol", ""), "name": raw_data.get("Name", ""),
+        "sector": raw_data.get("Sector", ""), "industry": raw_data.get("Industry", ""),
+        "description": raw_data.get("Description", ""), "exchange": raw_data.get("Exchange", ""),
+        "currency": raw_data.get("Currency", ""), "country": raw_data.get("Country", ""),
+        "market_cap": raw_data.get("MarketCapitalization", ""), "pe_ratio": raw_data.get("PERatio", ""),
+        "peg_ratio": raw_data.get("PEGRatio", ""), "dividend_yield": raw_data.get("DividendYield", ""),
+        "eps": raw_data.get("EPS", ""), "beta": raw_data.get("Beta", ""), "price": raw_data.get("Price", ""),
+        "week_52_high": raw_data.get("52WeekHigh", ""), "week_52_low": raw_data.get("52WeekLow", ""),
+        "moving_avg_50": raw_data.get("50DayMovingAverage", ""),
+        "moving_avg_200": raw_data.get("200DayMovingAverage", ""),
+    }
+    return {k: v for k, v in formatted.items() if v not in [None, "", "None"]}
+
+
+def legacy_parse_daily_series(payload):
+    series = payload.get("Time Series (Daily)")
+    days, bars = list(series.keys()), list(series.values())
+    return {
+        "date": np.array([to_day(day) for day in days], dtype=COLUMNS["date"]),
+        "open": np.array([legacy_parse_float(bar["1. open"]) for bar in bars], dtype=np.float64),
+        "high": np.array([legacy_parse_float(bar["2. high"]) for bar in bars], dtype=np.float64),
+        "low": np.array([legacy_parse_float(bar["3. low"]) for bar in bars], dtype=np.float64),
+        "close": np.array([legacy_parse_float(bar["4. close"]) for bar in bars], dtype=np.float64),
+        "volume": np.array([legacy_parse_int(bar["5. volume"]) for bar in bars], dtype=np.int64),
+    }
+
+
+def make_payloads(bars: int):
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    start = date(2000, 1, 3)
+    series = {}
+    for i in range(bars - 1, -1, -1):
+        series[(start + timedelta(days=i)).isoformat()] = {
+            "1. open": f"{close[i] * 0.995:.4f}",
+            "2. high": f"{close[i] * 1.01:.4f}",
+            "3. low": f"{close[i] * 0.99:.4f}",
+            "4. close": f"{close[i]:.4f}",
+            "5. volume": str(int(rng.integers(1_000_000, 90_000_000))),
+        }
+    overview = {
+        "Symbol": "IBM", "Name": "International Business Machines", "Sector": "TECHNOLOGY",
+        "Industry": "COMPUTER & OFFICE EQUIPMENT", "Description": "IBM " * 100, "Exchange": "NYSE",
+        "Currency": "USD", "Country": "USA", "MarketCapitalization": "170000000000", "PERatio": "22.1",
+        "PEGRatio": "None", "DividendYield": "0.038", "EPS": "7.9", "Beta": "0.7", "52WeekHigh": "199.18",
+        "52WeekLow": "130.68", "50DayMovingAverage": "186.3", "200DayMovingAverage": "171.9",
+    }
+    return {"Meta Data": {}, "Time Series (Daily)": series}, overview
+
+
+def timed(label: str, fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best
+
+
+def main(bars: int = 5000) -> None:
+    daily, overview = make_payloads(bars)
+
+    # Same results before timing anything
+    old, new = legacy_parse_daily_series(daily), parse_daily_series(daily)
+    for name in COLUMNS:
+        assert np.array_equal(old[name], new[name]), name
+    assert legacy_format_stock_data(overview) == utils.format_stock_data(overview)
+
+    values = [bar["4. close"] for bar in daily["Time Series (Daily)"].values()]
+    volumes = [bar["5. volume"] for bar in daily["Time Series (Daily)"].values()]
+    rows = [
+        ("parse_float x%d" % len(values), lambda: [legacy_parse_float(v) for v in values],
+         lambda: [utils._parse_float(v) for v in values], 5),
+        ("parse_int x%d" % len(volumes), lambda: [legacy_parse_int(v) for v in volumes],
+         lambda: [utils._parse_int(v) for v in volumes], 5),
+        ("format_stock_data", lambda: legacy_format_stock_data(overview),
+         lambda: utils.format_stock_data(overview), 20000),
+        ("daily series %d bars" % bars, lambda: legacy_parse_daily_series(daily),
+         lambda: parse_daily_series(daily), 5),
+    ]
+    print(f"{'':28} {'before':>12} {'after':>12} {'speedup':>8}")
+    for label, before, after, repeat in rows:
+        t_before, t_after = timed(label, before, repeat), timed(label, after, repeat)
+        print(f"{label:28} {t_before * 1e6:10.1f}us {t_after * 1e6:10.1f}us {t_before / t_after:7.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
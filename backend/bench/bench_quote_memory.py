@@ -0,0 +1,86 @@
+"""Memory per symbol: StockQuote models in CacheService vs a quote namespace backed by QuoteStore
+
+Both sides are the full serving path: cache entries plus whatever holds the values.
+
+Run from backend/:  python -m bench.bench_quote_memory [symbols]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.cache import CacheService
+from app.models import StockQuote
+from app.quote_store import QuoteStore
+
+
+def make_quotes(count: int):
+    rng = np.random.default_rng(3)
+    quotes = []
+    for i in range(count):
+        price = float(rng.uniform(5, 500))
+        change = float(rng.normal(0, 2))
+        quotes.append(StockQuote(
+            symbol=f"S{i:05d}",
+            price=price,
+            change=change,
+            change_percent=f"{change / price * 100:.4f}%",
+            volume=int(rng.integers(1e4, 1e8)),
+            latest_trading_day="2026-10-16",
+            previous_close=price - change,
+            open=price * 0.99,
+            high=price * 1.01,
+            low=price * 0.98,
+        ))
+    return quotes
+
+
+def measure(build) -> int:
+    """Bytes allocated (and still live) while build() runs"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del kept
+    return size
+
+
+def main(count: int = 8000) -> None:
+    # Cache path: each quote arrives as JSON and lives on as a model inside a cache entry
+    raw = [quote.model_dump() for quote in make_quotes(count)]
+
+    def cached_models():
+        cache = CacheService(max_entries=count * 2, max_bytes=1 << 40)
+        for data in raw:
+            cache.set(f"quote_{data['symbol']}", StockQuote(**data))
+        return cache
+
+    def store_backed():
+        # Values go to the columns; the cache keeps expiry metadata only
+        store = QuoteStore()
+        cache = CacheService(max_entries=count * 2, max_bytes=1 << 40, stores={"quote": store})
+        for data in raw:
+            cache.set(f"quote_{data['symbol']}", StockQuote(**data))
+        return cache
+
+    cache_bytes = measure(cached_models)
+    store_bytes = measure(store_backed)
+    print(f"{count} symbols")
+    print(f"  CacheService + StockQuote:            {cache_bytes / 1e6:7.2f} MB  ({cache_bytes / count:6.0f} B/symbol)")
+    print(f"  CacheService (expiry) + QuoteStore:   {store_bytes / 1e6:7.2f} MB  ({store_bytes / count:6.0f} B/symbol)")
+    print(f"  ratio: {cache_bytes / store_bytes:.1f}x")
+
+    store = store_backed().stores["quote"]
+    started = time.perf_counter()
+    for _ in range(100):
+        store.movers(10)
+    print(f"  movers(10) over {count} symbols: {(time.perf_counter() - started) * 10:.3f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
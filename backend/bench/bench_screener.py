@@ -0,0 +1,75 @@
+"""Screener and movers latency over a synthetic cached universe
+
+Run from backend/:  python -m bench.bench_screener [symbols]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.models import StockOverview, StockQuote
+from app.quote_store import QuoteStore
+from app.screener import OverviewStore, Screener
+
+SECTORS = ["TECHNOLOGY", "FINANCE", "ENERGY", "HEALTHCARE", "MANUFACTURING", "RETAIL"]
+
+
+def make_universe(count: int):
+    rng = np.random.default_rng(11)
+    quotes, overviews = QuoteStore(), OverviewStore()
+    for i in range(count):
+        symbol = f"S{i:05d}"
+        price = float(rng.uniform(5, 500))
+        change = float(rng.normal(0, price * 0.02))
+        quotes.update(StockQuote(
+            symbol=symbol, price=price, change=change, change_percent=f"{change / price * 100:.4f}%",
+            volume=int(rng.integers(10_000, 50_000_000)), latest_trading_day="2024-01-02",
+        ))
+        overviews.update(StockOverview(
+            symbol=symbol, name=f"Company {i}", sector=SECTORS[i % len(SECTORS)],
+            market_cap=str(int(rng.uniform(1e8, 2e12))), pe_ratio=f"{rng.uniform(3, 80):.2f}" if i % 10 else "None",
+            dividend_yield=f"{rng.uniform(0, 0.06):.4f}", beta=f"{rng.uniform(0.3, 2.0):.3f}",
+        ))
+    return quotes, overviews
+
+
+def timed(fn, repeat: int = 50) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(count: int = 5000) -> None:
+    quotes, overviews = make_universe(count)
+    screener = Screener(quotes, overviews)
+
+    # Cross-check one screen against a plain Python filter + sort
+    result = screener.screen({"pe_ratio": (None, 15.0)}, {"sector": "technology"}, sort="market_cap", limit=20)
+    rows = [
+        (float(overviews.columns["market_cap"][slot]), symbol)
+        for symbol, slot in overviews.slots.items()
+        if overviews.columns["pe_ratio"][slot] <= 15 and SECTORS[slot % len(SECTORS)] == "TECHNOLOGY"
+    ]
+    expected = [symbol for _, symbol in sorted(rows, reverse=True)[:20]]
+    assert [row["symbol"] for row in result["results"]] == expected
+    assert result["total_matched"] == len(rows)
+
+    cases = [
+        ("movers top 20", lambda: quotes.movers(20)),
+        ("screen pe<15 tech by market_cap", lambda: screener.screen(
+            {"pe_ratio": (None, 15.0)}, {"sector": "technology"}, sort="market_cap", limit=50)),
+        ("screen cap>10B by change_pct", lambda: screener.screen(
+            {"market_cap": (1e10, None)}, {}, sort="change_pct", limit=50)),
+        ("screen quotes only by volume", lambda: screener.screen(
+            {"change_pct": (1.0, None)}, {}, sort="volume", limit=50)),
+    ]
+    print(f"{count} symbols")
+    for label, fn in cases:
+        print(f"{label:36} {timed(fn) * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
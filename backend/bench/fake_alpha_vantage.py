@@ -0,0 +1,227 @@
+"""Local stand-in for the Alpha Vantage /query endpoint
+
+Serves GLOBAL_QUOTE, OVERVIEW, SYMBOL_SEARCH, TIME_SERIES_DAILY and
+LISTING_STATUS for a synthetic universe of FAKE_AV_SYMBOLS tickers, with
+configurable latency and throttling, so the API can be load tested offline.
+Payloads are deterministic per symbol; quotes move every FAKE_AV_TICK seconds.
+A JSON file in FAKE_AV_FIXTURES named <FUNCTION>_<SYMBOL>.json (or
+<FUNCTION>.json) is served verbatim instead of the generated payload.
+
+Run from backend/:  python -m uvicorn bench.fake_alpha_vantage:app --port 8098
+then start the API with ALPHA_VANTAGE_URL=http://127.0.0.1:8098/query
+GET /_stats returns call counts per function; POST /_reset clears them.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import zlib
+from collections import Counter, deque
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+UNIVERSE = int(os.getenv("FAKE_AV_SYMBOLS", "2000"))
+LATENCY_MS = float(os.getenv("FAKE_AV_LATENCY_MS", "80"))
+JITTER_MS = float(os.getenv("FAKE_AV_JITTER_MS", "30"))
+# Fraction of calls answered with a throttle note, and an optional real per-minute limit
+THROTTLE_RATE = float(os.getenv("FAKE_AV_THROTTLE_RATE", "0"))
+RPM = int(os.getenv("FAKE_AV_RPM", "0"))
+TICK = float(os.getenv("FAKE_AV_TICK", "5"))
+FIXTURES = os.getenv("FAKE_AV_FIXTURES", "")
+
+THROTTLE_NOTE = (
+    "Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day. "
+    "Please subscribe to any of the premium plans to instantly remove all daily rate limits."
+)
+SECTORS = [
+    ("TECHNOLOGY", "SERVICES-PREPACKAGED SOFTWARE"), ("FINANCE", "NATIONAL COMMERCIAL BANKS"),
+    ("ENERGY", "PETROLEUM REFINING"), ("LIFE SCIENCES", "PHARMACEUTICAL PREPARATIONS"),
+    ("MANUFACTURING", "MOTOR VEHICLES & PASSENGER CAR BODIES"), ("TRADE & SERVICES", "RETAIL-VARIETY STORES"),
+]
+_WORDS = [
+    "Apex", "Blue", "Cedar", "Delta", "Eagle", "Frontier", "Global", "Harbor", "Iron", "Juniper",
+    "Keystone", "Liberty", "Meridian", "North", "Orion", "Pioneer", "Quantum", "River", "Summit", "Titan",
+]
+_KINDS = ["Systems", "Holdings", "Energy", "Bancorp", "Therapeutics", "Motors", "Networks", "Brands"]
+
+
+def _ticker(i: int) -> str:
+    letters = ""
+    n = i + 26 * 26  # start at three letters
+    while n:
+        n, r = divmod(n, 26)
+        letters = chr(65 + r) + letters
+    return letters
+
+
+def _company(i: int) -> str:
+    return f"{_WORDS[i % 20]} {_WORDS[(i // 20) % 20]} {_KINDS[i % len(_KINDS)]} Inc"
+
+
+def universe(size: int) -> Dict[str, str]:
+    """symbol -> company name for the first size tickers (the load test uses this too)"""
+    return {_ticker(i): _company(i) for i in range(size)}
+
+
+NAMES: Dict[str, str] = universe(UNIVERSE)
+SYMBOLS: List[str] = list(NAMES)
+
+app = FastAPI(title="Fake Alpha Vantage")
+calls: Counter = Counter()
+_recent: deque = deque()
+
+
+def _seed(symbol: str) -> int:
+    return zlib.crc32(symbol.encode())
+
+
+def _base_price(symbol: str) -> float:
+    return 5 + _seed(symbol) % 50000 / 100
+
+
+def _fixture(function: str, symbol: str) -> Optional[Any]:
+    if not FIXTURES:
+        return None
+    for name in (f"{function}_{symbol}.json", f"{function}.json"):
+        path = os.path.join(FIXTURES, name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+    return None
+
+
+def global_quote(symbol: str) -> Dict[str, Any]:
+    if symbol not in NAMES:
+        return {"Global Quote": {}}
+    tick = int(time.time() / TICK)
+    rng = random.Random(_seed(symbol) * 1_000_003 + tick)
+    previous = _base_price(symbol)
+    price = previous * (1 + rng.gauss(0, 0.02))
+    return {"Global Quote": {
+        "01. symbol": symbol,
+        "02. open": f"{previous * (1 + rng.gauss(0, 0.005)):.4f}",
+        "03. high": f"{max(price, previous) * 1.01:.4f}",
+        "04. low": f"{min(price, previous) * 0.99:.4f}",
+        "05. price": f"{price:.4f}",
+        "06. volume": str(rng.randint(10_000, 50_000_000)),
+        "07. latest trading day": date.today().isoformat(),
+        "08. previous close": f"{previous:.4f}",
+        "09. change": f"{price - previous:.4f}",
+        "10. change percent": f"{(price - previous) / previous * 100:.4f}%",
+    }}
+
+
+def overview(symbol: str) -> Dict[str, Any]:
+    if symbol not in NAMES:
+        return {}
+    rng = random.Random(_seed(symbol))
+    sector, industry = SECTORS[_seed(symbol) % len(SECTORS)]
+    price = _base_price(symbol)
+    return {
+        "Symbol": symbol, "AssetType": "Common Stock", "Name": NAMES[symbol],
+        "Description": f"{NAMES[symbol]} is a synthetic company used for load testing. " * 8,
+        "Exchange": "NYSE" if rng.random() < 0.5 else "NASDAQ", "Currency": "USD", "Country": "USA",
+        "Sector": sector, "Industry": industry,
+        "MarketCapitalization": str(int(rng.uniform(1e8, 2e12))),
+        "PERatio": f"{rng.uniform(4, 80):.2f}" if rng.random() < 0.9 else "None",
+        "PEGRatio": f"{rng.uniform(0.5, 3):.3f}", "DividendYield": f"{rng.uniform(0, 0.06):.4f}",
+        "EPS": f"{price / rng.uniform(8, 40):.2f}", "Beta": f"{rng.uniform(0.3, 2.0):.3f}",
+        "52WeekHigh": f"{price * 1.3:.2f}", "52WeekLow": f"{price * 0.7:.2f}",
+        "50DayMovingAverage": f"{price * 1.02:.2f}", "200DayMovingAverage": f"{price * 0.97:.2f}",
+    }
+
+
+def symbol_search(keywords: str) -> Dict[str, Any]:
+    query = keywords.upper()
+    matches = [
+        symbol for symbol in SYMBOLS
+        if symbol.startswith(query) or query in NAMES[symbol].upper()
+    ][:10]
+    return {"bestMatches": [
+        {
+            "1. symbol": symbol, "2. name": NAMES[symbol], "3. type": "Equity", "4. region": "United States",
+            "5. marketOpen": "09:30", "6. marketClose": "16:00", "7. timezone": "UTC-04",
+            "8. currency": "USD", "9. matchScore": "1.0000" if symbol == query else "0.5000",
+        }
+        for symbol in matches
+    ]}
+
+
+def daily_series(symbol: str, outputsize: str) -> Dict[str, Any]:
+    if symbol not in NAMES:
+        return {"Error Message": "Invalid API call."}
+    bars = 100 if outputsize == "compact" else 2000
+    rng = random.Random(_seed(symbol))
+    close = _base_price(symbol)
+    today = date.today()
+    series = {}
+    for i in range(bars):
+        close *= 1 + rng.gauss(0, 0.015)
+        series[(today - timedelta(days=i)).isoformat()] = {
+            "1. open": f"{close * 0.995:.4f}", "2. high": f"{close * 1.01:.4f}",
+            "3. low": f"{close * 0.99:.4f}", "4. close": f"{close:.4f}",
+            "5. volume": str(rng.randint(10_000, 50_000_000)),
+        }
+    return {"Meta Data": {"2. Symbol": symbol}, "Time Series (Daily)": series}
+
+
+def listing_status() -> str:
+    lines = ["symbol,name,exchange,assetType,ipoDate,delistingDate,status"]
+    lines += [f"{symbol},{NAMES[symbol]},NYSE,Stock,2000-01-03,null,Active" for symbol in SYMBOLS]
+    return "\n".join(lines) + "\n"
+
+
+def _throttled() -> bool:
+    if THROTTLE_RATE and random.random() < THROTTLE_RATE:
+        return True
+    if RPM:
+        now = time.monotonic()
+        while _recent and _recent[0] < now - 60:
+            _recent.popleft()
+        if len(_recent) >= RPM:
+            return True
+        _recent.append(now)
+    return False
+
+
+@app.get("/query")
+async def query(request: Request) -> Response:
+    params = request.query_params
+    function = params.get("function", "")
+    symbol = params.get("symbol", "").upper()
+    calls[function] += 1
+    await asyncio.sleep(max(0.0, random.gauss(LATENCY_MS, JITTER_MS)) / 1000)
+
+    if _throttled():
+        calls["throttled"] += 1
+        return JSONResponse({"Note": THROTTLE_NOTE})
+
+    fixture = _fixture(function, symbol)
+    if fixture is not None:
+        return JSONResponse(fixture)
+    if function == "GLOBAL_QUOTE":
+        return JSONResponse(global_quote(symbol))
+    if function == "OVERVIEW":
+        return JSONResponse(overview(symbol))
+    if function == "SYMBOL_SEARCH":
+        return JSONResponse(symbol_search(params.get("keywords", "")))
+    if function == "TIME_SERIES_DAILY":
+        return JSONResponse(daily_series(symbol, params.get("outputsize", "compact")))
+    if function == "LISTING_STATUS":
+        return PlainTextResponse(listing_status(), media_type="text/csv")
+    return JSONResponse({"Error Message": f"Invalid API call: unknown function {function}"})
+
+
+@app.get("/_stats")
+async def stats() -> Dict[str, Any]:
+    return {"calls": dict(calls), "total": sum(v for k, v in calls.items() if k != "throttled"), "symbols": UNIVERSE}
+
+
+@app.post("/_reset")
+async def reset() -> Dict[str, Any]:
+    calls.clear()
+    return {"reset": True}
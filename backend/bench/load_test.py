@@ -0,0 +1,308 @@
+"""Offline load test: the API against the local Alpha Vantage stand-in
+
+Starts bench.fake_alpha_vantage and app.main as uvicorn subprocesses (unless
+--api-url is given), runs scripted workloads and reports throughput, p50/p99
+latency, upstream calls made and the API's resident memory per workload.
+
+  zipf       single quotes for hot symbols drawn from a Zipf distribution
+  typeahead  /api/search for each prefix of company names as a user types
+  batch      /api/batch/quotes watchlists of Zipf-drawn symbols
+  stream     SSE quote streams held open by many clients (fan-out)
+
+Run from backend/:  python -m bench.load_test [--workloads zipf,batch] [--requests 2000]
+                    [--concurrency 50] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from bench.fake_alpha_vantage import universe
+
+WORKLOADS = ("zipf", "typeahead", "batch", "stream")
+
+
+class Recorder:
+    """Latencies and outcomes for one workload"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.statuses: Dict[int, int] = {}
+        self.extra: Dict[str, Any] = {}
+
+    async def get(self, client: httpx.AsyncClient, url: str, **kwargs: Any) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.get(url, **kwargs)
+        except httpx.HTTPError:
+            self.errors += 1
+            return None
+        self.latencies.append(time.perf_counter() - started)
+        self.statuses[response.status_code] = self.statuses.get(response.status_code, 0) + 1
+        if response.status_code >= 500:
+            self.errors += 1
+        return response
+
+
+def zipf_sampler(symbols: List[str], s: float, rng: random.Random):
+    weights = np.cumsum(1.0 / np.arange(1, len(symbols) + 1) ** s).tolist()
+    return lambda k=1: rng.choices(symbols, cum_weights=weights, k=k)
+
+
+async def run_workers(count: int, concurrency: int, job) -> None:
+    """Run job(i) for i in range(count) on `concurrency` workers"""
+    jobs = iter(range(count))
+
+    async def worker() -> None:
+        for i in jobs:
+            await job(i)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def zipf_workload(client, recorder, sample, args) -> None:
+    async def job(i: int) -> None:
+        await recorder.get(client, f"/api/quote/{sample()[0]}")
+
+    await run_workers(args.requests, args.concurrency, job)
+
+
+async def typeahead_workload(client, recorder, names, args) -> None:
+    rng = random.Random(args.seed + 1)
+    queries = []
+    while len(queries) < args.requests:
+        name = rng.choice(names)
+        queries.extend(name[:length] for length in range(1, min(len(name), 12) + 1) if name[length - 1] != " ")
+    queries = queries[:args.requests]
+
+    async def job(i: int) -> None:
+        await recorder.get(client, f"/api/search/{queries[i]}")
+
+    await run_workers(len(queries), args.concurrency, job)
+
+
+async def batch_workload(client, recorder, sample, args) -> None:
+    async def job(i: int) -> None:
+        symbols = ",".join(dict.fromkeys(sample(args.batch_size)))
+        await recorder.get(client, "/api/batch/quotes", params={"symbols": symbols}, timeout=60)
+
+    await run_workers(max(1, args.requests // 10), max(1, args.concurrency // 5), job)
+
+
+async def stream_workload(client, recorder, sample, args) -> None:
+    """Hold args.streams SSE connections for args.duration seconds; latency is time to first event"""
+    events = 0
+    first_event: List[float] = []
+
+    async def subscriber() -> None:
+        nonlocal events
+        symbols = ",".join(dict.fromkeys(sample(5)))
+        started = time.perf_counter()
+        received = 0
+        try:
+            async with client.stream("GET", "/api/stream/quotes", params={"symbols": symbols}, timeout=None) as response:
+                recorder.statuses[response.status_code] = recorder.statuses.get(response.status_code, 0) + 1
+                async for line in response.aiter_lines():
+                    if line.startswith("event: quote"):
+                        if not received:
+                            first_event.append(time.perf_counter() - started)
+                        received += 1
+                        events += 1
+        except httpx.HTTPError:
+            recorder.errors += 1
+
+    tasks = [asyncio.create_task(subscriber()) for _ in range(args.streams)]
+    await asyncio.sleep(args.duration)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    recorder.latencies = first_event
+    recorder.extra = {"streams": args.streams, "events": events, "events_per_second": round(events / args.duration, 1)}
+
+
+def rss_bytes(pid: Optional[int]) -> Optional[int]:
+    """Resident set size of a process (Linux /proc only)"""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+async def upstream_calls(fake_url: str) -> int:
+    async with httpx.AsyncClient(base_url=fake_url) as client:
+        return (await client.get("/_stats")).json()["total"]
+
+
+def ensure_free(port: int) -> None:
+    """Refuse to start when something already listens on port (it would be measured instead)"""
+    with socket.socket() as sock:
+        if sock.connect_ex(("127.0.0.1", port)) == 0:
+            raise RuntimeError(f"Port {port} is already in use; stop that server or pass --port")
+
+
+async def wait_ready(url: str, path: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while True:
+            try:
+                if (await client.get(path)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up")
+            await asyncio.sleep(0.2)
+
+
+def spawn(module: str, port: int, env: Dict[str, str], quiet: bool) -> subprocess.Popen:
+    output = subprocess.DEVNULL if quiet else None
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", module, "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env},
+        stdout=output,
+        stderr=output,
+    )
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    companies = universe(args.symbols)
+    symbols, names = list(companies), list(companies.values())
+    rng = random.Random(args.seed)
+    sample = zipf_sampler(symbols, args.zipf, rng)
+
+    processes: List[subprocess.Popen] = []
+    api_url, fake_url, api_pid = args.api_url, args.fake_url, None
+    data_dir = tempfile.mkdtemp(prefix="stockgpt-load-")
+    try:
+        if api_url is None:
+            ensure_free(args.port)
+            ensure_free(args.port + 1)
+            fake_url = f"http://127.0.0.1:{args.port + 1}"
+            processes.append(spawn("bench.fake_alpha_vantage:app", args.port + 1, {
+                "FAKE_AV_SYMBOLS": str(args.symbols),
+                "FAKE_AV_LATENCY_MS": str(args.upstream_latency),
+                "FAKE_AV_THROTTLE_RATE": str(args.throttle_rate),
+            }, args.quiet))
+            await wait_ready(fake_url, "/_stats")
+            api_url = f"http://127.0.0.1:{args.port}"
+            api = spawn("app.main:app", args.port, {
+                "ALPHA_VANTAGE_URL": f"{fake_url}/query",
+                # Quota is the fake server's business here; the scheduler must not be the bottleneck
+                "ALPHA_VANTAGE_RPM": "1000000",
+                "ALPHA_VANTAGE_RPD": "100000000",
+                "STREAM_POLL_INTERVAL": "1",
+                "HISTORY_PATH": os.path.join(data_dir, "history"),
+                "ROLLING_STATE_PATH": os.path.join(data_dir, "rolling_state.json"),
+                "SYMBOL_LISTING_PATH": os.path.join(data_dir, "listing_status.csv"),
+                "PROFILE_DIR": os.path.join(data_dir, "profiles"),
+                "CACHE_SNAPSHOT_PATH": os.path.join(data_dir, "cache_snapshot.gz"),
+                # Keep the run offline: no hedges to real providers
+                "MARKET_DATA_PROVIDERS": "alphavantage",
+                "REDIS_URL": os.getenv("REDIS_URL", ""),
+            }, args.quiet)
+            processes.append(api)
+            api_pid = api.pid
+            await wait_ready(api_url, "/health")
+            # Let the symbol index download the fake listing before type-ahead runs
+            await asyncio.sleep(2)
+
+        results = []
+        limits = httpx.Limits(max_connections=args.concurrency + args.streams, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=api_url, limits=limits, timeout=30) as client:
+            for name in args.workloads:
+                recorder = Recorder(name)
+                calls_before = await upstream_calls(fake_url) if fake_url else None
+                started = time.perf_counter()
+                if name == "zipf":
+                    await zipf_workload(client, recorder, sample, args)
+                elif name == "typeahead":
+                    await typeahead_workload(client, recorder, names, args)
+                elif name == "batch":
+                    await batch_workload(client, recorder, sample, args)
+                elif name == "stream":
+                    await stream_workload(client, recorder, sample, args)
+                elapsed = time.perf_counter() - started
+                latencies = np.array(recorder.latencies) * 1000
+                results.append({
+                    "workload": name,
+                    "requests": len(recorder.latencies),
+                    "errors": recorder.errors,
+                    "statuses": recorder.statuses,
+                    "seconds": round(elapsed, 2),
+                    "throughput": round(len(latencies) / elapsed, 1) if name != "stream" else None,
+                    "p50_ms": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+                    "p99_ms": round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+                    "upstream_calls": (await upstream_calls(fake_url)) - calls_before if fake_url else None,
+                    "rss_mb": round(rss_bytes(api_pid) / 2**20, 1) if rss_bytes(api_pid) else None,
+                    **recorder.extra,
+                })
+        return results
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def report(results: List[Dict[str, Any]]) -> None:
+    columns = ("workload", "requests", "errors", "throughput", "p50_ms", "p99_ms", "upstream_calls", "rss_mb")
+    print(" ".join(f"{column:>14}" for column in columns))
+    for row in results:
+        print(" ".join(f"{'-' if row.get(column) is None else row[column]!s:>14}" for column in columns))
+    for row in results:
+        if row["workload"] == "stream":
+            print(f"stream: {row['streams']} clients, {row['events']} events ({row['events_per_second']}/s); "
+                  f"p50/p99 are time to first event")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), type=lambda v: v.split(","))
+    parser.add_argument("--requests", type=int, default=2000, help="requests per workload")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--symbols", type=int, default=2000, help="size of the fake universe")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of symbol popularity")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--streams", type=int, default=200, help="concurrent SSE clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to hold streams open")
+    parser.add_argument("--upstream-latency", type=float, default=80.0, help="fake upstream latency (ms)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of upstream calls throttled")
+    parser.add_argument("--port", type=int, default=8097, help="API port; the fake upstream uses port + 1")
+    parser.add_argument("--api-url", help="test an already running API instead of spawning one")
+    parser.add_argument("--fake-url", help="fake upstream URL for call counts when --api-url is used")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--quiet", action="store_true", help="hide server logs")
+    args = parser.parse_args()
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(main(args))
+    report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,56 @@
+"""Local stand-in for an OpenAI-compatible chat completions endpoint
+
+Streams a canned answer word by word with a fixed per-token delay, so /api/ask
+can be exercised and timed without a real model or API key.
+
+Run from backend/:  python -m uvicorn bench.stub_llm:app --port 8099
+then start the API with OPENAI_BASE_URL=http://127.0.0.1:8099/v1
+"""
+import asyncio
+import json
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+TOKEN_DELAY = float(os.getenv("STUB_TOKEN_DELAY", "0.02"))
+FIRST_TOKEN_DELAY = float(os.getenv("STUB_FIRST_TOKEN_DELAY", "0.3"))
+
+app = FastAPI(title="Stub chat completions server")
+calls = {"count": 0}
+
+
+def _chunk(content=None, finish_reason=None) -> str:
+    delta = {"content": content} if content is not None else {}
+    payload = {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "stub",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    calls["count"] += 1
+    question = body["messages"][-1]["content"].rsplit("Question:", 1)[-1].strip()
+    words = f"Stub answer to: {question} Prices move; this is not financial advice.".split(" ")
+
+    async def stream():
+        await asyncio.sleep(FIRST_TOKEN_DELAY)
+        for i, word in enumerate(words):
+            yield _chunk(word if i == 0 else f" {word}")
+            await asyncio.sleep(TOKEN_DELAY)
+        yield _chunk(finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.get("/calls")
+async def get_calls():
+    return calls
@@ -0,0 +1,209 @@
+"""/api/ask against the local stub model server, and the answer cache behind it"""
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.llm import AnswerCache
+from app.models import StockOverview, StockQuote
+from bench import stub_llm
+
+DAY = "2026-10-16"
+
+
+def events(body: str):
+    """(event, data) pairs of an SSE body, skipping comments"""
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        lines = [line for line in block.split("\n") if not line.startswith(":")]
+        if not lines:
+            continue
+        event = next(line[6:].strip() for line in lines if line.startswith("event:"))
+        data = json.loads(next(line[5:] for line in lines if line.startswith("data:")))
+        parsed.append((event, data))
+    return parsed
+
+
+def names(parsed):
+    return [event for event, _ in parsed]
+
+
+class Upstream:
+    """Market data and MCP stand-ins that count calls"""
+
+    def __init__(self):
+        self.calls = {"quote": 0, "overview": 0, "project": 0, "context": 0}
+
+    async def quote(self, symbol, queue_timeout=None):
+        self.calls["quote"] += 1
+        return StockQuote(symbol=symbol, price=142.5, change=1.25, change_percent="0.8850%", latest_trading_day=DAY)
+
+    async def overview(self, symbol, queue_timeout=None):
+        self.calls["overview"] += 1
+        return StockOverview(symbol=symbol, name="International Business Machines", sector="TECHNOLOGY")
+
+    async def project(self, symbol):
+        self.calls["project"] += 1
+        return None
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    upstream = Upstream()
+    monkeypatch.setattr(main.market_data, "get_stock_quote", upstream.quote)
+    monkeypatch.setattr(main.market_data, "get_stock_overview", upstream.overview)
+    monkeypatch.setattr(main.mcp_client, "project_analysis", upstream.project)
+
+    build = main.build_ask_context
+
+    async def counting_build(symbol):
+        upstream.calls["context"] += 1
+        return await build(symbol)
+
+    monkeypatch.setattr(main, "build_ask_context", counting_build)
+    monkeypatch.setattr(main, "answer_cache", AnswerCache())
+    main.cache_service.clear()
+    main.overview_store.clear()
+    yield upstream
+    main.cache_service.clear()
+    main.overview_store.clear()
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    """Route the LLM client to bench.stub_llm in-process, without token delays"""
+    monkeypatch.setattr(stub_llm, "TOKEN_DELAY", 0.0)
+    monkeypatch.setattr(stub_llm, "FIRST_TOKEN_DELAY", 0.0)
+    stub_llm.calls["count"] = 0
+    use_model(monkeypatch, httpx.ASGITransport(app=stub_llm.app))
+    return stub_llm.calls
+
+
+def use_model(monkeypatch, transport):
+    client = main.llm_client
+    monkeypatch.setattr(client, "base_url", "http://stub/v1")
+    monkeypatch.setattr(client, "_client", httpx.AsyncClient(transport=transport, base_url="http://stub/v1"))
+
+
+def ask(question: str, symbol: str = "IBM"):
+    response = _client().post("/api/ask", json={"question": question, "symbol": symbol})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return events(response.text)
+
+
+def _client() -> TestClient:
+    # Not entered as a context manager, so the lifespan (pollers, snapshot, upstream pool) never starts
+    return TestClient(main.app)
+
+
+def test_answer_cache_exact_match_after_normalization():
+    cache = AnswerCache()
+    cache.set("IBM", DAY, "What is the outlook for IBM?", "answer")
+
+    assert cache.get("IBM", DAY, "  what is THE outlook for ibm ") == "answer"
+    assert cache.stats["exact_hits"] == 1
+
+
+def test_answer_cache_semantic_match_and_miss():
+    cache = AnswerCache(similarity=0.8)
+    cache.set("IBM", DAY, "What is the outlook for IBM?", "answer")
+
+    assert cache.get("IBM", DAY, "IBM outlook please") == "answer"
+    assert cache.get("IBM", DAY, "Should I worry about IBM debt levels?") is None
+    assert cache.stats["semantic_hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_answer_cache_is_per_symbol_and_day():
+    cache = AnswerCache()
+    cache.set("IBM", DAY, "What is the outlook for IBM?", "answer")
+
+    assert cache.get("IBM", "2026-10-19", "What is the outlook for IBM?") is None
+    assert cache.get("MSFT", DAY, "What is the outlook for IBM?") is None
+
+
+def test_answer_cache_bounds_buckets_and_questions():
+    cache = AnswerCache(max_buckets=2, per_bucket=2)
+    for symbol in ("A", "B", "C"):
+        cache.set(symbol, DAY, "outlook", symbol)
+    for i in range(3):
+        cache.set("C", DAY, f"question {i}", str(i))
+
+    assert cache.get("A", DAY, "outlook") is None
+    assert cache.get("C", DAY, "question 0") is None
+    assert cache.get("C", DAY, "question 2") == "2"
+
+
+def test_ask_streams_context_tokens_done(upstream, stub_model):
+    parsed = ask("What is the outlook for IBM?")
+
+    assert parsed[0][0] == "context"
+    assert parsed[0][1]["symbol"] == "IBM"
+    assert parsed[0][1]["stock_data"]["latestPrice"] == 142.5
+    assert parsed[0][1]["stock_data"]["companyName"] == "International Business Machines"
+    assert set(names(parsed[1:-1])) == {"token"} and len(parsed) > 3
+    assert parsed[-1] == ("done", {"cached": False})
+    answer = "".join(data["text"] for event, data in parsed if event == "token")
+    assert answer.startswith("Stub answer to: What is the outlook for IBM?")
+    assert stub_model["count"] == 1
+
+
+def test_exact_cache_hit_skips_model_and_market_data(upstream, stub_model):
+    first = ask("What is the outlook for IBM?")
+    calls = dict(upstream.calls)
+
+    second = ask("what is the outlook for ibm")
+
+    assert names(second) == ["context", "token", "done"]
+    assert second[-1] == ("done", {"cached": True})
+    assert second[1][1]["text"] == "".join(data["text"] for event, data in first if event == "token")
+    assert second[0][1]["stock_data"]["latestPrice"] == 142.5
+    assert stub_model["count"] == 1
+    # Answered from the cache before any context was built
+    assert upstream.calls == calls
+
+
+def test_semantic_cache_hit(upstream, stub_model):
+    ask("What is the outlook for IBM?")
+
+    parsed = ask("IBM outlook please")
+
+    assert parsed[-1] == ("done", {"cached": True})
+    assert stub_model["count"] == 1
+
+
+def test_different_question_calls_the_model(upstream, stub_model):
+    ask("What is the outlook for IBM?")
+
+    parsed = ask("Should I worry about IBM debt levels?")
+
+    assert parsed[-1] == ("done", {"cached": False})
+    assert stub_model["count"] == 2
+
+
+def test_model_failure_streams_error_and_caches_nothing(upstream, monkeypatch):
+    use_model(monkeypatch, httpx.MockTransport(lambda request: httpx.Response(500, text="model overloaded")))
+
+    parsed = ask("What is the outlook for IBM?")
+
+    assert names(parsed) == ["context", "error"]
+    assert "unavailable" in parsed[-1][1]["detail"]
+    assert main.answer_cache.get("IBM", DAY, "What is the outlook for IBM?") is None
+
+
+def test_unreachable_model_streams_error(upstream, monkeypatch):
+    def refuse(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    use_model(monkeypatch, httpx.MockTransport(refuse))
+
+    assert names(ask("What is the outlook for IBM?")) == ["context", "error"]
+
+
+def test_empty_question_is_rejected(upstream, stub_model):
+    response = _client().post("/api/ask", json={"question": "   ", "symbol": "IBM"})
+
+    assert response.status_code == 400
+    assert stub_model["count"] == 0
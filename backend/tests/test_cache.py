@@ -0,0 +1,209 @@
+"""CacheService: LRU and byte budgets, expiry and the sweeper, and encoded bodies kept on entries"""
+import asyncio
+
+from starlette.requests import Request
+
+import app.responses as responses
+from app.cache import CacheService
+from app.models import StockOverview, StockQuote
+from app.quote_store import QuoteStore
+from app.responses import cached_json_response
+
+
+def quote(symbol: str = "IBM", price: float = 101.25) -> StockQuote:
+    return StockQuote(symbol=symbol, price=price, change=1.5, change_percent="1.5038%", volume=1200,
+                      latest_trading_day="2026-10-16")
+
+
+def request(**headers) -> Request:
+    return Request({"type": "http", "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+
+def count_encodes(monkeypatch):
+    encodes = []
+    encode = responses.EncodedBody
+
+    def counting(data, tag=None):
+        encodes.append(data)
+        return encode(data, tag)
+
+    monkeypatch.setattr(responses, "EncodedBody", counting)
+    return encodes
+
+
+def serve(cache: CacheService, key: str, **headers):
+    entry = cache.lookup(key)
+    return cached_json_response(request(**headers), entry.data, 0.0, cache, key)
+
+
+def test_stored_quote_is_encoded_once(monkeypatch):
+    encodes = count_encodes(monkeypatch)
+    cache = CacheService(stores={"quote": QuoteStore()})
+    cache.set("quote_IBM", quote())
+
+    bodies = [serve(cache, "quote_IBM").body for _ in range(3)]
+
+    assert len(encodes) == 1
+    assert bodies[0] == bodies[1] == bodies[2]
+
+
+def test_stored_quote_is_reencoded_after_the_row_changes(monkeypatch):
+    encodes = count_encodes(monkeypatch)
+    store = QuoteStore()
+    cache = CacheService(stores={"quote": store})
+    cache.set("quote_IBM", quote())
+    first = serve(cache, "quote_IBM")
+
+    # Written behind the cache's back, e.g. by a bulk update
+    store.update(quote(price=99.0))
+    second = serve(cache, "quote_IBM")
+
+    assert len(encodes) == 2
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert b"99.0" in second.body
+
+
+def test_overview_is_encoded_once_and_answers_if_none_match(monkeypatch):
+    encodes = count_encodes(monkeypatch)
+    cache = CacheService()
+    cache.set("overview_IBM", StockOverview(symbol="IBM", name="International Business Machines"))
+    etag = serve(cache, "overview_IBM").headers["ETag"]
+
+    response = serve(cache, "overview_IBM", if_none_match=etag)
+
+    assert response.status_code == 304
+    assert len(encodes) == 1
+
+
+def test_store_rows_outlive_evicted_and_expired_entries():
+    store = QuoteStore()
+    cache = CacheService(max_entries=1, max_staleness={"quote": 0}, stores={"quote": store})
+    cache.set("quote_IBM", quote("IBM"))
+    # Evicts IBM, then expires at once
+    cache.set("quote_MSFT", quote("MSFT"), ttl=0)
+
+    assert cache.sweep() == 1
+    assert len(cache.cache) == 0
+    # The cache no longer serves them, but movers and screens still see both
+    assert store.get("IBM") == quote("IBM") and store.get("MSFT") == quote("MSFT")
+    gainers, _ = store.movers()
+    assert {q.symbol for q in gainers} == {"IBM", "MSFT"}
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def clocked(**kwargs):
+    cache = CacheService(**kwargs)
+    cache._current_time = clock = Clock()
+    return cache, clock
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache, _ = clocked(max_entries=2)
+    cache.set("search_a", "a")
+    cache.set("search_b", "b")
+    cache.get("search_a")
+
+    cache.set("search_c", "c")
+
+    assert "search_b" not in cache
+    assert cache.get("search_a") == "a" and cache.get("search_c") == "c"
+    assert cache.get_stats()["namespaces"]["search"]["evictions"] == 1
+
+
+def test_byte_budget_evicts_until_within_limit():
+    cache, _ = clocked(max_bytes=100)
+    cache.set("search_a", "x" * 40)
+    cache.set("search_b", "y" * 40)
+
+    cache.set("search_c", "z" * 40)
+
+    assert "search_a" not in cache
+    assert cache.total_bytes <= 100
+    assert cache.total_bytes == sum(entry.size for entry in cache.cache.values())
+
+
+def test_attached_bodies_count_against_the_byte_budget():
+    cache, _ = clocked(max_bytes=200)
+    cache.set("search_a", "a")
+    entry = cache.set("search_b", "b")
+
+    cache.attach("search_b", entry, "", b"encoded", 195)
+
+    assert "search_a" not in cache and "search_b" in cache
+    assert cache.total_bytes == entry.size
+
+
+def test_expired_entry_is_served_stale_until_max_staleness():
+    cache, clock = clocked(namespace_ttls={"quote": 60}, max_staleness={"quote": 120})
+    cache.set("quote_IBM", "ibm")
+
+    clock.now += 61
+    assert cache.get("quote_IBM") is None
+    assert cache.lookup("quote_IBM").data == "ibm"
+
+    clock.now += 120
+    assert cache.lookup("quote_IBM") is None
+    stats = cache.get_stats()["namespaces"]["quote"]
+    assert (stats["stale_hits"], stats["expirations"], stats["misses"]) == (2, 1, 1)
+
+
+def test_age_passed_to_set_is_kept_on_the_entry():
+    cache, clock = clocked()
+    cache.set("overview_IBM", "ibm", age=90)
+
+    clock.now += 10
+
+    assert cache.lookup("overview_IBM").age(cache.now()) == 100
+
+
+def test_sweep_removes_only_entries_past_max_staleness():
+    cache, clock = clocked(namespace_ttls={"quote": 60, "search": 3600}, max_staleness={"quote": 0, "search": 0})
+    cache.set("quote_IBM", "ibm")
+    cache.set("search_ib", "results")
+    # Overwritten: its first heap item is dead and must be skipped
+    cache.set("quote_MSFT", "old")
+    clock.now += 30
+    cache.set("quote_MSFT", "new")
+
+    clock.now += 31
+    assert cache.sweep() == 1
+    assert list(cache.cache) == ["search_ib", "quote_MSFT"]
+
+    clock.now += 30
+    assert cache.sweep() == 1
+    assert list(cache.cache) == ["search_ib"]
+
+
+def test_sweep_compacts_dead_heap_items():
+    cache, _ = clocked()
+    for _ in range(200):
+        cache.set("search_ib", "results")
+
+    cache.sweep()
+
+    assert len(cache._expiry_heap) == 1
+
+
+def test_sweeper_task_runs_periodically():
+    cache, clock = clocked(namespace_ttls={"quote": 1}, max_staleness={"quote": 0}, sweep_interval=0.01)
+
+    async def scenario():
+        cache.set("quote_IBM", "ibm")
+        clock.now += 2
+        cache.start_sweeper()
+        for _ in range(100):
+            if not cache.cache:
+                break
+            await asyncio.sleep(0.01)
+        await cache.stop_sweeper()
+
+    asyncio.run(scenario())
+
+    assert not cache.cache and cache._sweeper is None
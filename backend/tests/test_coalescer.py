@@ -0,0 +1,125 @@
+"""RequestCoalescer: one upstream fetch per key for concurrent callers"""
+import asyncio
+
+import pytest
+
+from app.services import RequestCoalescer
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Fetch:
+    """Upstream stand-in that blocks until released and counts calls"""
+
+    def __init__(self, value="value", error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        if self.release is None:
+            self.release = asyncio.Event()
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+async def started(coalescer: RequestCoalescer, key: str, fetch: Fetch, callers: int):
+    tasks = [asyncio.ensure_future(coalescer.run(key, fetch)) for _ in range(callers)]
+    while fetch.release is None:
+        await asyncio.sleep(0)
+    return tasks
+
+
+def test_concurrent_callers_share_one_fetch():
+    coalescer = RequestCoalescer()
+    fetch = Fetch()
+
+    async def scenario():
+        tasks = await started(coalescer, "quote_IBM", fetch, 5)
+        fetch.release.set()
+        return await asyncio.gather(*tasks)
+
+    assert run(scenario()) == ["value"] * 5
+    assert fetch.calls == 1
+    assert coalescer.get_stats() == {"leaders": 1, "coalesced": 4, "errors": 0, "in_flight": 0}
+
+
+def test_different_keys_fetch_separately():
+    coalescer = RequestCoalescer()
+    fetches = {"quote_IBM": Fetch("ibm"), "quote_MSFT": Fetch("msft")}
+
+    async def scenario():
+        tasks = [await started(coalescer, key, fetch, 2) for key, fetch in fetches.items()]
+        for fetch in fetches.values():
+            fetch.release.set()
+        return [await asyncio.gather(*group) for group in tasks]
+
+    assert run(scenario()) == [["ibm", "ibm"], ["msft", "msft"]]
+    assert [fetch.calls for fetch in fetches.values()] == [1, 1]
+
+
+def test_error_reaches_every_waiter_and_is_not_remembered():
+    coalescer = RequestCoalescer()
+    failing = Fetch(error=RuntimeError("upstream down"))
+
+    async def scenario():
+        tasks = await started(coalescer, "quote_IBM", failing, 3)
+        failing.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # The next call starts a new fetch instead of replaying the error
+        retry = Fetch("recovered")
+        task = asyncio.ensure_future(coalescer.run("quote_IBM", retry))
+        while retry.release is None:
+            await asyncio.sleep(0)
+        retry.release.set()
+        return results, await task
+
+    results, retried = run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert failing.calls == 1
+    assert retried == "recovered"
+    assert coalescer.stats["errors"] == 1
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    coalescer = RequestCoalescer()
+    fetch = Fetch()
+
+    async def scenario():
+        first, second = await started(coalescer, "quote_IBM", fetch, 2)
+        first.cancel()
+        await asyncio.sleep(0)
+        fetch.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert run(scenario()) == "value"
+    assert fetch.calls == 1
+    assert coalescer.get_stats()["in_flight"] == 0
+
+
+def test_fetch_survives_when_every_caller_cancels():
+    coalescer = RequestCoalescer()
+    fetch = Fetch()
+
+    async def scenario():
+        (caller,) = await started(coalescer, "quote_IBM", fetch, 1)
+        caller.cancel()
+        await asyncio.sleep(0)
+        # Still in flight: a new caller joins it rather than starting another fetch
+        joined = asyncio.ensure_future(coalescer.run("quote_IBM", fetch))
+        await asyncio.sleep(0)
+        fetch.release.set()
+        return await joined
+
+    assert run(scenario()) == "value"
+    assert fetch.calls == 1
+    assert coalescer.stats["coalesced"] == 1
@@ -0,0 +1,95 @@
+"""Daily history ingestion and how Alpha Vantage notices are classified"""
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+
+from app.history import COLUMNS, HistoryService, HistoryStore
+from app.providers import ProviderNotEntitled
+from app.ratelimit import UpstreamThrottled
+from app.services import StockService
+
+PREMIUM_NOTICE = (
+    "Thank you for using Alpha Vantage! The outputsize=full parameter value is a premium feature for the "
+    "TIME_SERIES_DAILY endpoint. You may subscribe to any of the premium plans at "
+    "https://www.alphavantage.co/premium/ to instantly unlock all premium features"
+)
+RATE_LIMIT_NOTE = (
+    "Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day. Please subscribe "
+    "to any of the premium plans at https://www.alphavantage.co/premium/ to instantly remove all daily rate limits."
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def bars(days):
+    n = len(days)
+    return {
+        "date": np.asarray(days, dtype=COLUMNS["date"]),
+        "open": np.full(n, 10.0),
+        "high": np.full(n, 11.0),
+        "low": np.full(n, 9.0),
+        "close": np.full(n, 10.5),
+        "volume": np.full(n, 1000, dtype=COLUMNS["volume"]),
+    }
+
+
+class DailyFetch:
+    """fetch_daily stand-in recording the outputsize of each call"""
+
+    def __init__(self, entitled_to_full: bool = True):
+        self.entitled_to_full = entitled_to_full
+        self.outputsizes = []
+
+    async def __call__(self, symbol, outputsize):
+        self.outputsizes.append(outputsize)
+        if outputsize == "full" and not self.entitled_to_full:
+            raise ProviderNotEntitled(PREMIUM_NOTICE)
+        return bars([20000, 20001])
+
+
+def test_first_ingest_is_compact_by_default(tmp_path):
+    fetch = DailyFetch()
+    service = HistoryService(HistoryStore(str(tmp_path)), fetch, full_history=False)
+
+    assert run(service.ingest("IBM")) == 2
+    assert fetch.outputsizes == ["compact"]
+
+
+def test_full_history_falls_back_to_compact_when_not_entitled(tmp_path):
+    fetch = DailyFetch(entitled_to_full=False)
+    service = HistoryService(HistoryStore(str(tmp_path)), fetch, full_history=True)
+
+    assert run(service.ingest("IBM")) == 2
+    assert run(service.ingest("MSFT")) == 2
+    # Not asked for full again once the key turned out not to have it
+    assert fetch.outputsizes == ["full", "compact", "compact"]
+
+
+def test_full_history_is_opt_in(tmp_path):
+    fetch = DailyFetch()
+    service = HistoryService(HistoryStore(str(tmp_path)), fetch, full_history=True)
+
+    run(service.ingest("IBM"))
+    run(service.ingest("IBM"))
+
+    assert fetch.outputsizes == ["full", "compact"]
+
+
+@pytest.mark.parametrize("payload, error", [
+    ({"Information": PREMIUM_NOTICE}, ProviderNotEntitled),
+    ({"Information": "This is a premium endpoint. You may subscribe to any of the premium plans."}, ProviderNotEntitled),
+    ({"Information": RATE_LIMIT_NOTE}, UpstreamThrottled),
+    ({"Note": "Our standard API call frequency is 5 calls per minute and 500 calls per day."}, UpstreamThrottled),
+])
+def test_request_tells_entitlement_notices_from_rate_limits(payload, error):
+    service = StockService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=payload)))
+
+    with pytest.raises(error):
+        run(service._request({"function": "TIME_SERIES_DAILY", "symbol": "IBM"}))
+    # Entitlement notices are an answer from a reachable upstream, not a failure streak
+    assert service.consecutive_failures == 0
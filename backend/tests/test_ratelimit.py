@@ -0,0 +1,196 @@
+"""TokenBucket and the UpstreamScheduler: priorities, budgets, shedding and backoff"""
+import asyncio
+
+import pytest
+
+from app.ratelimit import Priority, RateLimitExceeded, TokenBucket, UpstreamScheduler, UpstreamThrottled
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def call(log, name, result=None, error=None):
+    """Upstream call stand-in that records when it was dispatched"""
+    async def fn():
+        log.append(name)
+        if error is not None:
+            raise error
+        return name if result is None else result
+    return fn
+
+
+async def stopped(scheduler: UpstreamScheduler, coro):
+    try:
+        return await coro
+    finally:
+        await scheduler.stop()
+
+
+@pytest.mark.parametrize("rate, period", [(0, 60), (-1, 60), (5, 0)])
+def test_token_bucket_rejects_non_positive_rates(rate, period):
+    with pytest.raises(ValueError):
+        TokenBucket(rate, period)
+
+
+def test_token_bucket_take_and_drain():
+    bucket = TokenBucket(2, period=60)
+
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.time_until_available() == pytest.approx(30, abs=0.1)
+
+    bucket._tokens = 2.0
+    bucket.drain()
+    assert bucket.available() == pytest.approx(0, abs=0.01)
+
+
+def test_higher_priorities_dispatch_first_and_fifo_within_one():
+    scheduler = UpstreamScheduler(per_minute=10, per_day=100)
+    log = []
+    submitted = [
+        (Priority.SEARCH, "search"),
+        (Priority.OVERVIEW, "overview"),
+        (Priority.QUOTE, "quote 1"),
+        (Priority.QUOTE, "quote 2"),
+    ]
+
+    async def scenario():
+        # Queued in the same loop turn, before the dispatcher first runs
+        return await asyncio.gather(*(scheduler.submit(call(log, name), priority) for priority, name in submitted))
+
+    results = run(stopped(scheduler, scenario()))
+
+    assert results == ["search", "overview", "quote 1", "quote 2"]
+    assert log == ["quote 1", "quote 2", "overview", "search"]
+    assert scheduler.stats["dispatched"] == 4
+
+
+def test_queue_timeout_when_the_minute_budget_is_spent():
+    scheduler = UpstreamScheduler(per_minute=1, per_day=100)
+    log = []
+
+    async def scenario():
+        await scheduler.submit(call(log, "first"))
+        with pytest.raises(RateLimitExceeded) as raised:
+            await scheduler.submit(call(log, "second"), timeout=0.05)
+        return raised.value
+
+    error = run(stopped(scheduler, scenario()))
+
+    assert log == ["first"]
+    assert error.retry_after > 1
+    assert scheduler.stats["timed_out"] == 1
+
+
+def test_daily_budget_is_enforced():
+    scheduler = UpstreamScheduler(per_minute=10, per_day=1)
+    log = []
+
+    async def scenario():
+        await scheduler.submit(call(log, "first"))
+        with pytest.raises(RateLimitExceeded):
+            await scheduler.submit(call(log, "second"))
+
+    run(stopped(scheduler, scenario()))
+
+    assert log == ["first"]
+    assert scheduler.get_stats()["daily_remaining"] == 0
+
+
+def test_low_priorities_are_shed_near_the_daily_reserve():
+    scheduler = UpstreamScheduler(per_minute=10, per_day=10, background_reserve=0.2, search_reserve=0.05)
+    scheduler.daily_budget.used = 8
+    log = []
+
+    async def scenario():
+        with pytest.raises(RateLimitExceeded):
+            await scheduler.submit(call(log, "background"), Priority.BACKGROUND)
+        # Search and quotes may still use what background work leaves
+        await scheduler.submit(call(log, "search"), Priority.SEARCH)
+        await scheduler.submit(call(log, "quote"), Priority.QUOTE)
+
+    run(stopped(scheduler, scenario()))
+
+    assert log == ["search", "quote"]
+    assert scheduler.stats["shed"] == 1
+
+
+def test_background_work_is_shed_while_anything_is_queued():
+    scheduler = UpstreamScheduler(per_minute=1, per_day=100)
+    log = []
+
+    async def scenario():
+        await scheduler.submit(call(log, "first"))
+        waiting = asyncio.ensure_future(scheduler.submit(call(log, "queued")))
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimitExceeded):
+            await scheduler.submit(call(log, "background"), Priority.BACKGROUND)
+        waiting.cancel()
+
+    run(stopped(scheduler, scenario()))
+
+    assert log == ["first"]
+
+
+def test_throttle_backs_off_and_success_decays_it():
+    scheduler = UpstreamScheduler(per_minute=10, per_day=100, min_backoff=15, max_backoff=300)
+    log = []
+
+    async def scenario():
+        with pytest.raises(UpstreamThrottled) as raised:
+            await scheduler.submit(call(log, "throttled", error=UpstreamThrottled("Note")))
+        # Dispatch is paused, so a quote can't get through within its queue timeout
+        with pytest.raises(RateLimitExceeded):
+            await scheduler.submit(call(log, "paused"), timeout=0.05)
+        return raised.value
+
+    error = run(stopped(scheduler, scenario()))
+
+    assert log == ["throttled"]
+    assert error.retry_after == pytest.approx(15, abs=1)
+    assert scheduler.stats["throttled"] == 1
+    assert scheduler.get_stats()["backoff_seconds"] > 0
+    assert scheduler.minute_bucket.available() < 1
+
+    scheduler.report_throttled()
+    assert scheduler._backoff == 30
+    scheduler.report_success()
+    scheduler.report_success()
+    scheduler.report_success()
+    assert scheduler._backoff == 0
+
+
+def test_caller_that_gives_up_is_not_dispatched():
+    scheduler = UpstreamScheduler(per_minute=1, per_day=100)
+    log = []
+
+    async def scenario():
+        await scheduler.submit(call(log, "first"))
+        abandoned = asyncio.ensure_future(scheduler.submit(call(log, "abandoned")))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        await asyncio.sleep(0)
+        return scheduler.get_stats()["queued"]
+
+    queued = run(stopped(scheduler, scenario()))
+
+    assert log == ["first"]
+    assert queued == {}
+
+
+def test_stop_fails_queued_calls():
+    scheduler = UpstreamScheduler(per_minute=1, per_day=100)
+    log = []
+
+    async def scenario():
+        await scheduler.submit(call(log, "first"))
+        waiting = asyncio.ensure_future(scheduler.submit(call(log, "queued")))
+        await asyncio.sleep(0)
+        await scheduler.stop()
+        with pytest.raises(RateLimitExceeded):
+            await waiting
+
+    run(scenario())
+
+    assert log == ["first"]
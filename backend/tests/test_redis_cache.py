@@ -0,0 +1,250 @@
+"""Two-tier cache: DataLoader with a CacheService L1 over the in-process Redis stand-in"""
+import asyncio
+import time
+
+import pytest
+
+from app.cache import CacheService, StoredEntry
+from app.models import StockOverview, StockQuote, StockSearchResponse, StockSearchResult
+from app.quote_store import QuoteStore
+from app.ratelimit import RateLimitExceeded
+from app.redis_cache import InMemoryRedis, RedisCache, decode_value, encode_value
+from app.services import DataLoader, RequestCoalescer
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def quote(symbol: str = "IBM", price: float = 101.25) -> StockQuote:
+    return StockQuote(symbol=symbol, price=price, change=1.5, change_percent="1.5038%", volume=1200,
+                      latest_trading_day="2026-10-16")
+
+
+def shared_tier(client: InMemoryRedis) -> RedisCache:
+    """A RedisCache bound to an existing stand-in, as another worker would be"""
+    cache = RedisCache(url="memory://")
+    cache.client = client
+    return cache
+
+
+def worker(client: InMemoryRedis, **cache_kwargs):
+    """(loader, L1) for one worker sharing the L2 client"""
+    cache = CacheService(**cache_kwargs)
+    stored = []
+    loader = DataLoader(cache, RequestCoalescer(), shared_tier(client),
+                        on_store=lambda key, data, age: stored.append((key, age)))
+    loader.stored = stored
+    return loader, cache
+
+
+class Fetch:
+    """Upstream stand-in that counts calls"""
+
+    def __init__(self, value=None, error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def fail_if_called():
+    raise AssertionError("upstream must not be called")
+
+
+@pytest.mark.parametrize("value", [
+    quote(),
+    StockOverview(symbol="IBM", name="International Business Machines", sector="TECHNOLOGY", pe_ratio="22.5"),
+    StockSearchResponse(search_term="ib", results=[StockSearchResult(symbol="IBM", name="IBM")]),
+    {"summary": "plain JSON", "score": 3},
+])
+def test_encode_decode_round_trip(value):
+    data, stored_at = decode_value(encode_value(value, 1700000000.123))
+    assert data == value
+    assert stored_at == 1700000000.123
+
+
+def test_fetch_writes_both_tiers():
+    client = InMemoryRedis()
+    loader, cache = worker(client)
+    fetch = Fetch(quote())
+
+    data, age = run(loader.load("quote_IBM", fetch))
+
+    assert data == quote() and age == 0.0 and fetch.calls == 1
+    assert cache.peek("quote_IBM") is not None
+    assert run(client.get("stockgpt:quote_IBM")) is not None
+
+
+def test_l1_miss_is_promoted_from_l2():
+    client = InMemoryRedis()
+    first, _ = worker(client)
+    run(first.load("quote_IBM", Fetch(quote())))
+
+    second, second_l1 = worker(client)
+    data, _ = run(second.load("quote_IBM", fail_if_called))
+
+    assert data == quote()
+    assert second_l1.peek("quote_IBM") is not None
+    assert second.stored == [("quote_IBM", pytest.approx(0.0, abs=1.0))]
+    # Now an L1 hit: no further L2 round trip
+    hits = second.shared_cache.stats["hits"]
+    run(second.load("quote_IBM", fail_if_called))
+    assert second.shared_cache.stats["hits"] == hits
+
+
+def test_promotion_keeps_the_age_from_l2():
+    client = InMemoryRedis()
+    run(client.set("stockgpt:quote_IBM", encode_value(quote(), time.time() - 30), ex=300))
+    loader, cache = worker(client)
+
+    data, age = run(loader.load("quote_IBM", fail_if_called))
+
+    assert data == quote()
+    assert age == pytest.approx(30, abs=1)
+    entry = cache.peek("quote_IBM")
+    # Only the rest of the quote TTL is left in L1
+    assert entry.expiry - cache.now() == pytest.approx(cache.ttl_for("quote_IBM") - 30, abs=1)
+
+
+def test_stale_l2_value_is_served_and_refreshed():
+    client = InMemoryRedis()
+    loader, cache = worker(client)
+    ttl = cache.ttl_for("quote_IBM")
+    run(client.set("stockgpt:quote_IBM", encode_value(quote(price=90.0), time.time() - ttl - 5), ex=300))
+    fetch = Fetch(quote(price=95.0))
+
+    async def scenario():
+        data, age = await loader.load("quote_IBM", fetch)
+        await asyncio.gather(*loader._background)
+        return data, age
+
+    data, age = run(scenario())
+
+    assert data.price == 90.0 and age > ttl
+    assert fetch.calls == 1
+    assert cache.peek("quote_IBM").data.price == 95.0
+
+
+def test_value_past_max_staleness_is_not_promoted():
+    client = InMemoryRedis()
+    loader, cache = worker(client)
+    too_old = cache.ttl_for("quote_IBM") + cache.max_stale_for("quote_IBM") + 10
+    run(client.set("stockgpt:quote_IBM", encode_value(quote(price=1.0), time.time() - too_old), ex=3600))
+    fetch = Fetch(quote())
+
+    data, age = run(loader.load("quote_IBM", fetch))
+
+    assert data == quote() and age == 0.0 and fetch.calls == 1
+
+
+def test_throttled_fetch_is_not_cached_in_either_tier():
+    client = InMemoryRedis()
+    loader, cache = worker(client)
+
+    with pytest.raises(RateLimitExceeded):
+        run(loader.load("quote_IBM", Fetch(error=RateLimitExceeded())))
+
+    assert cache.peek("quote_IBM") is None
+    assert run(client.get("stockgpt:quote_IBM")) is None
+
+
+def test_load_many_uses_one_pipelined_l2_round_trip():
+    client = InMemoryRedis()
+    first, _ = worker(client)
+    for symbol in ("AAA", "BBB"):
+        run(first.load(f"quote_{symbol}", Fetch(quote(symbol))))
+
+    executed = []
+    pipeline = client.pipeline
+
+    def counting_pipeline(transaction=False):
+        pipe = pipeline(transaction)
+        run_commands = pipe.execute
+
+        async def execute():
+            executed.append(len(pipe._commands))
+            return await run_commands()
+
+        pipe.execute = execute
+        return pipe
+
+    client.pipeline = counting_pipeline
+    second, _ = worker(client)
+    fetches = {"quote_CCC": Fetch(quote("CCC")), "quote_DDD": Fetch(error=RuntimeError("upstream down"))}
+
+    loaded = run(second.load_many(
+        ["quote_AAA", "quote_BBB", "quote_CCC", "quote_DDD"],
+        lambda key: fetches.get(key, fail_if_called)
+    ))
+
+    # One pipeline for all four keys; no per-key L2 gets afterwards
+    assert executed == [4]
+    assert loaded["quote_AAA"][0] == quote("AAA")
+    assert loaded["quote_BBB"][0] == quote("BBB")
+    assert loaded["quote_CCC"] == (quote("CCC"), 0.0)
+    assert isinstance(loaded["quote_DDD"], RuntimeError)
+    assert fetches["quote_CCC"].calls == 1
+
+
+def test_load_many_skips_l2_for_keys_already_in_l1():
+    client = InMemoryRedis()
+    loader, _ = worker(client)
+    run(loader.load("quote_AAA", Fetch(quote("AAA"))))
+    requested = []
+    get_many = loader.shared_cache.get_many
+
+    async def spy(keys):
+        requested.append(list(keys))
+        return await get_many(keys)
+
+    loader.shared_cache.get_many = spy
+    run(loader.load_many(["quote_AAA", "quote_BBB"], lambda key: Fetch(quote(key.split("_", 1)[1]))))
+
+    assert requested == [["quote_BBB"]]
+
+
+def test_concurrent_misses_share_one_l2_lookup_and_fetch():
+    client = InMemoryRedis()
+    loader, _ = worker(client)
+    fetch = Fetch(quote())
+
+    async def scenario():
+        return await asyncio.gather(*(loader.load("quote_IBM", fetch) for _ in range(10)))
+
+    results = run(scenario())
+
+    assert fetch.calls == 1
+    assert all(data == quote() for data, _ in results)
+    assert loader.shared_cache.stats["misses"] == 1
+
+
+def test_promoted_quote_lands_in_the_quote_store():
+    client = InMemoryRedis()
+    run(client.set("stockgpt:quote_IBM", encode_value(quote(), time.time() - 10), ex=300))
+    store = QuoteStore()
+    loader, cache = worker(client, stores={"quote": store})
+
+    data, _ = run(loader.load("quote_IBM", fail_if_called))
+
+    assert isinstance(cache.peek("quote_IBM"), StoredEntry)
+    assert store.get("IBM") == data
+    assert store.age("IBM") == pytest.approx(10, abs=1)
+
+
+def test_l2_disabled_without_a_client():
+    cache = CacheService()
+    loader = DataLoader(cache, RequestCoalescer(), RedisCache(url=""))
+    fetch = Fetch(quote())
+
+    run(loader.load("quote_IBM", fetch))
+    run(loader.load("quote_IBM", fetch))
+
+    assert fetch.calls == 1
+    assert loader.shared_cache.stats == {"hits": 0, "misses": 0, "sets": 0, "errors": 0}
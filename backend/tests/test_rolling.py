@@ -0,0 +1,87 @@
+"""Rolling indicator state and the live quote price folded into overview fields"""
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app import mcp_server
+from app.models import StockOverview, StockQuote
+from app.rolling import RollingStatsStore
+
+LAST_BAR = 20376  # 2025-10-15
+
+
+def rolling(closes) -> RollingStatsStore:
+    store = RollingStatsStore(path="")
+    n = len(closes)
+    store.catch_up("IBM", {
+        "date": np.arange(LAST_BAR - n + 1, LAST_BAR + 1),
+        "high": np.asarray(closes, dtype=float),
+        "low": np.asarray(closes, dtype=float),
+        "close": np.asarray(closes, dtype=float),
+    })
+    return store
+
+
+def test_overview_fields_from_bars_only():
+    store = rolling([100.0] * 50)
+
+    assert store.overview_fields("IBM") == {"moving_avg_50": "100.0000"}
+
+
+def test_live_price_for_a_new_day_is_folded_in():
+    store = rolling([100.0] * 50)
+
+    fields = store.overview_fields("IBM", 150.0, LAST_BAR + 1)
+
+    # The oldest close drops out of the window for the provisional one
+    assert fields["moving_avg_50"] == "101.0000"
+    assert store.get("IBM").bars == 50
+
+
+def test_live_price_for_a_day_already_in_the_bars_is_ignored():
+    store = rolling([100.0] * 50)
+
+    assert store.overview_fields("IBM", 150.0, LAST_BAR) == {"moving_avg_50": "100.0000"}
+
+
+@pytest.fixture
+def overview_route(monkeypatch):
+    monkeypatch.setattr(main, "rolling_stats", rolling([100.0] * 50))
+    main.cache_service.clear()
+    main.cache_service.set("overview_IBM", StockOverview(symbol="IBM", name="International Business Machines"))
+    yield TestClient(main.app)
+    main.cache_service.clear()
+
+
+def test_overview_route_uses_the_fresh_quote(overview_route):
+    assert overview_route.get("/api/stock/IBM").json()["moving_avg_50"] == "100.0000"
+
+    main.quote_store.update(StockQuote(symbol="IBM", price=150.0, latest_trading_day="2025-10-16"))
+    response = overview_route.get("/api/stock/IBM")
+
+    assert response.json()["moving_avg_50"] == "101.0000"
+    # Re-encoded in place rather than piling up one body per quote
+    assert list(main.cache_service.peek("overview_IBM").encoded) == ["rolling"]
+
+
+def test_mcp_server_reloads_rolling_state_in_the_background(tmp_path, monkeypatch):
+    saved = rolling([100.0] * 50)
+    saved.path = str(tmp_path / "rolling_state.json")
+    asyncio.run(saved.save())
+    monkeypatch.setattr(mcp_server.rolling_store, "path", saved.path)
+    monkeypatch.setattr(mcp_server.rolling_store, "states", {})
+    monkeypatch.setattr(mcp_server, "ROLLING_RELOAD_INTERVAL", 0.01)
+
+    async def scenario():
+        watcher = asyncio.create_task(mcp_server.watch_rolling_state())
+        for _ in range(100):
+            if mcp_server.rolling_snapshot("IBM") is not None:
+                break
+            await asyncio.sleep(0.01)
+        watcher.cancel()
+        return mcp_server.rolling_snapshot("IBM")
+
+    assert asyncio.run(scenario())["sma_50"] == 100.0
@@ -35,6 +35,16 @@ const StockDetail = () => {
     }
   }, [symbol]);
 
+  // Live updates instead of polling: merge changed quote fields as they arrive
+  useEffect(() => {
+    if (!symbol) {
+      return undefined;
+    }
+    return stockAPI.streamQuotes([symbol], (changes) => {
+      setQuote((current) => ({ ...(current || {}), ...changes }));
+    });
+  }, [symbol]);
+
   if (loading) {
     return (
       <div className="text-center py-12">
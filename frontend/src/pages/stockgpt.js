@@ -2,6 +2,7 @@
 import React, { useState } from 'react';
 // import { FaChartLine, FaRobot, FaSearch, FaArrowUp, FaArrowDown, FaStar } from 'react-icons/fa';
 import { ChartBarIcon, MagnifyingGlassIcon, HomeIcon, RocketLaunchIcon, ChatBubbleLeftIcon } from '@heroicons/react/24/outline';
+import { stockAPI } from '../services/api';
 import '../styles/stockgpt.css';
 
 const StockGPT = () => {
@@ -17,27 +18,32 @@ const StockGPT = () => {
     setMessages(prev => [...prev, userMessage]);
     setLoading(true);
     
+    const question = input;
     try {
-      // This would call your Python backend API
-      const response = await fetch('http://localhost:8000/api/analyze', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
+      // Answer tokens are appended to the last message as they stream in
+      let started = false;
+      const appendToAnswer = (text) => {
+        if (!started) {
+          started = true;
+          setLoading(false);
+          setMessages(prev => [...prev, { role: 'assistant', content: text }]);
+          return;
+        }
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, content: last.content + text }];
+        });
+      };
+
+      await stockAPI.askQuestion(question, {
+        onContext: (context) => {
+          if (context.stock_data) {
+            setStockData(context.stock_data);
+          }
         },
-        body: JSON.stringify({ query: input }),
+        onToken: appendToAnswer,
+        onError: (detail) => appendToAnswer(started ? `\n\n${detail}` : detail),
       });
-      
-      const data = await response.json();
-      
-      setMessages(prev => [...prev, { 
-        role: 'assistant', 
-        content: data.analysis,
-        stockData: data.stock_data
-      }]);
-      
-      if (data.stock_data) {
-        setStockData(data.stock_data);
-      }
     } catch (error) {
       console.error('Error:', error);
       setMessages(prev => [...prev, { 
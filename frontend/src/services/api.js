@@ -38,6 +38,51 @@ export const stockAPI = {
     }
   },
 
+  // Subscribe to live quote updates (Server-Sent Events).
+  // onUpdate receives only the fields that changed; returns an unsubscribe function.
+  streamQuotes: (symbols, onUpdate) => {
+    const source = new EventSource(
+      `${API_BASE_URL}/api/stream/quotes?symbols=${encodeURIComponent(symbols.join(','))}`
+    );
+    source.addEventListener('quote', (event) => onUpdate(JSON.parse(event.data)));
+    return () => source.close();
+  },
+
+  // Ask StockGPT a question; the answer streams back as Server-Sent Events over a POST.
+  // handlers: onContext({symbol, stock_data}), onToken(text), onDone({cached}), onError(detail)
+  askQuestion: async (question, handlers = {}) => {
+    const response = await fetch(`${API_BASE_URL}/api/ask`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ question }),
+    });
+    if (!response.ok) {
+      const body = await response.json().catch(() => ({}));
+      throw new Error(body.detail || 'Failed to get an answer');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const events = buffer.split('\n\n');
+      buffer = events.pop();
+      for (const raw of events) {
+        const event = raw.match(/^event: (.*)$/m)?.[1];
+        const data = raw.match(/^data: (.*)$/m)?.[1];
+        if (!event || !data) continue;
+        const payload = JSON.parse(data);
+        if (event === 'context') handlers.onContext?.(payload);
+        else if (event === 'token') handlers.onToken?.(payload.text);
+        else if (event === 'done') handlers.onDone?.(payload);
+        else if (event === 'error') handlers.onError?.(payload.detail);
+      }
+    }
+  },
+
   // Get health status
   getHealth: async () => {
     try {